@@ -0,0 +1,235 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "pandas",
+#     "pyarrow",
+# ]
+# ///
+
+"""
+非阻塞的分块写入器
+抓取协程把数据块放进有界队列即可返回，序列化和磁盘 I/O 在线程池里完成，
+网络请求和写盘可以同时进行；队列满时 write() 会等待，形成背压
+"""
+
+import asyncio
+import json
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Union
+
+import pandas as pd
+
+from metrics import METRICS, MetricsRegistry
+
+Chunk = Union[pd.DataFrame, List[Dict[str, Any]]]
+
+_STOP = object()
+
+
+class AsyncFrameWriter:
+    """
+    在后台线程中按顺序追加写入数据块
+
+    用法:
+        async with AsyncFrameWriter("prices.csv") as writer:
+            async for rows in fetch_rows():
+                await writer.write(rows)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fmt: str = "csv",
+        max_pending: int = 8,
+        executor: Optional[Executor] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        """
+        Args:
+            path: 输出文件路径
+            fmt: 输出格式，"csv"、"jsonl" 或 "parquet"
+            max_pending: 队列中最多等待写入的数据块数
+            executor: 执行写入的线程池，默认使用单线程池以保证写入顺序
+            metrics: 指标注册表，None 时使用全局的 METRICS
+        """
+        if fmt not in ("csv", "jsonl", "parquet"):
+            raise ValueError(f"不支持的输出格式: {fmt}")
+        self.path = path
+        self.fmt = fmt
+        self.rows_written = 0
+        self.chunks_written = 0
+        self.bytes_written = 0
+        self.metrics = metrics or METRICS
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="frame-writer"
+        )
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        self._columns: Optional[List[str]] = None
+        self._handle = None
+        self._parquet_writer = None
+
+    async def __aenter__(self) -> "AsyncFrameWriter":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+
+    @property
+    def pending(self) -> int:
+        """队列中等待写入的数据块数"""
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        """启动后台写入任务；write() 会在第一次调用时自动启动"""
+        if self._closed:
+            raise RuntimeError(f"写入器已关闭: {self.path}")
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def write(self, chunk: Chunk) -> None:
+        """
+        提交一个数据块；只在队列已满时等待
+
+        Args:
+            chunk: DataFrame 或 dict 列表（dict 列表会在后台线程中转换）
+
+        Raises:
+            RuntimeError: 写入器已关闭
+        """
+        # 未调用 start() 时自动启动，否则队列满后没有人取走数据，会一直等待
+        self.start()
+        self._raise_if_stopped()
+        # 队列满时后台任务可能在等待期间失败，之后不会再有人取走数据，
+        # 所以同时等待入队和后台任务，任务先结束就把异常抛给调用方
+        put = asyncio.ensure_future(self._queue.put(chunk))
+        try:
+            await asyncio.wait({put, self._task}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            put.cancel()
+            raise
+        if not put.done():
+            put.cancel()
+        self._raise_if_stopped()
+        self.metrics.set("writer_queue_depth", self.pending, path=self.path)
+
+    def _raise_if_stopped(self) -> None:
+        if self._task is not None and self._task.done():
+            # 后台写入已失败时抛出其异常，正常结束说明写入器已关闭
+            self._task.result()
+            raise RuntimeError(f"写入器已关闭: {self.path}")
+
+    async def close(self) -> None:
+        """等待队列中的数据全部落盘并释放文件句柄"""
+        if self._task is None:
+            return
+        self._closed = True
+        try:
+            if not self._task.done():
+                # 同样与后台任务赛跑，任务失败时不会卡在已满的队列上
+                stop = asyncio.ensure_future(self._queue.put(_STOP))
+                await asyncio.wait(
+                    {stop, self._task}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not stop.done():
+                    stop.cancel()
+            await self._task
+        finally:
+            await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._close_files
+            )
+            if self._owns_executor:
+                self._executor.shutdown(wait=False)
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                chunk = await self._queue.get()
+                self.metrics.set("writer_queue_depth", self.pending, path=self.path)
+                if chunk is _STOP:
+                    return
+                await loop.run_in_executor(self._executor, self._write_chunk, chunk)
+        except BaseException:
+            # 丢弃未写入的数据块，释放在 put 上等待的协程
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self.metrics.set("writer_queue_depth", 0, path=self.path)
+            raise
+
+    def _write_chunk(self, chunk: Chunk) -> None:
+        if isinstance(chunk, pd.DataFrame):
+            df = chunk
+        else:
+            df = pd.DataFrame.from_records(chunk)
+        if df.empty:
+            return
+        if self._columns is None:
+            self._columns = list(df.columns)
+        elif list(df.columns) != self._columns:
+            # 后续数据块按第一个数据块的列对齐，保证文件结构一致
+            df = df.reindex(columns=self._columns)
+
+        if self.fmt == "csv":
+            if self._handle is None:
+                self._handle = open(self.path, "w", newline="", encoding="utf-8")
+                df.to_csv(self._handle, index=False)
+            else:
+                df.to_csv(self._handle, index=False, header=False)
+        elif self.fmt == "jsonl":
+            if self._handle is None:
+                self._handle = open(self.path, "w", encoding="utf-8")
+            for record in df.to_dict(orient="records"):
+                self._handle.write(json.dumps(record, ensure_ascii=False, default=str))
+                self._handle.write("\n")
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(
+                    self.path, table.schema, compression="zstd"
+                )
+            self._parquet_writer.write_table(table.cast(self._parquet_writer.schema))
+
+        if self._handle is not None:
+            size = self._handle.tell()
+        else:
+            # ParquetWriter 每次 write_table 都会写出完整的 row group
+            size = os.path.getsize(self.path)
+        self.metrics.inc("writer_rows_total", len(df), path=self.path)
+        self.metrics.inc(
+            "writer_bytes_out_total", size - self.bytes_written, path=self.path
+        )
+        self.bytes_written = size
+        self.rows_written += len(df)
+        self.chunks_written += 1
+
+    def _close_files(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+
+async def main() -> None:
+    """演示：写入与模拟的网络请求交替进行"""
+    async with AsyncFrameWriter("/tmp/async_writer_demo.csv") as writer:
+        for i in range(20):
+            await asyncio.sleep(0.01)  # 模拟网络请求
+            rows = [{"code": f"S{i}-{j}", "close": j * 1.5} for j in range(1000)]
+            await writer.write(rows)
+    print(f"写入 {writer.chunks_written} 块，共 {writer.rows_written} 行")
+    print(METRICS.render_prometheus())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
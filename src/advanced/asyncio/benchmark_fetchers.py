@@ -0,0 +1,299 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "aiohttp",
+#     "pandas",
+#     "pyarrow",
+# ]
+# ///
+
+"""
+抓取代码的离线压测
+在本进程启动 mock_eodhd_server，每个并发档位在独立子进程中运行抓取，
+统计吞吐（请求/秒）、单次 HTTP 请求的 p50/p95/p99 延迟和子进程峰值内存，
+不需要真实 Token，也不消耗 API 额度
+
+用法:
+    uv run src/advanced/asyncio/benchmark_fetchers.py --levels 1 5 20 50 --count 500
+    uv run src/advanced/asyncio/benchmark_fetchers.py --scenario bulk --error-rate 0.02
+    uv run src/advanced/asyncio/benchmark_fetchers.py --quarters 400 --decode-workers 4
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import sys
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from eodhd_client import EODHDClient
+from json_decode_pool import FUNDAMENTAL_FIELDS, JSONDecodePool
+from mock_eodhd_server import MockConfig, MockEODHDServer
+from resilience import RetryPolicy
+
+RESULT_PREFIX = "BENCHMARK_RESULT "
+
+
+class TimedClient(EODHDClient):
+    """记录每次 HTTP 请求（含重试中的每一次）耗时的客户端"""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.latencies: List[float] = []
+
+    async def _request(self, *args: Any, **kwargs: Any):
+        started = time.perf_counter()
+        try:
+            return await super()._request(*args, **kwargs)
+        finally:
+            self.latencies.append(time.perf_counter() - started)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """最近秩法百分位数，values 为空时返回 0"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def peak_rss_mb() -> float:
+    """当前进程的峰值常驻内存（MB）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def _fundamentals(
+    client: EODHDClient,
+    concurrency: int,
+    count: int,
+    decoder: Optional[JSONDecodePool] = None,
+) -> int:
+    from eodhd_symbol import fetch_multiple_symbols_details
+
+    symbols = [f"S{i:05d}" for i in range(count)]
+    results = await fetch_multiple_symbols_details(
+        "mock", symbols, max_concurrent=concurrency, client=client, decoder=decoder
+    )
+    return len(results)
+
+
+async def _bulk(
+    client: EODHDClient,
+    concurrency: int,
+    count: int,
+    decoder: Optional[JSONDecodePool] = None,
+) -> int:
+    from eodhd_bluksymbol_price import fetch_bulk_eod_prices_async
+
+    start = date(2020, 1, 1)
+    days = [(start + timedelta(days=i)).isoformat() for i in range(count)]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_one(day: str) -> list:
+        async with semaphore:
+            return await fetch_bulk_eod_prices_async(client, "US", day)
+
+    results = await asyncio.gather(*(fetch_one(day) for day in days))
+    return sum(1 for rows in results if rows)
+
+
+SCENARIOS = {"fundamentals": _fundamentals, "bulk": _bulk}
+
+
+async def run_level(
+    base_url: str,
+    scenario: str,
+    concurrency: int,
+    count: int,
+    decode_workers: int = 0,
+) -> Dict[str, Any]:
+    """
+    在当前进程中跑一个并发档位
+
+    Args:
+        base_url: 模拟服务器地址
+        scenario: "fundamentals" 或 "bulk"
+        concurrency: 最大并发请求数
+        count: 请求的股票数（fundamentals）或日期数（bulk）
+        decode_workers: 解码进程数，0 表示在事件循环线程内解析（只影响 fundamentals）
+
+    Returns:
+        本档位的统计结果
+    """
+    decoder = (
+        JSONDecodePool(decode_workers, fields=FUNDAMENTAL_FIELDS)
+        if decode_workers
+        else None
+    )
+    async with TimedClient(
+        "mock",
+        base_url=base_url,
+        limit=max(concurrency, 1),
+        limit_per_host=max(concurrency, 1),
+        retry_policy=RetryPolicy(base_delay=0.05, max_delay=1.0),
+    ) as client:
+        started = time.perf_counter()
+        try:
+            succeeded = await SCENARIOS[scenario](client, concurrency, count, decoder)
+        finally:
+            if decoder is not None:
+                decoder.close()
+        elapsed = time.perf_counter() - started
+        latencies = client.latencies
+        return {
+            "concurrency": concurrency,
+            "requests": len(latencies),
+            "succeeded": succeeded,
+            "elapsed_s": round(elapsed, 3),
+            "req_per_s": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "reuse_ratio": round(client.stats.reuse_ratio, 3),
+        }
+
+
+async def _run_worker(
+    base_url: str, scenario: str, concurrency: int, count: int, decode_workers: int
+) -> Optional[Dict[str, Any]]:
+    """在子进程中跑一个档位，峰值内存互不干扰"""
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        __file__,
+        "--worker",
+        "--base-url",
+        base_url,
+        "--scenario",
+        scenario,
+        "--levels",
+        str(concurrency),
+        "--count",
+        str(count),
+        "--decode-workers",
+        str(decode_workers),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await process.communicate()
+    for line in stdout.decode("utf-8", errors="replace").splitlines():
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX) :])
+    print(f"并发 {concurrency} 档位运行失败:\n{stderr.decode('utf-8', errors='replace')}")
+    return None
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    columns = [
+        "concurrency",
+        "requests",
+        "succeeded",
+        "req_per_s",
+        "p50_ms",
+        "p95_ms",
+        "p99_ms",
+        "peak_rss_mb",
+        "reuse_ratio",
+    ]
+    widths = [max(len(c), 10) for c in columns]
+    print("  ".join(c.rjust(w) for c, w in zip(columns, widths)))
+    for row in results:
+        print("  ".join(str(row[c]).rjust(w) for c, w in zip(columns, widths)))
+
+
+async def run_benchmark(
+    levels: List[int],
+    scenario: str = "fundamentals",
+    count: int = 500,
+    config: Optional[MockConfig] = None,
+    output: Optional[str] = None,
+    decode_workers: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    启动模拟服务器，依次跑每个并发档位
+
+    Args:
+        levels: 并发档位列表
+        scenario: "fundamentals" 或 "bulk"
+        count: 每个档位请求的股票数或日期数
+        config: 模拟服务器参数
+        output: 结果 JSON 的保存路径，便于和历史结果对比
+        decode_workers: 解码进程数，0 表示在事件循环线程内解析
+
+    Returns:
+        每个档位的统计结果
+    """
+    results = []
+    async with MockEODHDServer(config) as server:
+        print(f"模拟服务器: {server.base_url}，场景: {scenario}，数量: {count}")
+        for concurrency in levels:
+            result = await _run_worker(
+                server.base_url, scenario, concurrency, count, decode_workers
+            )
+            if result is not None:
+                results.append(result)
+        stats = server.stats
+        print(
+            f"服务端共处理 {stats.requests} 个请求，注入 500: {stats.errors}，"
+            f"注入 429: {stats.throttled}"
+        )
+    print_report(results)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到 {output}")
+    return results
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="EODHD 抓取代码离线压测")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="fundamentals")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 5, 10, 20, 50])
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--quarters", type=int, default=MockConfig.quarters)
+    parser.add_argument("--decode-workers", type=int, default=0)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", default=None, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    if args.worker:
+        result = asyncio.run(
+            run_level(
+                args.base_url,
+                args.scenario,
+                args.levels[0],
+                args.count,
+                args.decode_workers,
+            )
+        )
+        print(RESULT_PREFIX + json.dumps(result))
+    else:
+        asyncio.run(
+            run_benchmark(
+                args.levels,
+                args.scenario,
+                args.count,
+                MockConfig(
+                    latency_ms=args.latency_ms,
+                    jitter_ms=args.jitter_ms,
+                    error_rate=args.error_rate,
+                    throttle_rate=args.throttle_rate,
+                    quarters=args.quarters,
+                ),
+                args.output,
+                args.decode_workers,
+            )
+        )
@@ -0,0 +1,155 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "numpy",
+#     "pandas",
+# ]
+# ///
+
+"""
+数据质量分析的压测：逐列多次扫描 vs 单遍融合统计
+原来的 analyze_csv_data_quality 对每列分别执行 isnull().sum()、== ""、str.strip().eq("")、
+nunique()、value_counts() 和 str.len()；csv_profiler 每列只 factorize 一次，
+其余统计在不同值上按出现次数加权得到。两种方式都从同一个已读入的 DataFrame 开始计时，
+另外给出包含读文件在内的整体耗时
+
+用法:
+    uv run src/advanced/asyncio/benchmark_profiler.py
+    uv run src/advanced/asyncio/benchmark_profiler.py --files us_stock_symbols_full.csv --repeat 5
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+import pandas as pd
+
+from csv_profiler import profile_csv, profile_frame
+
+DEFAULT_FILES = [
+    "src/advanced/asyncio/us_stock_symbols_full.csv",
+    "src/advanced/asyncio/us_delisted_stock_symbols_full.csv",
+]
+
+
+def legacy_profile(df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """原来 analyze_csv_data_quality 中逐列多次扫描的统计"""
+    stats = {}
+    for col in df.columns:
+        column = df[col]
+        is_text = not pd.api.types.is_numeric_dtype(column)
+        stats[col] = {
+            "nulls": column.isnull().sum(),
+            "empty": (column == "").sum() if is_text else 0,
+            "blank": column.str.strip().eq("").sum() if is_text else 0,
+            "unique": column.nunique(),
+            "top": column.value_counts().head(15),
+            "lengths": column.str.len().value_counts().head(10) if is_text else None,
+        }
+    stats["__duplicates__"] = df.duplicated().sum()
+    return stats
+
+
+def synthetic_symbols(path: str, rows: int) -> None:
+    """生成与 exchange-symbol-list 导出列相同的模拟文件"""
+    exchanges = ["NASDAQ", "NYSE", "NYSE ARCA", "OTC", "PINK", "BATS", "NYSE MKT"]
+    types = ["Common Stock", "ETF", "FUND", "Preferred Stock", "Mutual Fund"]
+    pd.DataFrame(
+        {
+            "Code": [f"{random.choice('ABCDEFGH')}{i:05d}" for i in range(rows)],
+            "Name": [f"Company {random.randint(0, rows)} Inc" for _ in range(rows)],
+            "Country": "USA",
+            "Exchange": [random.choice(exchanges) for _ in range(rows)],
+            "Currency": "USD",
+            "Type": [random.choice(types) for _ in range(rows)],
+            "Isin": [None if random.random() < 0.4 else f"US{i:010d}" for i in range(rows)],
+        }
+    ).to_csv(path, index=False)
+
+
+def best_of(func: Callable[[], Any], repeat: int) -> float:
+    """多次运行取最短耗时（秒）"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def benchmark_file(path: str, repeat: int, chunksize: int) -> List[Dict[str, Any]]:
+    """
+    对单个文件比较两种统计方式
+    分别在默认字符串类型（pandas 3 为 pyarrow 字符串）和 object 字符串
+    （pandas 2 的默认类型）上计时
+
+    Returns:
+        每种字符串类型一行：各项耗时（秒）与加速比
+    """
+    df = pd.read_csv(path)
+    text_columns = df.select_dtypes(include=["object", "string"]).columns
+    # pandas 2 下两者相同，字典中只保留一项
+    frames = {
+        str(df[text_columns[0]].dtype) if len(text_columns) else "object": df,
+        "object": df.astype({c: object for c in text_columns}),
+    }
+    results = []
+    for storage, frame in frames.items():
+        legacy = best_of(lambda: legacy_profile(frame), repeat)
+        fused = best_of(lambda: profile_frame(frame), repeat)
+        results.append(
+            {
+                "file": os.path.basename(path),
+                "strings": storage,
+                "rows": len(frame),
+                "legacy_s": round(legacy, 3),
+                "fused_s": round(fused, 3),
+                "speedup": round(legacy / fused, 2) if fused else 0.0,
+            }
+        )
+    # 包含读文件在内的整体耗时，使用当前 pandas 的默认读取方式
+    legacy_total = best_of(lambda: legacy_profile(pd.read_csv(path)), repeat)
+    fused_total = best_of(lambda: profile_csv(path, chunksize=None), repeat)
+    chunked_total = best_of(lambda: profile_csv(path, chunksize=chunksize), repeat)
+    print(
+        f"{os.path.basename(path)} 含读文件: 逐列扫描 {legacy_total:.3f}s，"
+        f"单遍统计 {fused_total:.3f}s，分块({chunksize:,} 行) {chunked_total:.3f}s"
+    )
+    return results
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    columns = list(results[0])
+    widths = [max(len(c), *(len(str(r[c])) for r in results)) for c in columns]
+    print("  ".join(c.rjust(w) for c, w in zip(columns, widths)))
+    for row in results:
+        print("  ".join(str(row[c]).rjust(w) for c, w in zip(columns, widths)))
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="数据质量分析压测")
+    parser.add_argument("--files", nargs="+", default=DEFAULT_FILES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument(
+        "--rows", type=int, default=50_000, help="文件不存在时生成的模拟行数"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    files = [path for path in args.files if os.path.exists(path)]
+    if not files:
+        path = os.path.join(tempfile.gettempdir(), "us_stock_symbols_synthetic.csv")
+        synthetic_symbols(path, args.rows)
+        print(f"未找到股票列表 CSV，使用 {args.rows:,} 行模拟数据: {path}")
+        files = [path]
+
+    results = []
+    for path in files:
+        results.extend(benchmark_file(path, args.repeat, args.chunksize))
+    print_report(results)
@@ -1,10 +1,20 @@
 """
 配置管理模块
-支持从环境变量和配置文件读取配置
+支持从环境变量和配置文件读取配置；
+导入本模块不会读取环境变量，配置在第一次调用 get_settings() 时解析并缓存
 """
 
 import os
-from typing import Optional
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+# 各接口默认读超时（秒）：股票列表和批量价格响应体较大，给更长时间
+DEFAULT_READ_TIMEOUTS: Dict[str, float] = {
+    "exchange-symbol-list": 120.0,
+    "fundamentals": 30.0,
+    "eod-bulk-last-day": 120.0,
+}
 
 
 def get_eodhd_api_token() -> str:
@@ -49,22 +59,236 @@ def get_timeout_seconds() -> int:
         return 30
 
 
-# 配置字典
-CONFIG = {
-    "api_token": get_eodhd_api_token(),
-    "max_concurrent": get_max_concurrent_requests(),
-    "timeout": get_timeout_seconds(),
-}
+def get_rate_limit_per_minute() -> int:
+    """
+    获取每分钟 API 调用额度（按 API credit 计）
+
+    Returns:
+        每分钟额度
+    """
+    try:
+        return int(os.getenv("EODHD_RATE_LIMIT_PER_MINUTE", "1000"))
+    except ValueError:
+        return 1000
+
+
+def get_daily_call_limit() -> int:
+    """
+    获取每日 API 调用额度（按 API credit 计）
+
+    Returns:
+        每日额度
+    """
+    try:
+        return int(os.getenv("EODHD_DAILY_CALL_LIMIT", "100000"))
+    except ValueError:
+        return 100000
+
+
+def get_cache_path() -> str:
+    """
+    获取响应缓存文件路径，设置为空字符串可禁用缓存
+
+    Returns:
+        SQLite 缓存文件路径
+    """
+    return os.getenv("EODHD_CACHE_PATH", ".eodhd_cache/responses.sqlite")
+
+
+def get_cache_max_mb() -> int:
+    """
+    获取响应缓存大小上限（MB）
+
+    Returns:
+        缓存大小上限
+    """
+    try:
+        return int(os.getenv("EODHD_CACHE_MAX_MB", "512"))
+    except ValueError:
+        return 512
+
+
+def get_base_url() -> str:
+    """
+    获取 EODHD API 根地址，可指向本地模拟服务器（mock_eodhd_server.py）做离线压测
+
+    Returns:
+        API 根地址
+    """
+    return os.getenv("EODHD_BASE_URL", "https://eodhd.com/api").rstrip("/")
+
+
+def get_connect_timeout_seconds() -> float:
+    """
+    获取建立连接的超时时间（秒）
+
+    Returns:
+        连接超时时间
+    """
+    try:
+        return float(os.getenv("EODHD_CONNECT_TIMEOUT", "10"))
+    except ValueError:
+        return 10.0
+
+
+def get_read_timeout_seconds(endpoint: str) -> float:
+    """
+    获取某个接口的读超时（秒）
+    优先级：EODHD_READ_TIMEOUT_<接口名> > TIMEOUT_SECONDS（已设置时） > 接口默认值
+
+    Args:
+        endpoint: 接口名，例如 "fundamentals"、"eod-bulk-last-day"
+
+    Returns:
+        读超时时间
+    """
+    key = "EODHD_READ_TIMEOUT_" + endpoint.upper().replace("-", "_")
+    if os.getenv("TIMEOUT_SECONDS"):
+        default = float(get_timeout_seconds())
+    else:
+        default = DEFAULT_READ_TIMEOUTS.get(endpoint, float(get_timeout_seconds()))
+    try:
+        return float(os.getenv(key, str(default)))
+    except ValueError:
+        return float(default)
+
+
+def get_pool_limit() -> int:
+    """
+    获取连接池总连接数上限
+
+    Returns:
+        连接数上限
+    """
+    try:
+        return int(os.getenv("EODHD_POOL_LIMIT", "100"))
+    except ValueError:
+        return 100
+
+
+def get_pool_limit_per_host() -> int:
+    """
+    获取连接池单主机连接数上限
+
+    Returns:
+        单主机连接数上限
+    """
+    try:
+        return int(os.getenv("EODHD_POOL_LIMIT_PER_HOST", "20"))
+    except ValueError:
+        return 20
+
+
+@dataclass(frozen=True)
+class EndpointTimeout:
+    """单个接口的超时设置（秒）"""
+
+    connect: float
+    read: float
+
+
+@dataclass(frozen=True)
+class Settings:
+    """EODHD 抓取相关的全部配置"""
+
+    api_token: Optional[str]
+    base_url: str
+    max_concurrent: int
+    timeout: int
+    connect_timeout: float
+    read_timeouts: Dict[str, float]
+    pool_limit: int
+    pool_limit_per_host: int
+    rate_limit_per_minute: int
+    daily_call_limit: int
+    cache_path: str
+    cache_max_mb: int
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """从环境变量读取配置；缺少 API Token 时不报错，等真正使用时再报错"""
+        return cls(
+            api_token=os.getenv("EODHD_API_TOKEN") or None,
+            base_url=get_base_url(),
+            max_concurrent=get_max_concurrent_requests(),
+            timeout=get_timeout_seconds(),
+            connect_timeout=get_connect_timeout_seconds(),
+            read_timeouts={
+                endpoint: get_read_timeout_seconds(endpoint)
+                for endpoint in DEFAULT_READ_TIMEOUTS
+            },
+            pool_limit=get_pool_limit(),
+            pool_limit_per_host=get_pool_limit_per_host(),
+            rate_limit_per_minute=get_rate_limit_per_minute(),
+            daily_call_limit=get_daily_call_limit(),
+            cache_path=get_cache_path(),
+            cache_max_mb=get_cache_max_mb(),
+        )
+
+    def require_api_token(self) -> str:
+        """
+        Returns:
+            API Token
+
+        Raises:
+            ValueError: 未设置 EODHD_API_TOKEN
+        """
+        if not self.api_token:
+            raise ValueError("未找到环境变量 EODHD_API_TOKEN")
+        return self.api_token
+
+    def timeout_for(self, endpoint: str) -> EndpointTimeout:
+        """
+        Args:
+            endpoint: 接口名或接口路径，例如 "/fundamentals/AAPL.US"
+
+        Returns:
+            该接口的连接/读超时
+        """
+        name = endpoint.strip("/").split("/", 1)[0]
+        return EndpointTimeout(
+            connect=self.connect_timeout,
+            read=self.read_timeouts.get(name, float(self.timeout)),
+        )
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """第一次调用时解析环境变量，之后返回缓存的配置"""
+    return Settings.from_env()
+
+
+def reload_settings() -> Settings:
+    """环境变量变化后重新解析配置"""
+    get_settings.cache_clear()
+    return get_settings()
+
+
+def __getattr__(name: str) -> Any:
+    # 兼容旧代码中的 config.CONFIG，访问时才解析
+    if name == "CONFIG":
+        return asdict(get_settings())
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def print_config_info():
     """打印当前配置信息（隐藏敏感信息）"""
+    settings = get_settings()
+    token = settings.api_token or ""
     print("\n=== 当前配置 ===")
-    print(
-        f"API Token: {'*' * 10}{CONFIG['api_token'][-6:] if len(CONFIG['api_token']) > 6 else '****'}"
-    )
-    print(f"最大并发数: {CONFIG['max_concurrent']}")
-    print(f"超时时间: {CONFIG['timeout']}秒")
+    if not token:
+        print("API Token: 未设置")
+    else:
+        print(f"API Token: {'*' * 10}{token[-6:] if len(token) > 6 else '****'}")
+    print(f"API 地址: {settings.base_url}")
+    print(f"最大并发数: {settings.max_concurrent}")
+    print(f"超时时间: {settings.timeout}秒 (连接 {settings.connect_timeout}秒)")
+    for endpoint, read_timeout in settings.read_timeouts.items():
+        print(f"  {endpoint} 读超时: {read_timeout}秒")
+    print(f"连接池: 总数 {settings.pool_limit}, 单主机 {settings.pool_limit_per_host}")
+    print(f"每分钟额度: {settings.rate_limit_per_minute}")
+    print(f"每日额度: {settings.daily_call_limit}")
+    print(f"响应缓存: {settings.cache_path or '已禁用'} (上限 {settings.cache_max_mb}MB)")
     print("================\n")
 
 
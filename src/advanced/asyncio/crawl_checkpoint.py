@@ -0,0 +1,249 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "aiohttp",
+#     "pandas",
+# ]
+# ///
+
+"""
+可断点续传的基本面数据抓取
+抓取过程中把 计划/完成/失败 的股票记录追加写入本地检查点日志，
+结果逐行写入 JSONL 输出文件；中断后重新运行只抓取未完成的股票，
+且每个股票在输出文件中恰好出现一次
+"""
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from config import get_eodhd_api_token, print_config_info
+from eodhd_client import EODHDClient
+from eodhd_symbol import iter_symbols_details
+from metrics import METRICS, report_periodically, start_metrics_server
+
+
+@dataclass
+class CrawlSummary:
+    """一次抓取的统计结果"""
+
+    planned: int = 0
+    skipped: int = 0
+    completed: int = 0
+    failed: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        return (
+            f"计划: {self.planned}, 跳过(已完成): {self.skipped}, "
+            f"本次完成: {self.completed}, 失败: {len(self.failed)}"
+        )
+
+
+def _read_complete_records(path: str, required: str) -> List[Dict[str, Any]]:
+    """
+    读取 JSONL 文件中的完整记录，并截掉崩溃时写了一半的尾行
+    不截掉的话，续写的第一条记录会接在半行后面，两条记录一起损坏
+
+    Args:
+        path: JSONL 文件路径
+        required: 每条记录必须包含的字段
+
+    Returns:
+        第一条不完整记录之前的全部记录
+    """
+    records = []
+    valid_bytes = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            if not isinstance(record, dict) or required not in record:
+                break
+            records.append(record)
+            valid_bytes += len(line)
+    if valid_bytes < os.path.getsize(path):
+        with open(path, "r+b") as f:
+            f.truncate(valid_bytes)
+    return records
+
+
+class CrawlCheckpoint:
+    """
+    抓取检查点
+
+    - 检查点日志（JSONL）：记录 plan / done / failed 事件，只追加写入
+    - 输出文件（JSONL）：每行 {"symbol": ..., "detail": ...}，先于 done 事件落盘，
+      因此输出文件是"已完成"的最终依据，恢复时会与日志对账
+    """
+
+    def __init__(self, checkpoint_path: str, output_path: str):
+        """
+        Args:
+            checkpoint_path: 检查点日志路径
+            output_path: 结果输出路径
+        """
+        self.checkpoint_path = checkpoint_path
+        self.output_path = output_path
+        self.plan: List[str] = []
+        self.done: Set[str] = set()
+        self.failed: Dict[str, str] = {}
+        self._journal = None
+        self._output = None
+
+    def load(self) -> None:
+        """读取已有检查点和输出文件，恢复抓取状态"""
+        if os.path.exists(self.checkpoint_path):
+            # 日志和输出文件一样，最后一行可能在崩溃时只写了一半
+            for event in _read_complete_records(self.checkpoint_path, "event"):
+                kind = event["event"]
+                if kind == "plan":
+                    self.plan = event["symbols"]
+                elif kind == "done":
+                    self.done.add(event["symbol"])
+                    self.failed.pop(event["symbol"], None)
+                elif kind == "failed":
+                    self.failed[event["symbol"]] = event.get("reason", "")
+
+        # 输出文件为准：写了结果但没来得及记 done 的股票同样视为已完成
+        self.done |= self._reconcile_output()
+        for symbol in self.done:
+            self.failed.pop(symbol, None)
+
+    def _reconcile_output(self) -> Set[str]:
+        if not os.path.exists(self.output_path):
+            return set()
+        records = _read_complete_records(self.output_path, "symbol")
+        return {record["symbol"] for record in records}
+
+    def open(self) -> None:
+        self._journal = open(self.checkpoint_path, "a", encoding="utf-8")
+        self._output = open(self.output_path, "a", encoding="utf-8")
+
+    def close(self) -> None:
+        for handle in (self._journal, self._output):
+            if handle is not None:
+                handle.close()
+        self._journal = None
+        self._output = None
+
+    def _append_event(self, event: Dict[str, Any]) -> None:
+        event["ts"] = time.time()
+        self._journal.write(json.dumps(event, ensure_ascii=False) + "\n")
+        self._journal.flush()
+
+    def record_plan(self, symbols: List[str]) -> None:
+        self.plan = symbols
+        self._append_event({"event": "plan", "symbols": symbols})
+
+    def record_done(self, symbol: str, detail: Dict[str, Any]) -> None:
+        if symbol in self.done:
+            return
+        line = json.dumps({"symbol": symbol, "detail": detail}, ensure_ascii=False)
+        self._output.write(line + "\n")
+        self._output.flush()
+        os.fsync(self._output.fileno())
+        self.done.add(symbol)
+        self.failed.pop(symbol, None)
+        self._append_event({"event": "done", "symbol": symbol})
+        size = len(line.encode("utf-8")) + 1
+        METRICS.inc("writer_rows_total", path=self.output_path)
+        METRICS.inc("writer_bytes_out_total", size, path=self.output_path)
+
+    def record_failed(self, symbol: str, reason: str) -> None:
+        self.failed[symbol] = reason
+        self._append_event({"event": "failed", "symbol": symbol, "reason": reason})
+
+    def pending(self, retry_failed: bool = True) -> List[str]:
+        """计划中尚未完成的股票，保持原有顺序"""
+        return [
+            s
+            for s in self.plan
+            if s not in self.done and (retry_failed or s not in self.failed)
+        ]
+
+
+async def crawl_symbols_details(
+    api_token: str,
+    symbols: Optional[Iterable[str]],
+    checkpoint_path: str = "us_stock_details.checkpoint.jsonl",
+    output_path: str = "us_stock_details.jsonl",
+    window: Optional[int] = None,
+    retry_failed: bool = True,
+    client: Optional[EODHDClient] = None,
+) -> CrawlSummary:
+    """
+    带检查点的全量基本面抓取，可随时中断并重新运行
+
+    Args:
+        api_token: EODHD API 密钥
+        symbols: 本次要抓取的股票代码，None 表示沿用检查点中的计划
+        checkpoint_path: 检查点日志路径
+        output_path: 结果输出路径（JSONL）
+        window: 最大在途请求数，None 时使用 MAX_CONCURRENT_REQUESTS
+        retry_failed: 是否重试上次失败的股票
+        client: 共享的 EODHD 客户端，None 时临时创建
+
+    Returns:
+        抓取统计
+    """
+    checkpoint = CrawlCheckpoint(checkpoint_path, output_path)
+    checkpoint.load()
+    checkpoint.open()
+    try:
+        if symbols is not None:
+            # 去重并保持顺序
+            planned = list(dict.fromkeys(symbols))
+            if planned != checkpoint.plan:
+                checkpoint.record_plan(planned)
+        todo = checkpoint.pending(retry_failed)
+        result = CrawlSummary(
+            planned=len(checkpoint.plan), skipped=len(checkpoint.plan) - len(todo)
+        )
+        print(f"待抓取 {len(todo)} 个股票，已完成 {len(checkpoint.done)} 个")
+
+        async for symbol, detail in iter_symbols_details(
+            api_token, todo, window=window, client=client
+        ):
+            if detail:
+                checkpoint.record_done(symbol, detail)
+                result.completed += 1
+            else:
+                checkpoint.record_failed(symbol, "empty response")
+                result.failed.append(symbol)
+    finally:
+        checkpoint.close()
+
+    print(result.summary())
+    return result
+
+
+async def main():
+    """主函数：基于已保存的股票列表做可续传的全量抓取"""
+    import pandas as pd
+
+    print_config_info()
+    api_token = get_eodhd_api_token()
+
+    symbols = None
+    if os.path.exists("us_stock_symbols_full.csv"):
+        symbols = pd.read_csv("us_stock_symbols_full.csv")["Code"].dropna().tolist()
+
+    # 抓取期间可访问 http://127.0.0.1:9464/metrics，并每 30 秒把摘要追加到 crawl_metrics.jsonl
+    runner = await start_metrics_server()
+    reporter = asyncio.create_task(report_periodically(30, path="crawl_metrics.jsonl"))
+    try:
+        await crawl_symbols_details(api_token, symbols)
+    finally:
+        reporter.cancel()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,638 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "numpy",
+#     "pandas",
+# ]
+# ///
+
+"""
+分块流式的 CSV 数据质量分析
+按块读取文件，每列维护可合并的累加器：空值数、空字符串数、长度统计、唯一值数和高频值；
+每块中的每列只 factorize 一遍，其余统计都在不同值上按出现次数加权得到，
+整行去重的哈希也由各列的值哈希组合而成，不再对整块数据重复扫描
+
+内存由块大小和唯一值计数决定：唯一值数（包括整行去重）精确计算时保存值的 64 位哈希，
+每列不超过 max_exact_distinct 个，整个文件合计不超过 max_exact_bytes，
+超出时占用最多的计数转为 HyperLogLog 估算（每列 16 KB，误差约 1%），报告中以 "约" 标出；
+因此几 GB 的文件也能在有界内存中完成，唯一值很多的列得到的是估算值
+"""
+
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+# 每列精确计数时最多保存的哈希个数（每个 8 字节，即 1.6 MB）；
+# 哈希数组保持有序，每块插入新值时会复制一次，上限同时限制了这部分开销
+DEFAULT_MAX_EXACT_DISTINCT = 200_000
+
+# 整个文件所有精确计数合计的哈希字节数上限
+DEFAULT_MAX_EXACT_BYTES = 32 * 1024 * 1024
+
+# 值分布最多跟踪的不同值个数，超过后不再统计高频值
+DEFAULT_MAX_TRACKED_VALUES = 1000
+
+# 报告中统计匹配数的格式检查：列名 -> 正则
+DEFAULT_PATTERNS: Dict[str, str] = {"Code": r"[^A-Z0-9]"}
+
+INTEGER_PATTERN = r"[+-]?\d+"
+
+# pandas 读 CSV 时识别为布尔值的字符串
+BOOL_VALUES = ("True", "TRUE", "true", "False", "FALSE", "false")
+
+# 重复值示例的个数
+MAX_DUPLICATE_EXAMPLES = 5
+
+# 整行哈希中缺失值使用的固定哈希
+NULL_HASH = 0x9E3779B97F4A7C15
+
+# 合并各列哈希时的乘数（大奇数，按 uint64 溢出回绕）
+ROW_HASH_MULTIPLIER = np.uint64(0x100000001B3)
+
+
+class HyperLogLog:
+    """基于 64 位哈希的 HyperLogLog 基数估计，寄存器逐个取最大值即可合并"""
+
+    def __init__(self, precision: int = 14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        p = self.precision
+        index = (hashes >> np.uint64(64 - p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - p)) - 1)
+        # rest 不超过 2^50，转为 float64 后 frexp 得到的位长是精确的
+        bit_length = np.frexp(rest.astype(np.float64))[1]
+        rank = (64 - p - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # 小基数时用线性计数修正
+            raw = m * np.log(m / zeros)
+        return int(round(raw))
+
+
+class DistinctCounter:
+    """先精确、超过上限后转为 HyperLogLog 的唯一值计数"""
+
+    def __init__(self, max_exact: int = DEFAULT_MAX_EXACT_DISTINCT):
+        self.max_exact = max_exact
+        self.hashes: Optional[np.ndarray] = np.empty(0, dtype=np.uint64)
+        self.sketch: Optional[HyperLogLog] = None
+
+    @property
+    def exact(self) -> bool:
+        return self.sketch is None
+
+    @property
+    def nbytes(self) -> int:
+        return self.hashes.nbytes if self.exact else self.sketch.registers.nbytes
+
+    def add(
+        self, hashes: np.ndarray, unique: bool = False, need_seen: bool = True
+    ) -> Optional[np.ndarray]:
+        """
+        加入一批哈希
+
+        Args:
+            hashes: 64 位哈希
+            unique: 调用方保证批内没有重复，可以用更快的不稳定排序
+            need_seen: 是否需要返回每个哈希是否出现过
+
+        Returns:
+            每个哈希是否已出现过（同批内重复或之前的批次出现过）；
+            已转为估算时无法判断，全部为 False；need_seen 为 False 时返回 None
+        """
+        if self.sketch is not None:
+            self.sketch.add_hashes(hashes)
+            return np.zeros(len(hashes), dtype=bool) if need_seen else None
+        # self.hashes 保持有序：批内排序后用二分查找判断是否出现过，再把新值插入
+        if need_seen:
+            # 批内有重复时用稳定排序，保证首次出现的位置被判为未出现过
+            order = np.argsort(hashes, kind=None if unique else "stable")
+            ordered = hashes[order]
+        else:
+            ordered = np.sort(hashes)
+        seen_sorted = np.zeros(len(ordered), dtype=bool)
+        if not unique:
+            seen_sorted[1:] = ordered[1:] == ordered[:-1]
+        if len(self.hashes):
+            positions = np.searchsorted(self.hashes, ordered)
+            known = positions < len(self.hashes)
+            known[known] = self.hashes[positions[known]] == ordered[known]
+            seen_sorted |= known
+            self.hashes = np.insert(
+                self.hashes, positions[~seen_sorted], ordered[~seen_sorted]
+            )
+        else:
+            self.hashes = ordered[~seen_sorted]
+        if len(self.hashes) > self.max_exact:
+            self.to_sketch()
+        if not need_seen:
+            return None
+        seen = np.empty(len(hashes), dtype=bool)
+        seen[order] = seen_sorted
+        return seen
+
+    def to_sketch(self) -> None:
+        """转为 HyperLogLog 估算，释放保存的哈希"""
+        self.sketch = HyperLogLog()
+        self.sketch.add_hashes(self.hashes)
+        self.hashes = None
+
+    def merge(self, other: "DistinctCounter") -> None:
+        if self.exact and other.exact:
+            self.hashes = np.union1d(self.hashes, other.hashes)
+            if len(self.hashes) > self.max_exact:
+                self.to_sketch()
+            return
+        if self.exact:
+            self.to_sketch()
+        if other.exact:
+            self.sketch.add_hashes(other.hashes)
+        else:
+            self.sketch.merge(other.sketch)
+
+    def count(self) -> int:
+        return len(self.hashes) if self.exact else self.sketch.estimate()
+
+
+def _hash_values(values: pd.Series) -> np.ndarray:
+    # 传入的已是不同值，不需要先 factorize 再哈希
+    return pd.util.hash_pandas_object(values, index=False, categorize=False).to_numpy()
+
+
+@dataclass
+class ColumnProfile:
+    """单列的累加器；update 逐块累加，merge 合并两个独立统计的结果"""
+
+    name: str
+    max_exact_distinct: int = DEFAULT_MAX_EXACT_DISTINCT
+    max_tracked_values: int = DEFAULT_MAX_TRACKED_VALUES
+    pattern: Optional[str] = None
+    rows: int = 0
+    nulls: int = 0
+    empty_strings: int = 0
+    blank_strings: int = 0
+    numeric: bool = True
+    integer: bool = True
+    boolean: bool = True
+    length_count: int = 0
+    length_sum: int = 0
+    lengths: Counter = field(default_factory=Counter)
+    shortest: Optional[str] = None
+    longest: Optional[str] = None
+    pattern_matches: int = 0
+    values: Optional[Counter] = field(default_factory=Counter)
+    duplicate_examples: List[str] = field(default_factory=list)
+    distinct: DistinctCounter = None
+
+    def __post_init__(self):
+        if self.distinct is None:
+            self.distinct = DistinctCounter(self.max_exact_distinct)
+
+    def update(self, column: pd.Series) -> np.ndarray:
+        """
+        累加一块数据
+
+        整列只扫描一次：factorize 得到每行的值编号和不同值列表，
+        其余统计（空字符串、长度、类型、格式、值分布、唯一值、重复）
+        都在不同值上计算，再用各值的出现次数加权
+
+        Args:
+            column: 一列数据（缺失值为 NaN）
+
+        Returns:
+            每行值的 64 位哈希（缺失值为 NULL_HASH），用于整行去重
+        """
+        codes, uniques = pd.factorize(column)
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        self.rows += len(column)
+        self.nulls += len(column) - int(counts.sum())
+        if not len(uniques):
+            return np.full(len(column), NULL_HASH, dtype=np.uint64)
+
+        values = pd.Series(uniques, copy=False)
+        if not pd.api.types.is_string_dtype(values):
+            values = values.astype(str)
+        self.empty_strings += int(counts[values.eq("").to_numpy()].sum())
+        self.blank_strings += int(counts[values.str.strip().eq("").to_numpy()].sum())
+
+        # 类型推断只需要知道是否全部为数字，遇到第一个非数字值即停止
+        if self.numeric:
+            try:
+                pd.to_numeric(values)
+            except (ValueError, TypeError):
+                self.numeric = self.integer = False
+        if self.integer:
+            self.integer = bool(values.str.fullmatch(INTEGER_PATTERN).all())
+        if self.boolean:
+            self.boolean = bool(values.isin(BOOL_VALUES).all())
+
+        lengths = values.str.len().to_numpy()
+        self.length_count += int(counts.sum())
+        self.length_sum += int(lengths @ counts)
+        by_length = np.bincount(lengths, weights=counts)
+        nonzero = np.flatnonzero(by_length)
+        self.lengths.update(dict(zip(nonzero.tolist(), by_length[nonzero].astype(int).tolist())))
+        shortest = values.iat[int(lengths.argmin())]
+        longest = values.iat[int(lengths.argmax())]
+        if self.shortest is None or len(shortest) < len(self.shortest):
+            self.shortest = shortest
+        if self.longest is None or len(longest) > len(self.longest):
+            self.longest = longest
+
+        if self.pattern:
+            matches = values.str.contains(self.pattern).to_numpy(dtype=bool)
+            self.pattern_matches += int(counts[matches].sum())
+
+        if self.values is not None:
+            if len(uniques) > self.max_tracked_values:
+                self.values = None
+            else:
+                self.values.update(dict(zip(values.tolist(), counts.tolist())))
+                if len(self.values) > self.max_tracked_values:
+                    self.values = None
+
+        # 块内出现多次或之前的块出现过的即为重复值
+        hashes = _hash_values(values)
+        seen_before = self.distinct.add(hashes, unique=True)
+        if len(self.duplicate_examples) < MAX_DUPLICATE_EXAMPLES and (
+            seen_before.any() or (counts > 1).any()
+        ):
+            self._add_duplicate_examples(codes, values, seen_before)
+        return np.append(hashes, np.uint64(NULL_HASH))[codes]
+
+    def _add_duplicate_examples(
+        self, codes: np.ndarray, values: pd.Series, seen_before: np.ndarray
+    ) -> None:
+        """
+        按值第一次重复出现的行的顺序记录示例，结果与分块方式无关
+
+        Args:
+            codes: 每行的值编号（缺失值为 -1）
+            values: 不同值
+            seen_before: 每个不同值是否在之前的块中出现过
+        """
+        valid = codes >= 0
+        repeated = pd.Series(codes).duplicated().to_numpy() & valid
+        repeated[valid] |= seen_before[codes[valid]]
+        for code in pd.unique(codes[repeated]).tolist():
+            value = values.iat[code]
+            if value not in self.duplicate_examples:
+                self.duplicate_examples.append(value)
+            if len(self.duplicate_examples) >= MAX_DUPLICATE_EXAMPLES:
+                break
+
+    def merge(self, other: "ColumnProfile") -> None:
+        """合并另一段数据（例如另一个文件或另一个进程）的统计结果"""
+        for name in (
+            "rows",
+            "nulls",
+            "empty_strings",
+            "blank_strings",
+            "length_count",
+            "length_sum",
+            "pattern_matches",
+        ):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.numeric = self.numeric and other.numeric
+        self.integer = self.integer and other.integer
+        self.boolean = self.boolean and other.boolean
+        self.lengths.update(other.lengths)
+        if other.shortest is not None and (
+            self.shortest is None or len(other.shortest) < len(self.shortest)
+        ):
+            self.shortest = other.shortest
+        if other.longest is not None and (
+            self.longest is None or len(other.longest) > len(self.longest)
+        ):
+            self.longest = other.longest
+        if self.values is not None and other.values is not None:
+            self.values.update(other.values)
+            if len(self.values) > self.max_tracked_values:
+                self.values = None
+        else:
+            self.values = None
+        for value in other.duplicate_examples:
+            if (
+                len(self.duplicate_examples) < MAX_DUPLICATE_EXAMPLES
+                and value not in self.duplicate_examples
+            ):
+                self.duplicate_examples.append(value)
+        self.distinct.merge(other.distinct)
+
+    @property
+    def present(self) -> int:
+        return self.rows - self.nulls
+
+    @property
+    def total_missing(self) -> int:
+        return self.nulls + self.empty_strings
+
+    @property
+    def unique_count(self) -> int:
+        return self.distinct.count()
+
+    @property
+    def unique_exact(self) -> bool:
+        return self.distinct.exact
+
+    @property
+    def dtype(self) -> str:
+        """按 pandas 整体读入时的推断规则给出的类型"""
+        if not self.present:
+            return "float64"
+        if self.boolean:
+            # 有缺失值的布尔列，pandas 读入为 object
+            return "object" if self.nulls else "bool"
+        if not self.numeric:
+            return "object"
+        return "int64" if self.integer and not self.nulls else "float64"
+
+    @property
+    def mean_length(self) -> float:
+        return self.length_sum / self.length_count if self.length_count else 0.0
+
+    @property
+    def min_length(self) -> int:
+        return min(self.lengths) if self.lengths else 0
+
+    @property
+    def max_length(self) -> int:
+        return max(self.lengths) if self.lengths else 0
+
+    def top_values(self, n: int) -> List[tuple]:
+        """出现次数最多的 n 个值；不同值超过跟踪上限时为空"""
+        return self.values.most_common(n) if self.values is not None else []
+
+
+@dataclass
+class CSVProfile:
+    """整个文件的统计结果"""
+
+    path: str
+    columns: Dict[str, ColumnProfile] = field(default_factory=dict)
+    rows: int = 0
+    chunks: int = 0
+    row_distinct: DistinctCounter = field(default_factory=DistinctCounter)
+    head: Optional[pd.DataFrame] = None
+    tail: Optional[pd.DataFrame] = None
+
+    def update(
+        self,
+        chunk: pd.DataFrame,
+        patterns: Optional[Mapping[str, str]] = None,
+        max_exact_distinct: int = DEFAULT_MAX_EXACT_DISTINCT,
+        max_tracked_values: int = DEFAULT_MAX_TRACKED_VALUES,
+        max_exact_bytes: int = DEFAULT_MAX_EXACT_BYTES,
+    ) -> None:
+        """累加一块数据"""
+        patterns = DEFAULT_PATTERNS if patterns is None else patterns
+        row_hashes = np.zeros(len(chunk), dtype=np.uint64)
+        for name in chunk.columns:
+            profile = self.columns.get(name)
+            if profile is None:
+                profile = self.columns[name] = ColumnProfile(
+                    name,
+                    max_exact_distinct=max_exact_distinct,
+                    max_tracked_values=max_tracked_values,
+                    pattern=patterns.get(name),
+                )
+            # 整行哈希由各列的值哈希组合而成，不需要再扫描一遍整块数据
+            row_hashes *= ROW_HASH_MULTIPLIER
+            row_hashes ^= profile.update(chunk[name])
+        self.row_distinct.add(row_hashes, need_seen=False)
+        self._limit_exact_bytes(max_exact_bytes)
+        self.rows += len(chunk)
+        self.chunks += 1
+        if self.head is None:
+            self.head = chunk.head()
+        recent = chunk if self.tail is None else pd.concat([self.tail, chunk.tail()])
+        self.tail = recent.tail()
+
+    def _limit_exact_bytes(self, max_exact_bytes: int) -> None:
+        """精确计数合计超出预算时，从占用最多的开始转为估算"""
+        counters = [c.distinct for c in self.columns.values()] + [self.row_distinct]
+        exact = [c for c in counters if c.exact]
+        total = sum(c.nbytes for c in exact)
+        for counter in sorted(exact, key=lambda c: c.nbytes, reverse=True):
+            if total <= max_exact_bytes:
+                break
+            total -= counter.nbytes
+            counter.to_sketch()
+
+    def merge(self, other: "CSVProfile") -> None:
+        """合并另一段数据的统计结果（other 视为排在本段之后）"""
+        for name, profile in other.columns.items():
+            if name in self.columns:
+                self.columns[name].merge(profile)
+            else:
+                self.columns[name] = profile
+        self.rows += other.rows
+        self.chunks += other.chunks
+        self.row_distinct.merge(other.row_distinct)
+        if self.head is None:
+            self.head = other.head
+        if other.tail is not None:
+            recent = other.tail if self.tail is None else pd.concat([self.tail, other.tail])
+            self.tail = recent.tail()
+
+    @property
+    def duplicate_rows(self) -> int:
+        # 估算的唯一行数可能略大于总行数
+        return max(self.rows - self.row_distinct.count(), 0)
+
+
+def profile_frame(df: pd.DataFrame, **kwargs) -> CSVProfile:
+    """统计已经在内存中的 DataFrame（数值列按其字符串形式统计长度和格式）"""
+    profile = CSVProfile(path="<DataFrame>")
+    profile.update(df, **kwargs)
+    return profile
+
+
+def profile_csv(
+    csv_file: str,
+    chunksize: Optional[int] = 100_000,
+    patterns: Optional[Mapping[str, str]] = None,
+    max_exact_distinct: int = DEFAULT_MAX_EXACT_DISTINCT,
+    max_tracked_values: int = DEFAULT_MAX_TRACKED_VALUES,
+    max_exact_bytes: int = DEFAULT_MAX_EXACT_BYTES,
+) -> CSVProfile:
+    """
+    分块读取 CSV 并统计
+
+    所有列都以字符串读入，避免各块推断出的类型不一致；
+    文件整体的类型按 pandas 的推断规则由统计结果给出
+
+    Args:
+        csv_file: CSV 文件路径
+        chunksize: 每块的行数；None 时整体读入作为一块
+        patterns: 需要统计匹配数的列名 -> 正则，默认检查 Code 中的特殊字符
+        max_exact_distinct: 每列精确计算唯一值数的上限
+        max_tracked_values: 每列跟踪值分布的不同值上限
+        max_exact_bytes: 所有精确计数合计保存的哈希字节数上限
+
+    Returns:
+        CSVProfile
+
+    Raises:
+        FileNotFoundError: 文件不存在
+    """
+    profile = CSVProfile(path=csv_file)
+    if chunksize is None:
+        chunks = [pd.read_csv(csv_file, dtype=str)]
+    else:
+        chunks = pd.read_csv(csv_file, dtype=str, chunksize=chunksize)
+    for chunk in chunks:
+        profile.update(
+            chunk, patterns, max_exact_distinct, max_tracked_values, max_exact_bytes
+        )
+    return profile
+
+
+def _pct(count: int, total: int, digits: int = 2) -> float:
+    return round(count / total * 100, digits) if total else 0.0
+
+
+def print_profile_report(
+    profile: CSVProfile,
+    top_n: int = 15,
+    category_limit: int = 50,
+    show_complete: bool = True,
+    format_checks: bool = True,
+) -> None:
+    """
+    按 analyze_csv_data_quality 的格式输出报告
+
+    Args:
+        profile: 统计结果
+        top_n: 分类字段显示的高频值个数
+        category_limit: 唯一值少于该数的 object 列显示值分布（布尔值列除外）
+        show_complete: 缺失率排序中是否列出无缺失的列
+        format_checks: 是否输出 Code/Name 的格式检查
+    """
+    rows = profile.rows
+    columns = profile.columns
+    print(f"\n=== {profile.path} 数据质量分析 ===")
+    print(f"总行数: {rows:,}")
+    print(f"总列数: {len(columns)}")
+    print(f"列名: {list(columns)}")
+
+    print(f"\n{'='*50}")
+    print("空值详细分析:")
+    print(f"{'='*50}")
+    for name, col in columns.items():
+        status = "❌" if col.total_missing > 0 else "✅"
+        print(f"{status} {name}:")
+        print(f"    NULL值: {col.nulls:,} ({_pct(col.nulls, rows)}%)")
+        if col.empty_strings > 0:
+            print(f"    空字符串: {col.empty_strings:,}")
+        print(f"    总缺失: {col.total_missing:,} ({_pct(col.total_missing, rows)}%)")
+        print()
+
+    print(f"\n{'='*50}")
+    print("缺失率排序 (从高到低):")
+    print(f"{'='*50}")
+    for col in sorted(columns.values(), key=lambda c: c.total_missing, reverse=True):
+        if col.total_missing > 0:
+            print(
+                f"{col.name}: {_pct(col.total_missing, rows)}% "
+                f"({col.total_missing:,}/{rows:,})"
+            )
+        elif show_complete:
+            print(f"{col.name}: 无缺失值 ✅")
+
+    approx = "" if profile.row_distinct.exact else "约 "
+    print(f"\n重复行数: {approx}{profile.duplicate_rows:,}")
+
+    code = columns.get("Code")
+    if code is not None:
+        approx = "" if code.unique_exact else "约 "
+        print(f"唯一股票代码数: {approx}{code.unique_count:,}")
+        duplicate_codes = rows - code.unique_count
+        if duplicate_codes > 0:
+            print(f"重复的股票代码: {approx}{duplicate_codes:,} 个")
+            if code.duplicate_examples:
+                print(f"重复代码示例: {code.duplicate_examples}")
+
+    print(f"\n{'='*50}")
+    print("数据类型和基本统计:")
+    print(f"{'='*50}")
+    for name, col in columns.items():
+        approx = "" if col.unique_exact else "约 "
+        print(f"{name}: {col.dtype}, {approx}{col.unique_count:,} 个唯一值")
+        if (
+            col.dtype == "object"
+            and not col.boolean
+            and col.unique_count < category_limit
+        ):
+            print(f"  前{top_n}个值分布:")
+            for value, count in col.top_values(top_n):
+                display_value = value[:30] + "..." if len(value) > 30 else value
+                print(f"    '{display_value}': {count:,} ({_pct(count, rows, 1)}%)")
+        print()
+
+    if profile.head is not None:
+        print(f"\n{'='*50}")
+        print("数据样本 (前5行):")
+        print(f"{'='*50}")
+        print(profile.head.to_string(index=False))
+        if rows > 5:
+            print(f"\n数据样本 (后5行):")
+            print(profile.tail.to_string(index=False))
+
+    if not format_checks:
+        return
+    print(f"\n{'='*50}")
+    print("数据质量检查:")
+    print(f"{'='*50}")
+    if code is not None:
+        print("股票代码格式分析:")
+        print(f"  代码长度分布:")
+        for length, count in code.lengths.most_common(10):
+            print(f"    {length}位: {count:,} ({_pct(count, rows, 1)}%)")
+        print(f"  包含特殊字符的代码: {code.pattern_matches:,}")
+
+    name_col = columns.get("Name")
+    if name_col is not None and name_col.length_count:
+        print(f"\n公司名称长度分析:")
+        print(f"  平均长度: {name_col.mean_length:.1f} 字符")
+        print(f"  最长: {name_col.max_length} 字符")
+        print(f"  最短: {name_col.min_length} 字符")
+        print(f"  最长名称: {name_col.longest}")
+        print(f"  最短名称: {name_col.shortest}")
+
+
+if __name__ == "__main__":
+    import os
+    import random
+    import tempfile
+
+    path = os.path.join(tempfile.gettempdir(), "csv_profiler_demo.csv")
+    types = ["Common Stock", "ETF", "FUND", "Preferred Stock"]
+    pd.DataFrame(
+        {
+            "Code": [f"S{i % 180_000:06d}" for i in range(200_000)],
+            "Name": [f"Company {random.randint(0, 10**6)} Inc" for _ in range(200_000)],
+            "Type": [random.choice(types) for _ in range(200_000)],
+            "Isin": [None if i % 7 else f"US{i:010d}" for i in range(200_000)],
+        }
+    ).to_csv(path, index=False)
+
+    started = time.perf_counter()
+    profile = profile_csv(path, chunksize=50_000)
+    print(f"分 {profile.chunks} 块统计耗时 {time.perf_counter() - started:.2f}s")
+    print_profile_report(profile)
@@ -1,16 +1,54 @@
 # /// script
 # requires-python = ">=3.12"
 # dependencies = [
+#     "aiohttp",
+#     "pandas",
 #     "python-dotenv",
 #     "requests",
 # ]
 # ///
 
 
+import asyncio
 import os
 import requests
 from dotenv import load_dotenv
 import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Iterable, Optional, Union
+from urllib.parse import quote, urlencode
+
+import aiohttp
+import pandas as pd
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar,
+    GoodFriday,
+    Holiday,
+    USLaborDay,
+    USMartinLutherKingJr,
+    USMemorialDay,
+    USPresidentsDay,
+    USThanksgivingDay,
+    nearest_workday,
+    sunday_to_monday,
+)
+
+from async_writer import AsyncFrameWriter
+from config import get_settings
+from eodhd_client import EODHDClient
+from ohlcv_store import OHLCVStore
+from rate_limiter import QuotaRateLimiter
+from resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    call_with_resilience_sync,
+    print_retry,
+)
+from response_cache import ResponseCache, make_cache_key
+from single_flight import SyncSingleFlight
 
 # 加载 .env 文件中的环境变量 (API_TOKEN)
 load_dotenv()
@@ -19,61 +57,519 @@ load_dotenv()
 API_TOKEN = os.getenv("EODHD_API_TOKEN")
 BASE_URL = "https://eodhd.com/api"
 
+# 单个请求 URL 的最大长度；大多数服务器和代理支持 8KB，这里保守取值
+MAX_URL_LENGTH = 2000
+
+# 多个线程同时请求同一交易所、同一日期的批量价格时只发一次请求
+_bulk_flight: SyncSingleFlight[bytes] = SyncSingleFlight()
+
+
+@dataclass
+class BulkBatchError:
+    """一个批次的失败信息"""
+
+    index: int
+    symbols: list[str]
+    error: str
+
+
+@dataclass
+class BulkPriceResult:
+    """分批请求的合并结果，rows 按批次顺序拼接"""
+
+    rows: list[dict] = field(default_factory=list)
+    errors: list[BulkBatchError] = field(default_factory=list)
+    batches: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+def split_symbol_batches(
+    symbols: list[str], base_url_length: int, max_url_length: int = MAX_URL_LENGTH
+) -> list[list[str]]:
+    """
+    按 URL 长度把股票代码切分成批次，保持原有顺序
+
+    Args:
+        symbols (list[str]): 股票代码列表。
+        base_url_length (int): 不含 symbols 参数时完整 URL 的长度。
+        max_url_length (int): 单个 URL 的最大长度。
+
+    Returns:
+        list[list[str]]: 批次列表；每批编码后的 "&symbols=..." 加上 base_url_length 不超过上限。
+    """
+    budget = max_url_length - base_url_length - len("&symbols=")
+    batches: list[list[str]] = []
+    batch: list[str] = []
+    used = 0
+    for symbol in symbols:
+        # 逗号编码为 %2C，占 3 个字符
+        cost = len(quote(symbol, safe="")) + (3 if batch else 0)
+        if batch and used + cost > budget:
+            batches.append(batch)
+            batch, used = [], 0
+            cost -= 3
+        batch.append(symbol)
+        used += cost
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _base_url_length(url: str, params: dict) -> int:
+    return len(url) + 1 + len(urlencode(params))
+
+
+def _fetch_bulk_batch(
+    url: str,
+    endpoint: str,
+    params: dict,
+    cache: Optional[ResponseCache],
+    retry_policy: Optional[RetryPolicy],
+    circuit_breaker: Optional[CircuitBreaker],
+) -> list[dict]:
+    """发送一个批次的请求（经过缓存、请求合并和重试），失败时抛出异常"""
+
+    def fetch() -> bytes:
+        cached = cache.lookup(endpoint, params) if cache else None
+        if cached is not None and cached.fresh:
+            print(f"命中缓存: {endpoint} date={params['date']}")
+            return cached.body
+
+        headers = cached.conditional_headers() if cached is not None else {}
+        timeout = get_settings().timeout_for(endpoint)
+
+        def send() -> requests.Response:
+            response = requests.get(
+                url,
+                params=params,
+                headers=headers,
+                timeout=(timeout.connect, timeout.read),
+            )
+            # 检查响应状态码，如果不是 2xx/304，则抛出异常交给重试策略判断
+            response.raise_for_status()
+            return response
+
+        response = call_with_resilience_sync(
+            send,
+            retry_policy or RetryPolicy(),
+            circuit_breaker,
+            on_retry=print_retry,
+        )
+        if response.status_code == 304 and cached is not None:
+            cache.refresh(cached, endpoint)
+            return cached.body
+        if cache is not None:
+            cache.store(endpoint, params, response.content, response.headers)
+        return response.content
+
+    # 相同参数的并发调用共享同一个请求；结果各自解析，互不影响
+    body = _bulk_flight.do(make_cache_key(endpoint, params), fetch)
+    try:
+        return json.loads(body)
+    except json.JSONDecodeError as e:
+        raise ValueError(
+            "无法解析返回的 JSON 数据，原始响应内容: "
+            + body.decode("utf-8", errors="replace")[:500]
+        ) from e
+
+
+def _describe_error(exc: Exception) -> str:
+    if isinstance(exc, requests.exceptions.HTTPError):
+        return f"HTTP 错误: {exc}，响应内容: {exc.response.text[:200]}"
+    if isinstance(exc, requests.exceptions.RequestException):
+        return f"请求错误: {exc}"
+    if isinstance(exc, CircuitOpenError):
+        return f"已熔断: {exc}"
+    return str(exc)
+
+
+def fetch_bulk_eod_prices_batched(
+    exchange: str,
+    date: str,
+    symbols: list[str],
+    cache: Optional[ResponseCache] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    circuit_breaker: Optional[CircuitBreaker] = None,
+    max_url_length: int = MAX_URL_LENGTH,
+    max_workers: Optional[int] = None,
+) -> BulkPriceResult:
+    """
+    按 URL 长度把股票代码分批，并发请求后按批次顺序合并结果
+
+    Args:
+        exchange (str): 交易所代码, 例如 'US'。
+        date (str): 查询日期，格式为 'YYYY-MM-DD'。
+        symbols (list[str]): 股票代码列表，数量不限。
+        cache (ResponseCache | None): 持久化响应缓存，每个批次单独缓存。
+        retry_policy (RetryPolicy | None): 重试策略。
+        circuit_breaker (CircuitBreaker | None): 熔断器，所有批次共享。
+        max_url_length (int): 单个请求 URL 的最大长度。
+        max_workers (int | None): 并发请求数，None 时使用 MAX_CONCURRENT_REQUESTS。
+
+    Returns:
+        BulkPriceResult: 合并后的价格数据以及失败批次的明细。
+    """
+    result = BulkPriceResult()
+    if not API_TOKEN:
+        result.errors.append(
+            BulkBatchError(0, list(symbols), "未找到 EODHD_API_TOKEN，请检查 .env 文件")
+        )
+        return result
+
+    endpoint = f"/eod-bulk-last-day/{exchange}"
+    url = f"{get_settings().base_url}{endpoint}"
+    base_params = {"api_token": API_TOKEN, "date": date, "fmt": "json"}
+    batches = split_symbol_batches(
+        symbols, _base_url_length(url, base_params), max_url_length
+    )
+    result.batches = len(batches)
+    print(f"请求 {exchange} {date} 的 {len(symbols)} 个股票，分为 {len(batches)} 批")
+
+    def run(batch: list[str]) -> list[dict]:
+        params = {**base_params, "symbols": ",".join(batch)}
+        return _fetch_bulk_batch(
+            url, endpoint, params, cache, retry_policy, circuit_breaker
+        )
+
+    workers = min(max_workers or get_settings().max_concurrent, len(batches)) or 1
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run, batch) for batch in batches]
+        # 按提交顺序收集，保证合并结果与输入顺序一致
+        for index, (batch, future) in enumerate(zip(batches, futures)):
+            try:
+                result.rows.extend(future.result())
+            except Exception as e:
+                error = BulkBatchError(index, batch, _describe_error(e))
+                result.errors.append(error)
+                print(
+                    f"第 {index + 1}/{len(batches)} 批（{batch[0]} ~ {batch[-1]}，"
+                    f"{len(batch)} 个）失败: {error.error}"
+                )
+    return result
+
 
 def get_bulk_eod_prices(
-    exchange: str, date: str, symbols: list[str]
+    exchange: str,
+    date: str,
+    symbols: list[str],
+    cache: Optional[ResponseCache] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    circuit_breaker: Optional[CircuitBreaker] = None,
 ) -> list[dict] | None:
     """
     使用 EODHD 的 Bulk API 获取多个股票在指定日期的日终价格。
+    股票较多时自动按 URL 长度分批并发请求，结果按输入顺序合并。
 
     Args:
         exchange (str): 交易所代码, 例如 'US'。
         date (str): 查询日期，格式为 'YYYY-MM-DD'。
         symbols (list[str]): 包含股票代码的列表，例如 ['AAPL.US', 'MSFT.US']。
+        cache (ResponseCache | None): 持久化响应缓存，命中时不再请求 API。
+        retry_policy (RetryPolicy | None): 重试策略，默认重试超时、连接错误、429 和 5xx。
+        circuit_breaker (CircuitBreaker | None): 熔断器，多次调用共享时才能发挥作用。
 
     Returns:
-        list[dict] | None: 包含价格数据的字典列表，如果请求失败则返回 None。
+        list[dict] | None: 包含价格数据的字典列表；部分批次失败时只包含成功批次的数据，
+        全部失败时返回 None。需要失败明细时使用 fetch_bulk_eod_prices_batched。
     """
-    if not API_TOKEN:
-        print("错误: 未找到 EODHD_API_TOKEN。请检查您的 .env 文件。")
+    result = fetch_bulk_eod_prices_batched(
+        exchange, date, symbols, cache, retry_policy, circuit_breaker
+    )
+    if result.errors and len(result.errors) >= result.batches:
+        if not API_TOKEN:
+            print("错误: 未找到 EODHD_API_TOKEN。请检查您的 .env 文件。")
         return None
+    if result.errors:
+        print(f"警告: {len(result.errors)}/{result.batches} 批请求失败，结果不完整")
+    return result.rows
+
 
-    # 将股票代码列表转换为逗号分隔的字符串
-    symbols_str = ",".join(symbols)
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    """美股（NYSE/NASDAQ）休市日历"""
 
-    # 构建 API 请求的 URL 和参数
+    rules = [
+        Holiday("NewYearsDay", month=1, day=1, observance=sunday_to_monday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday(
+            "Juneteenth",
+            month=6,
+            day=19,
+            start_date="2022-01-01",
+            observance=nearest_workday,
+        ),
+        Holiday("IndependenceDay", month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday("Christmas", month=12, day=25, observance=nearest_workday),
+    ]
+
+
+def trading_days(
+    start: str, end: str, exchange: str = "US", holidays: Iterable[str] = ()
+) -> list[str]:
+    """
+    生成日期区间内的交易日，跳过周末和节假日
+
+    Args:
+        start (str): 开始日期，格式为 'YYYY-MM-DD'（包含）。
+        end (str): 结束日期，格式为 'YYYY-MM-DD'（包含）。
+        exchange (str): 交易所代码，'US' 会使用内置的美股休市日历。
+        holidays (Iterable[str]): 额外的休市日期。
+
+    Returns:
+        list[str]: 'YYYY-MM-DD' 格式的交易日列表。
+    """
+    closed = pd.DatetimeIndex(pd.to_datetime(list(holidays)))
+    if exchange == "US":
+        closed = closed.union(NYSEHolidayCalendar().holidays(start, end))
+    days = pd.bdate_range(start, end, freq="C", holidays=closed)
+    return days.strftime("%Y-%m-%d").tolist()
+
+
+async def fetch_bulk_eod_prices_async(
+    client: EODHDClient,
+    exchange: str,
+    date: str,
+    symbols: Optional[list[str]] = None,
+    max_url_length: int = MAX_URL_LENGTH,
+    strict: bool = False,
+) -> list[dict]:
+    """
+    异步获取某个交易所在指定日期的日终价格
+    股票较多时按 URL 长度分批并发请求，结果按批次顺序合并，失败的批次单独报告
+
+    Args:
+        client (EODHDClient): 共享的 EODHD 客户端。
+        exchange (str): 交易所代码, 例如 'US'。
+        date (str): 查询日期，格式为 'YYYY-MM-DD'。
+        symbols (list[str] | None): 股票代码列表，None 表示整个交易所。
+        max_url_length (int): 单个请求 URL 的最大长度。
+        strict (bool): 有批次失败时抛出异常，而不是返回部分数据。
+
+    Returns:
+        list[dict]: 价格数据列表，请求失败的批次不包含在内。
+
+    Raises:
+        Exception: strict 为 True 时，第一个失败批次的异常。
+    """
     endpoint = f"/eod-bulk-last-day/{exchange}"
-    url = f"{BASE_URL}{endpoint}"
+    params = {"date": date}
+    if not symbols:
+        batches: list[Optional[list[str]]] = [None]
+    else:
+        base_length = _base_url_length(
+            f"{client.base_url}{endpoint}", client.build_params(params)
+        )
+        batches = split_symbol_batches(symbols, base_length, max_url_length)
+
+    async def fetch_one(batch: Optional[list[str]]) -> list[dict]:
+        batch_params = dict(params)
+        if batch:
+            batch_params["symbols"] = ",".join(batch)
+        return await client.get_json(endpoint, batch_params)
+
+    results = await asyncio.gather(
+        *(fetch_one(batch) for batch in batches), return_exceptions=True
+    )
+    rows: list[dict] = []
+    errors: list[BaseException] = []
+    for index, (batch, result) in enumerate(zip(batches, results)):
+        if not isinstance(result, BaseException):
+            rows.extend(result)
+            continue
+        where = f"{exchange} {date}"
+        if len(batches) > 1:
+            where += f" 第 {index + 1}/{len(batches)} 批（{len(batch)} 个股票）"
+        if isinstance(result, aiohttp.ClientResponseError):
+            print(f"获取 {where} 日终价格失败，状态码: {result.status}")
+        else:
+            print(f"获取 {where} 日终价格时出错: {result}")
+        errors.append(result)
+    if strict and errors:
+        raise errors[0]
+    return rows
 
-    params = {
-        "api_token": API_TOKEN,
-        "date": date,
-        "symbols": symbols_str,
-        "fmt": "json",
-    }
 
-    print(f"正在请求数据，URL: {url}")
-    print(f"参数: date={date}, symbols={symbols_str}")
+async def backfill_bulk_eod_prices(
+    client: EODHDClient,
+    exchanges: list[str],
+    start: str,
+    end: str,
+    symbols: Optional[list[str]] = None,
+    max_concurrent: int = 8,
+    return_exceptions: bool = False,
+) -> AsyncIterator[tuple[str, str, Union[list[dict], Exception]]]:
+    """
+    并发回填一段日期区间内多个交易所的日终价格，按完成顺序逐个产出
+
+    Args:
+        client (EODHDClient): 共享的 EODHD 客户端。
+        exchanges (list[str]): 交易所代码列表。
+        start (str): 开始日期（包含）。
+        end (str): 结束日期（包含）。
+        symbols (list[str] | None): 只取这些股票，None 表示整个交易所。
+        max_concurrent (int): 最大在途请求数。
+        return_exceptions (bool): 为 True 时，有批次失败的日期产出异常对象而不是部分数据，
+            调用方据此区分请求失败和当天确实没有数据。
 
+    Yields:
+        tuple[str, str, list[dict] | Exception]: (交易所, 日期, 价格数据列表或异常)。
+    """
+    semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def fetch_one(
+        exchange: str, date: str
+    ) -> tuple[str, str, Union[list[dict], Exception]]:
+        async with semaphore:
+            try:
+                rows = await fetch_bulk_eod_prices_async(
+                    client, exchange, date, symbols, strict=return_exceptions
+                )
+            except Exception as exc:
+                if not return_exceptions:
+                    raise
+                return exchange, date, exc
+            return exchange, date, rows
+
+    tasks = [
+        asyncio.create_task(fetch_one(exchange, date))
+        for exchange in exchanges
+        for date in trading_days(start, end, exchange)
+    ]
+    print(f"共 {len(tasks)} 个 (交易所, 交易日) 请求")
     try:
-        response = requests.get(url, params=params)
-        # 检查响应状态码，如果不是 200 OK，则抛出异常
-        response.raise_for_status()
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def backfill_to_csv(
+    exchanges: list[str],
+    start: str,
+    end: str,
+    filename: str = "bulk_eod_prices.csv",
+    symbols: Optional[list[str]] = None,
+) -> int:
+    """
+    回填日终价格并在数据到达时逐批追加写入 CSV
+    写盘由 AsyncFrameWriter 在后台线程完成，与网络请求并行
+
+    Args:
+        exchanges (list[str]): 交易所代码列表。
+        start (str): 开始日期（包含）。
+        end (str): 结束日期（包含）。
+        filename (str): 输出 CSV 文件名。
+        symbols (list[str] | None): 只取这些股票，None 表示整个交易所。
+
+    Returns:
+        int: 写入的行数。
+    """
+    async with EODHDClient(
+        API_TOKEN,
+        rate_limiter=QuotaRateLimiter.from_config(),
+        cache=ResponseCache.from_config(),
+    ) as client:
+        async with AsyncFrameWriter(filename) as writer:
+            async for exchange, date, rows in backfill_bulk_eod_prices(
+                client, exchanges, start, end, symbols
+            ):
+                if not rows:
+                    continue
+                await writer.write([{"exchange": exchange, **row} for row in rows])
+                print(f"{exchange} {date}: 收到 {len(rows)} 行，待写入 {writer.pending} 块")
+        print(f"连接统计: {client.stats.summary()}")
+    print(f"共写入 {writer.rows_written} 行到 {filename}")
+    return writer.rows_written
 
-        # 将响应的 JSON 文本解析为 Python 对象
-        data = response.json()
-        return data
 
-    except requests.exceptions.HTTPError as http_err:
-        print(f"HTTP 错误: {http_err}")
-        print(f"响应内容: {response.text}")
-    except requests.exceptions.RequestException as req_err:
-        print(f"请求错误: {req_err}")
-    except json.JSONDecodeError:
-        print("错误: 无法解析返回的 JSON 数据。可能是 API 响应格式不正确。")
-        print(f"原始响应内容: {response.text}")
+async def backfill_to_store(
+    exchange: str,
+    start: str,
+    end: str,
+    root: Optional[str] = None,
+    symbols: Optional[list[str]] = None,
+) -> int:
+    """
+    回填日终价格到内存映射的 OHLCV 存储
+    请求并发进行、完成顺序不定，存储只支持按日期追加，因此先暂存提前到达的日期，
+    按交易日顺序依次写入；某天请求失败或没有数据时在这一天停止，
+    不留下无法补写的空洞，重新运行会从这一天继续
+
+    Args:
+        exchange (str): 交易所代码。
+        start (str): 开始日期（包含）。
+        end (str): 结束日期（包含）。
+        root (str | None): 存储目录，默认 data/ohlcv/<交易所>。
+        symbols (list[str] | None): 只取这些股票，None 表示整个交易所。
+
+    Returns:
+        int: 写入的交易日数。
+    """
+    root = root or f"data/ohlcv/{exchange}"
+    store = OHLCVStore(root)
+    try:
+        # 已经写入过的日期不再请求；新日期必须晚于存储中的最后一天
+        last = store.dates[-1] if store.dates else None
+        days = [
+            d for d in trading_days(start, end, exchange) if last is None or d > last
+        ]
+        if not days:
+            print(f"{root} 已包含 {start} ~ {end} 的数据")
+            return 0
 
-    return None
+        arrived: dict[str, Union[list[dict], Exception]] = {}
+        position = 0
+        written = 0
+        failure: Optional[Exception] = None
+        async with EODHDClient.from_settings(api_token=API_TOKEN) as client:
+            results = backfill_bulk_eod_prices(
+                client, [exchange], days[0], days[-1], symbols, return_exceptions=True
+            )
+            async with aclosing(results):
+                async for _, date, rows in results:
+                    arrived[date] = rows
+                    while position < len(days) and days[position] in arrived:
+                        day = days[position]
+                        rows = arrived[day]
+                        if isinstance(rows, Exception):
+                            failure = rows
+                            break
+                        if not rows:
+                            # 之后的交易日已经有数据，说明这天休市（日历之外的临时休市）；
+                            # 否则可能是数据尚未发布，等后面的日期到达后再判断
+                            if not any(
+                                isinstance(later, list) and later
+                                for later in arrived.values()
+                            ):
+                                break
+                            print(f"{exchange} {day}: 没有数据，之后的交易日有数据，按休市跳过")
+                        else:
+                            count = store.append_day(day, rows)
+                            written += 1
+                            print(f"{exchange} {day}: 写入 {count} 只股票")
+                        del arrived[day]
+                        position += 1
+                    if failure is not None:
+                        break
+        if position < len(days):
+            # 失败原因已在 fetch_bulk_eod_prices_async 中打印
+            reason = "请求失败" if failure is not None else "没有数据"
+            print(
+                f"{exchange} {days[position]}: {reason}，停止回填，"
+                f"重新运行会从这一天继续"
+            )
+        print(f"共写入 {written} 个交易日到 {root}，矩阵形状 {store.shape}")
+        return written
+    finally:
+        store.close()
 
 
 if __name__ == "__main__":
@@ -88,7 +584,10 @@ if __name__ == "__main__":
     ]
     # ------------------------------------
 
-    price_data = get_bulk_eod_prices(EXCHANGE_CODE, TARGET_DATE, SYMBOLS_TO_GET)
+    cache = ResponseCache.from_config()
+    price_data = get_bulk_eod_prices(
+        EXCHANGE_CODE, TARGET_DATE, SYMBOLS_TO_GET, cache=cache
+    )
 
     if price_data:
         print("\n--- 数据获取成功 ---")
@@ -101,9 +600,22 @@ if __name__ == "__main__":
                 f"成交量: {stock_info.get('volume')}"
             )
 
+        # 追加到 OHLCV 存储，回测直接读取内存映射矩阵，不必重新解析 JSON
+        with OHLCVStore(f"data/ohlcv/{EXCHANGE_CODE}") as store:
+            try:
+                store.append_day(TARGET_DATE, price_data)
+                print(f"已写入 {store.root}，矩阵形状 {store.shape}")
+            except ValueError as e:
+                print(f"未写入 OHLCV 存储: {e}")
+
         # 打印第一个返回的完整 JSON 对象，以便您查看所有可用字段
         if len(price_data) > 0:
             print("\n--- 第一个对象的完整数据示例 ---")
             print(json.dumps(price_data[0], indent=2))
     else:
         print("\n--- 数据获取失败 ---")
+
+    # 回填一段时间的历史数据（并发请求，边取边写）
+    # asyncio.run(
+    #     backfill_to_csv(["US"], "2025-01-01", "2025-01-31", symbols=SYMBOLS_TO_GET)
+    # )
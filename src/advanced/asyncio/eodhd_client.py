@@ -0,0 +1,512 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "aiohttp",
+# ]
+# ///
+
+"""
+EODHD 共享 HTTP 客户端
+所有 EODHD 抓取函数共用一个带连接池的 aiohttp.ClientSession，
+复用 TCP+TLS 连接（keep-alive），缓存 DNS 解析结果，并限制单主机连接数
+"""
+
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Tuple
+
+import aiohttp
+
+from config import Settings, get_settings
+from metrics import METRICS, MetricsRegistry, Timer
+from rate_limiter import QuotaRateLimiter, api_call_cost
+from resilience import (
+    FATAL,
+    CircuitBreaker,
+    RetryPolicy,
+    call_with_resilience,
+    classify_error,
+    print_retry,
+)
+from response_cache import ResponseCache, endpoint_name, make_cache_key
+from single_flight import SingleFlight
+
+BASE_URL = "https://eodhd.com/api"
+
+
+class StreamChangedError(RuntimeError):
+    """流式读取中断后重新请求，响应内容已与之前不同，无法续传"""
+
+
+@dataclass
+class ConnectionStats:
+    """连接复用统计，用于确认 TCP/TLS 握手是否被复用掉"""
+
+    requests: int = 0
+    connections_created: int = 0
+    connections_reused: int = 0
+    dns_cache_hits: int = 0
+    dns_cache_misses: int = 0
+
+    @property
+    def reuse_ratio(self) -> float:
+        """复用连接的请求占比"""
+        total = self.connections_created + self.connections_reused
+        return self.connections_reused / total if total else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"请求数: {self.requests}, "
+            f"新建连接: {self.connections_created}, "
+            f"复用连接: {self.connections_reused} ({self.reuse_ratio:.1%}), "
+            f"DNS 缓存命中/未命中: {self.dns_cache_hits}/{self.dns_cache_misses}"
+        )
+
+
+class EODHDClient:
+    """
+    持有单个连接池会话的 EODHD 客户端
+
+    用法:
+        async with EODHDClient(api_token) as client:
+            data = await client.get_json("/fundamentals/AAPL.US")
+    """
+
+    def __init__(
+        self,
+        api_token: str,
+        base_url: str = BASE_URL,
+        limit: int = 100,
+        limit_per_host: int = 20,
+        keepalive_timeout: float = 30.0,
+        dns_cache_ttl: int = 300,
+        rate_limiter: Optional[QuotaRateLimiter] = None,
+        max_throttle_retries: int = 3,
+        cache: Optional[ResponseCache] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        hedge_delay: Optional[float] = None,
+        settings: Optional[Settings] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        """
+        Args:
+            api_token: EODHD API 密钥
+            base_url: API 根地址
+            limit: 连接池总连接数上限
+            limit_per_host: 单主机连接数上限
+            keepalive_timeout: 空闲连接保持时间（秒）
+            dns_cache_ttl: DNS 缓存有效期（秒）
+            rate_limiter: 配额限流器，None 表示不限流
+            max_throttle_retries: 收到 429 后最多重新排队的次数
+            cache: 持久化响应缓存，None 表示不缓存
+            retry_policy: 重试策略，None 表示不重试
+            circuit_breaker: 熔断器，None 表示不熔断
+            hedge_delay: 对冲请求的触发延迟（秒），None 表示不对冲
+            settings: 提供各接口连接/读超时的配置，None 时使用 get_settings()
+            metrics: 指标注册表，None 时使用全局的 METRICS
+        """
+        self.api_token = api_token
+        self.base_url = base_url.rstrip("/")
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.rate_limiter = rate_limiter
+        self.max_throttle_retries = max_throttle_retries
+        self.cache = cache
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
+        self.hedge_delay = hedge_delay
+        self.settings = settings or get_settings()
+        self.metrics = metrics or METRICS
+        self.stats = ConnectionStats()
+        self.flight: SingleFlight[bytes] = SingleFlight()
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @classmethod
+    def from_settings(
+        cls, settings: Optional[Settings] = None, **kwargs: Any
+    ) -> "EODHDClient":
+        """
+        按配置创建带限流、缓存、重试和熔断的客户端
+
+        Args:
+            settings: 配置，None 时使用 get_settings()
+            **kwargs: 覆盖 __init__ 的其他参数
+
+        Raises:
+            ValueError: 未设置 EODHD_API_TOKEN
+        """
+        settings = settings or get_settings()
+        api_token = kwargs.pop("api_token", None) or settings.require_api_token()
+        options: Dict[str, Any] = {
+            "base_url": settings.base_url,
+            "limit": settings.pool_limit,
+            "limit_per_host": settings.pool_limit_per_host,
+            "rate_limiter": QuotaRateLimiter.from_config(settings),
+            "cache": ResponseCache.from_config(settings),
+            "retry_policy": RetryPolicy(),
+            "circuit_breaker": CircuitBreaker(),
+            "settings": settings,
+        }
+        options.update(kwargs)
+        return cls(api_token, **options)
+
+    async def __aenter__(self) -> "EODHDClient":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        stats = self.stats
+
+        async def on_request_start(session, ctx, params):
+            stats.requests += 1
+
+        async def on_connection_create_end(session, ctx, params):
+            stats.connections_created += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            stats.connections_reused += 1
+
+        async def on_dns_cache_hit(session, ctx, params):
+            stats.dns_cache_hits += 1
+
+        async def on_dns_cache_miss(session, ctx, params):
+            stats.dns_cache_misses += 1
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace_config.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace_config
+
+    async def start(self) -> None:
+        """创建连接池会话（重复调用无副作用）"""
+        if self._session is not None and not self._session.closed:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_cache_ttl,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector, trace_configs=[self._trace_config()]
+        )
+
+    async def close(self) -> None:
+        """关闭会话并释放所有连接"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            raise RuntimeError("EODHDClient 尚未启动，请使用 async with 或先调用 start()")
+        return self._session
+
+    def timeout_for(self, endpoint: str) -> aiohttp.ClientTimeout:
+        """按接口返回超时设置；不设总超时，避免大响应下载到一半被整体超时打断"""
+        timeout = self.settings.timeout_for(endpoint)
+        return aiohttp.ClientTimeout(
+            total=None, sock_connect=timeout.connect, sock_read=timeout.read
+        )
+
+    def build_params(self, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """合并调用方参数与 api_token/fmt 公共参数"""
+        merged = dict(params or {})
+        merged["api_token"] = self.api_token
+        merged.setdefault("fmt", "json")
+        return merged
+
+    async def get_json(
+        self, endpoint: str, params: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        """
+        请求 EODHD 接口并解析 JSON
+
+        Args:
+            endpoint: 接口路径，例如 "/fundamentals/AAPL.US"
+            params: 额外查询参数（无需包含 api_token）
+
+        Returns:
+            解析后的 JSON 数据（每个调用方各自解析，互不共享可变对象）
+
+        Raises:
+            同 get_bytes
+        """
+        body = await self.get_bytes(endpoint, params)
+        name = endpoint_name(endpoint)
+        with Timer(self.metrics, "eodhd_parse_seconds", endpoint=name):
+            return json.loads(body)
+
+    async def get_bytes(
+        self, endpoint: str, params: Optional[Dict[str, Any]] = None
+    ) -> bytes:
+        """
+        请求 EODHD 接口并返回原始响应体
+        相同接口和参数的并发调用只发一个请求，共享同一个响应体；
+        命中未过期缓存时不发请求；缓存过期且带有 ETag/Last-Modified 时发条件请求
+
+        Args:
+            endpoint: 接口路径，例如 "/fundamentals/AAPL.US"
+            params: 额外查询参数（无需包含 api_token）
+
+        Returns:
+            响应体字节
+
+        Raises:
+            aiohttp.ClientResponseError: 状态码不是 2xx 且重试后仍失败时
+            DailyQuotaExceededError: 当日 API 额度已用完
+            CircuitOpenError: 熔断器打开时
+        """
+        return await self.flight.do(
+            make_cache_key(endpoint, params), lambda: self._fetch(endpoint, params)
+        )
+
+    async def _fetch(
+        self, endpoint: str, params: Optional[Dict[str, Any]]
+    ) -> bytes:
+        cached = await self.cache.lookup_async(endpoint, params) if self.cache else None
+        if cached is not None and cached.fresh:
+            self.metrics.inc(
+                "eodhd_cache_hits_total", endpoint=endpoint_name(endpoint)
+            )
+            return cached.body
+
+        headers = cached.conditional_headers() if cached is not None else {}
+        status, body, response_headers = await call_with_resilience(
+            lambda: self._request(endpoint, params, headers),
+            self.retry_policy,
+            self.circuit_breaker,
+            self.hedge_delay,
+            on_retry=self._on_retry,
+        )
+        if status == 304 and cached is not None:
+            await self.cache.refresh_async(cached, endpoint)
+            return cached.body
+        if self.cache is not None:
+            await self.cache.store_async(endpoint, params, body, response_headers)
+        return body
+
+    def _on_retry(self, attempt: int, exc: BaseException) -> None:
+        self.metrics.inc("eodhd_retries_total", kind=classify_error(exc))
+        print_retry(attempt, exc)
+
+    async def _request(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]],
+        headers: Mapping[str, str],
+    ) -> Tuple[int, bytes, Mapping[str, str]]:
+        """发送请求，返回状态码、原始响应体和响应头"""
+        async with self._send(endpoint, params, headers) as response:
+            body = await response.read()
+            self.metrics.inc(
+                "eodhd_bytes_in_total", len(body), endpoint=endpoint_name(endpoint)
+            )
+            return response.status, body, response.headers
+
+    async def iter_chunks(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        chunk_size: int = 64 * 1024,
+    ) -> AsyncIterator[bytes]:
+        """
+        按块流式读取响应体，适合边下载边解析的大响应
+        命中未过期缓存时直接分块产出缓存内容；缓存过期且带有 ETag/Last-Modified 时发条件请求；
+        启用缓存时读完后把完整响应体写入缓存
+
+        失败按 retry_policy 重试并计入熔断器；已经产出过数据时，重新请求并跳过已产出的字节，
+        调用方看到的仍是一个连续的响应体。两次响应的 ETag/Last-Modified/长度不同，
+        或响应没有任何一个可供比较时无法续传，直接抛出 StreamChangedError
+
+        Args:
+            endpoint: 接口路径
+            params: 额外查询参数（无需包含 api_token）
+            chunk_size: 每块最大字节数
+
+        Yields:
+            响应体字节块
+
+        Raises:
+            StreamChangedError: 续传时响应内容已经变化或无法确认未变化
+            其余同 get_bytes
+        """
+        name = endpoint_name(endpoint)
+        cached = await self.cache.lookup_async(endpoint, params) if self.cache else None
+        if cached is not None and cached.fresh:
+            self.metrics.inc("eodhd_cache_hits_total", endpoint=name)
+            for start in range(0, len(cached.body), chunk_size):
+                yield cached.body[start : start + chunk_size]
+            return
+
+        policy = self.retry_policy or RetryPolicy(max_attempts=1)
+        breaker = self.circuit_breaker
+        body: Optional[List[bytes]] = [] if self.cache is not None else None
+        delivered = 0
+        version: Optional[Tuple[Optional[str], ...]] = None
+        # 与 call_with_resilience 相同的重试流程；异步生成器无法包装成回调，只能在这里展开
+        for attempt in range(1, policy.max_attempts + 1):
+            if breaker is not None:
+                breaker.before_call()
+            # 已经产出过数据时不能再接受 304
+            headers = cached.conditional_headers() if cached and not delivered else {}
+            received = 0
+            try:
+                async with self._send(endpoint, params, headers) as response:
+                    if response.status == 304 and cached is not None:
+                        await self.cache.refresh_async(cached, endpoint)
+                        if breaker is not None:
+                            breaker.record_success()
+                        for start in range(0, len(cached.body), chunk_size):
+                            yield cached.body[start : start + chunk_size]
+                        return
+                    current = tuple(
+                        response.headers.get(h)
+                        for h in ("ETag", "Last-Modified", "Content-Length")
+                    )
+                    if version is None:
+                        version = current
+                    elif delivered and not any(version):
+                        # 没有 ETag/Last-Modified/长度时无法确认两次响应相同，不能拼接
+                        raise StreamChangedError(
+                            f"{name} 的响应没有版本信息，无法从第 {delivered} 字节续传"
+                        )
+                    elif delivered and current != version:
+                        raise StreamChangedError(
+                            f"{name} 的响应在重试之间发生变化，无法从第 {delivered} 字节续传"
+                        )
+                    async for chunk in response.content.iter_chunked(chunk_size):
+                        self.metrics.inc("eodhd_bytes_in_total", len(chunk), endpoint=name)
+                        received += len(chunk)
+                        if received <= delivered:
+                            # 续传时跳过已经产出的部分
+                            continue
+                        chunk = chunk[len(chunk) - (received - delivered) :]
+                        delivered = received
+                        if body is not None:
+                            body.append(chunk)
+                        yield chunk
+                    response_headers = response.headers
+            except Exception as exc:
+                kind = classify_error(exc)
+                if breaker is not None:
+                    breaker.record_failure(kind)
+                if kind == FATAL or attempt >= policy.max_attempts:
+                    raise
+                self._on_retry(attempt, exc)
+                await asyncio.sleep(policy.delay(attempt))
+                continue
+            except BaseException:
+                # 调用方提前停止读取或任务被取消，不是请求的结果
+                if breaker is not None:
+                    breaker.release()
+                raise
+            if breaker is not None:
+                breaker.record_success()
+            if body is not None:
+                await self.cache.store_async(
+                    endpoint, params, b"".join(body), response_headers
+                )
+            return
+
+    @asynccontextmanager
+    async def _send(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]],
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """发送请求（经过限流器），产出状态码已检查过的响应"""
+        url = f"{self.base_url}{endpoint}"
+        cost = api_call_cost(endpoint, params)
+        limiter = self.rate_limiter
+        metrics = self.metrics
+        name = endpoint_name(endpoint)
+        for attempt in range(self.max_throttle_retries + 1):
+            if limiter is not None:
+                # 429 后重新排队的是同一个请求，当日额度只在第一次计入
+                await limiter.acquire(cost, charge_daily=attempt == 0)
+            metrics.add("eodhd_in_flight", 1)
+            started = time.perf_counter()
+            status = None
+            try:
+                async with self.session.get(
+                    url,
+                    params=self.build_params(params),
+                    headers=headers,
+                    timeout=self.timeout_for(endpoint),
+                ) as response:
+                    status = response.status
+                    if status == 429:
+                        metrics.inc("eodhd_throttled_total", endpoint=name)
+                    if limiter is not None:
+                        limiter.on_response(status, response.headers)
+                        # 被限流时由限流器降速后重新排队，而不是直接丢弃
+                        if status == 429 and attempt < self.max_throttle_retries:
+                            continue
+                    response.raise_for_status()
+                    yield response
+                    return
+            finally:
+                # 耗时包含调用方读取响应体的时间
+                metrics.add("eodhd_in_flight", -1)
+                elapsed = time.perf_counter() - started
+                metrics.observe("eodhd_request_seconds", elapsed, endpoint=name)
+                metrics.inc(
+                    "eodhd_requests_total",
+                    endpoint=name,
+                    status=status if status is not None else "error",
+                )
+
+
+@asynccontextmanager
+async def ensure_client(
+    api_token: str, client: Optional[EODHDClient] = None
+) -> AsyncIterator[EODHDClient]:
+    """
+    复用调用方传入的客户端；未传入时临时创建一个并在退出时关闭
+
+    Args:
+        api_token: EODHD API 密钥
+        client: 已启动的共享客户端
+    """
+    if client is not None:
+        yield client
+        return
+    async with EODHDClient.from_settings(api_token=api_token) as owned:
+        yield owned
+
+
+async def main() -> None:
+    """演示：同一个会话连续请求，观察连接复用情况"""
+    from config import get_eodhd_api_token
+
+    async with EODHDClient(
+        get_eodhd_api_token(), rate_limiter=QuotaRateLimiter.from_config()
+    ) as client:
+        tasks = [
+            client.get_json(f"/fundamentals/{symbol}.US")
+            for symbol in ["AAPL", "MSFT", "GOOGL", "TSLA"]
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        print(f"成功 {sum(isinstance(r, dict) for r in results)} / {len(results)}")
+        print(client.stats.summary())
+        print(client.rate_limiter.summary())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -9,88 +9,97 @@
 import asyncio
 import aiohttp
 import pandas as pd
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
-from config import get_eodhd_api_token, get_max_concurrent_requests, print_config_info
+from config import get_eodhd_api_token, get_settings, print_config_info
+from eodhd_client import EODHDClient, ensure_client
+from eodhd_universe import fetch_exchange_symbols
 
 
-async def fetch_us_symbols(api_token: str) -> List[Dict[str, Any]]:
+async def fetch_us_symbols(
+    api_token: str, client: Optional[EODHDClient] = None
+) -> List[Dict[str, Any]]:
     """
-    异步获取所有美国股票代码
+    异步获取所有美国退市股票代码
 
     Args:
         api_token: EODHD API 密钥
+        client: 共享的 EODHD 客户端，None 时临时创建
 
     Returns:
         股票代码列表
     """
-    url = f"https://eodhd.com/api/exchange-symbol-list/US?delisted=1&api_token={api_token}&fmt=json"
-
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    print(f"成功获取到 {len(data)} 个股票代码")
-                    return data
-                else:
-                    print(f"请求失败，状态码: {response.status}")
-                    return []
-    except Exception as e:
-        print(f"获取股票代码时出错: {e}")
-        return []
+    return await fetch_exchange_symbols(api_token, "US", delisted=True, client=client)
 
 
-async def fetch_symbol_details(api_token: str, symbol: str) -> Dict[str, Any]:
+async def fetch_symbol_details(
+    api_token: str, symbol: str, client: Optional[EODHDClient] = None
+) -> Dict[str, Any]:
     """
     异步获取单个股票的详细信息
 
     Args:
         api_token: EODHD API 密钥
         symbol: 股票代码
+        client: 共享的 EODHD 客户端，None 时临时创建
 
     Returns:
         股票详细信息
     """
-    url = (
-        f"https://eodhd.com/api/fundamentals/{symbol}.US?api_token={api_token}&fmt=json"
-    )
-
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    print(f"获取 {symbol} 详情失败，状态码: {response.status}")
-                    return {}
+        async with ensure_client(api_token, client) as client:
+            return await client.get_json(f"/fundamentals/{symbol}.US")
+    except aiohttp.ClientResponseError as e:
+        print(f"获取 {symbol} 详情失败，状态码: {e.status}")
+        return {}
     except Exception as e:
         print(f"获取 {symbol} 详情时出错: {e}")
         return {}
 
 
 async def fetch_multiple_symbols_details(
-    api_token: str, symbols: List[str], max_concurrent: int = 5
+    api_token: str,
+    symbols: List[str],
+    max_concurrent: Optional[int] = None,
+    client: Optional[EODHDClient] = None,
 ) -> List[Dict[str, Any]]:
     """
-    异步批量获取多个股票的详细信息，使用信号量控制并发数
+    异步批量获取多个股票的详细信息
+    请求速率由客户端的配额限流器控制，在途请求数受连接池单主机上限约束；
+    所有请求共用同一个连接池会话，避免为每个股票重新握手
 
     Args:
         api_token: EODHD API 密钥
         symbols: 股票代码列表
-        max_concurrent: 最大并发数
+        max_concurrent: 最大在途请求数，None 时使用 MAX_CONCURRENT_REQUESTS；
+            只启动这么多个工作协程，股票再多也不会一次性创建全部请求
+        client: 共享的 EODHD 客户端，None 时临时创建
 
     Returns:
         股票详细信息列表
     """
-    semaphore = asyncio.Semaphore(max_concurrent)
-
-    async def fetch_with_semaphore(symbol: str) -> Dict[str, Any]:
-        async with semaphore:
-            return await fetch_symbol_details(api_token, symbol)
-
-    tasks = [fetch_with_semaphore(symbol) for symbol in symbols]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    max_concurrent = max_concurrent or get_settings().max_concurrent
+    results: List[Any] = [None] * len(symbols)
+    pending = iter(enumerate(symbols))
+
+    async with ensure_client(api_token, client) as client:
+
+        async def worker() -> None:
+            # 工作协程共享同一个迭代器，各自取下一个股票，结果按原顺序写回
+            for index, symbol in pending:
+                try:
+                    results[index] = await fetch_symbol_details(
+                        api_token, symbol, client
+                    )
+                except Exception as e:
+                    results[index] = e
+
+        workers = min(max_concurrent, len(symbols))
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        print(f"连接统计: {client.stats.summary()}")
+        print(f"请求合并: {client.flight.summary()}")
+        if client.rate_limiter is not None:
+            print(f"限流统计: {client.rate_limiter.summary()}")
 
     # 过滤掉异常结果
     valid_results = [r for r in results if isinstance(r, dict) and r]
@@ -106,6 +115,7 @@ async def save_symbols_to_csv(
 ) -> None:
     """
     将股票数据保存为CSV文件
+    过滤、选列和写盘都在线程池中执行，不阻塞事件循环里的其他请求
 
     Args:
         df: 股票数据DataFrame
@@ -113,8 +123,19 @@ async def save_symbols_to_csv(
         columns: 要保存的列名列表，None表示保存所有列
         filter_condition: 过滤条件，例如 "Type == 'Common Stock'"
     """
-    # 复制数据框避免修改原始数据
-    output_df = df.copy()
+    await asyncio.to_thread(
+        _write_symbols_csv, df, filename, columns, filter_condition
+    )
+
+
+def _write_symbols_csv(
+    df: pd.DataFrame,
+    filename: str,
+    columns: Optional[List[str]],
+    filter_condition: Optional[str],
+) -> None:
+    # query 和按列选择都会返回新对象，不会修改原始数据，无需先整体复制
+    output_df = df
 
     # 应用过滤条件
     if filter_condition:
@@ -248,10 +269,8 @@ async def main():
     # sample_symbols = df["Code"].head(10).tolist()
     # print(f"\n正在获取 {len(sample_symbols)} 个股票的详细信息...")
 
-    # max_concurrent = get_max_concurrent_requests()
-    # details = await fetch_multiple_symbols_details(
-    #     api_token, sample_symbols, max_concurrent=max_concurrent
-    # )
+    # 并发数默认取 MAX_CONCURRENT_REQUESTS
+    # details = await fetch_multiple_symbols_details(api_token, sample_symbols)
 
     # if details:
     #     print(f"\n成功获取 {len(details)} 个股票的详细信息")
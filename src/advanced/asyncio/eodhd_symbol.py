@@ -3,96 +3,125 @@
 # dependencies = [
 #     "aiohttp",
 #     "pandas",
+#     "pyarrow",
 # ]
 # ///
 
 import asyncio
 import aiohttp
 import pandas as pd
-from typing import List, Dict, Any
-
-from config import get_eodhd_api_token, get_max_concurrent_requests, print_config_info
-
-
-async def fetch_us_symbols(api_token: str) -> List[Dict[str, Any]]:
+from itertools import islice
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from config import get_eodhd_api_token, get_settings, print_config_info
+from eodhd_client import EODHDClient, ensure_client
+from eodhd_universe import fetch_exchange_symbols
+from json_decode_pool import JSONDecodePool
+from json_stream import fetch_symbols_frame
+from metrics import Timer
+from parquet_store import write_symbols
+from symbol_index import SymbolIndex
+from symbol_schema import SYMBOL_SCHEMA, apply_schema, memory_report
+
+
+async def fetch_us_symbols(
+    api_token: str, client: Optional[EODHDClient] = None
+) -> List[Dict[str, Any]]:
     """
     异步获取所有美国股票代码
 
     Args:
         api_token: EODHD API 密钥
+        client: 共享的 EODHD 客户端，None 时临时创建
 
     Returns:
         股票代码列表
     """
-    url = (
-        f"https://eodhd.com/api/exchange-symbol-list/US?api_token={api_token}&fmt=json"
-    )
-
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    print(f"成功获取到 {len(data)} 个股票代码")
-                    return data
-                else:
-                    print(f"请求失败，状态码: {response.status}")
-                    return []
-    except Exception as e:
-        print(f"获取股票代码时出错: {e}")
-        return []
+    return await fetch_exchange_symbols(api_token, "US", delisted=False, client=client)
 
 
-async def fetch_symbol_details(api_token: str, symbol: str) -> Dict[str, Any]:
+async def fetch_symbol_details(
+    api_token: str,
+    symbol: str,
+    client: Optional[EODHDClient] = None,
+    decoder: Optional[JSONDecodePool] = None,
+) -> Dict[str, Any]:
     """
     异步获取单个股票的详细信息
 
     Args:
         api_token: EODHD API 密钥
         symbol: 股票代码
+        client: 共享的 EODHD 客户端，None 时临时创建
+        decoder: 解码进程池，None 时在事件循环线程内解析完整文档
 
     Returns:
-        股票详细信息
+        股票详细信息；使用 decoder 时只包含其提取的字段
     """
-    url = (
-        f"https://eodhd.com/api/fundamentals/{symbol}.US?api_token={api_token}&fmt=json"
-    )
-
+    endpoint = f"/fundamentals/{symbol}.US"
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    print(f"获取 {symbol} 详情失败，状态码: {response.status}")
-                    return {}
+        async with ensure_client(api_token, client) as client:
+            if decoder is None:
+                return await client.get_json(endpoint)
+            body = await client.get_bytes(endpoint)
+            with Timer(client.metrics, "eodhd_parse_seconds", endpoint="fundamentals"):
+                return await decoder.decode(body)
+    except aiohttp.ClientResponseError as e:
+        print(f"获取 {symbol} 详情失败，状态码: {e.status}")
+        return {}
     except Exception as e:
         print(f"获取 {symbol} 详情时出错: {e}")
         return {}
 
 
 async def fetch_multiple_symbols_details(
-    api_token: str, symbols: List[str], max_concurrent: int = 5
+    api_token: str,
+    symbols: List[str],
+    max_concurrent: Optional[int] = None,
+    client: Optional[EODHDClient] = None,
+    decoder: Optional[JSONDecodePool] = None,
 ) -> List[Dict[str, Any]]:
     """
-    异步批量获取多个股票的详细信息，使用信号量控制并发数
+    异步批量获取多个股票的详细信息
+    请求速率由客户端的配额限流器控制，在途请求数受连接池单主机上限约束；
+    所有请求共用同一个连接池会话，避免为每个股票重新握手；
+    传入 decoder 时响应体交给进程池解码，事件循环只负责收发请求
 
     Args:
         api_token: EODHD API 密钥
         symbols: 股票代码列表
-        max_concurrent: 最大并发数
+        max_concurrent: 最大在途请求数，None 时使用 MAX_CONCURRENT_REQUESTS；
+            只启动这么多个工作协程，股票再多也不会一次性创建全部请求
+        client: 共享的 EODHD 客户端，None 时临时创建
+        decoder: 解码进程池，例如 JSONDecodePool(fields=FUNDAMENTAL_FIELDS)
 
     Returns:
         股票详细信息列表
     """
-    semaphore = asyncio.Semaphore(max_concurrent)
-
-    async def fetch_with_semaphore(symbol: str) -> Dict[str, Any]:
-        async with semaphore:
-            return await fetch_symbol_details(api_token, symbol)
-
-    tasks = [fetch_with_semaphore(symbol) for symbol in symbols]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    max_concurrent = max_concurrent or get_settings().max_concurrent
+    results: List[Any] = [None] * len(symbols)
+    pending = iter(enumerate(symbols))
+
+    async with ensure_client(api_token, client) as client:
+
+        async def worker() -> None:
+            # 工作协程共享同一个迭代器，各自取下一个股票，结果按原顺序写回
+            for index, symbol in pending:
+                try:
+                    results[index] = await fetch_symbol_details(
+                        api_token, symbol, client, decoder
+                    )
+                except Exception as e:
+                    results[index] = e
+
+        workers = min(max_concurrent, len(symbols))
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        print(f"连接统计: {client.stats.summary()}")
+        print(f"请求合并: {client.flight.summary()}")
+        if client.rate_limiter is not None:
+            print(f"限流统计: {client.rate_limiter.summary()}")
+        if decoder is not None:
+            print(f"解码统计: {decoder.summary()}")
 
     # 过滤掉异常结果
     valid_results = [r for r in results if isinstance(r, dict) and r]
@@ -100,6 +129,55 @@ async def fetch_multiple_symbols_details(
     return valid_results
 
 
+async def iter_symbols_details(
+    api_token: str,
+    symbols: Iterable[str],
+    window: Optional[int] = None,
+    client: Optional[EODHDClient] = None,
+    decoder: Optional[JSONDecodePool] = None,
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    流式获取多个股票的详细信息，哪个先完成就先产出哪个
+    同时在途的请求不超过 window 个，已产出的结果不再被持有，
+    抓取整个股票池时内存占用保持平稳
+
+    Args:
+        api_token: EODHD API 密钥
+        symbols: 股票代码序列，可以是惰性迭代器
+        window: 最大在途请求数，None 时使用 MAX_CONCURRENT_REQUESTS
+        client: 共享的 EODHD 客户端，None 时临时创建
+        decoder: 解码进程池，None 时在事件循环线程内解析
+
+    Yields:
+        (股票代码, 详细信息)，获取失败时详细信息为空字典
+    """
+    window = window or get_settings().max_concurrent
+    async with ensure_client(api_token, client) as client:
+        symbol_iter = iter(symbols)
+        pending: Dict[asyncio.Task, str] = {}
+
+        def schedule(count: int) -> None:
+            for symbol in islice(symbol_iter, count):
+                task = asyncio.create_task(
+                    fetch_symbol_details(api_token, symbol, client, decoder)
+                )
+                pending[task] = symbol
+
+        schedule(window)
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                # 先补满窗口再产出，调用方处理结果时请求仍在继续
+                schedule(len(done))
+                for task in done:
+                    yield pending.pop(task), task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+
 async def save_symbols_to_csv(
     df: pd.DataFrame,
     filename: str = "us_stock_symbols.csv",
@@ -108,6 +186,7 @@ async def save_symbols_to_csv(
 ) -> None:
     """
     将股票数据保存为CSV文件
+    过滤、选列和写盘都在线程池中执行，不阻塞事件循环里的其他请求
 
     Args:
         df: 股票数据DataFrame
@@ -115,8 +194,19 @@ async def save_symbols_to_csv(
         columns: 要保存的列名列表，None表示保存所有列
         filter_condition: 过滤条件，例如 "Type == 'Common Stock'"
     """
-    # 复制数据框避免修改原始数据
-    output_df = df.copy()
+    await asyncio.to_thread(
+        _write_symbols_csv, df, filename, columns, filter_condition
+    )
+
+
+def _write_symbols_csv(
+    df: pd.DataFrame,
+    filename: str,
+    columns: Optional[List[str]],
+    filter_condition: Optional[str],
+) -> None:
+    # query 和按列选择都会返回新对象，不会修改原始数据，无需先整体复制
+    output_df = df
 
     # 应用过滤条件
     if filter_condition:
@@ -154,14 +244,18 @@ async def main():
 
     # 1. 获取所有美国股票代码
     print("正在获取美国股票代码...")
-    symbols_data = await fetch_us_symbols(api_token)
+    # 边下载边解析，按块构建 DataFrame
+    df = await fetch_symbols_frame(api_token, "US")
 
-    if not symbols_data:
+    if df.empty:
         print("无法获取股票代码数据")
         return
 
-    # 转换为DataFrame
-    df = pd.DataFrame(symbols_data)
+    # 低基数列转 category、字符串列转 pyarrow 字符串
+    compact_df = apply_schema(df, SYMBOL_SCHEMA)
+    memory_report(df, compact_df, "美国股票列表")
+    df = compact_df
+
     print(f"总计获取到 {len(df)} 个股票代码")
     print("前5个股票代码:")
     print(df.head())
@@ -171,6 +265,12 @@ async def main():
 
     # 保存完整数据
     await save_symbols_to_csv(df, "us_stock_symbols_full.csv")
+    # 同时写入 Parquet 数据集，后续分析优先读取列式数据
+    write_symbols(df, "data/symbols")
+    # 保存查找索引，按代码/ISIN 解析股票时直接加载索引，不必持有或扫描 DataFrame
+    index = await asyncio.to_thread(SymbolIndex.from_frame, df, "US")
+    await asyncio.to_thread(index.save, "us_symbols.index.pkl")
+    print(f"已保存 {len(index)} 条股票索引到 us_symbols.index.pkl")
 
     # # 保存常用列（如果存在）
     # common_columns = ["Code", "Name", "Type", "Exchange"]
@@ -193,10 +293,8 @@ async def main():
     # sample_symbols = df["Code"].head(10).tolist()
     # print(f"\n正在获取 {len(sample_symbols)} 个股票的详细信息...")
 
-    # max_concurrent = get_max_concurrent_requests()
-    # details = await fetch_multiple_symbols_details(
-    #     api_token, sample_symbols, max_concurrent=max_concurrent
-    # )
+    # 并发数默认取 MAX_CONCURRENT_REQUESTS
+    # details = await fetch_multiple_symbols_details(api_token, sample_symbols)
 
     # if details:
     #     print(f"\n成功获取 {len(details)} 个股票的详细信息")
@@ -205,6 +303,12 @@ async def main():
     #         name = detail.get("General", {}).get("Name", "Unknown")
     #         print(f"股票: {symbol}, 名称: {name}")
 
+    # # 3. 流式获取：结果逐个产出，边抓取边落盘
+    # with open("us_stock_details.jsonl", "w", encoding="utf-8") as f:
+    #     async for symbol, detail in iter_symbols_details(api_token, df["Code"]):
+    #         if detail:
+    #             f.write(json.dumps({"symbol": symbol, "detail": detail}) + "\n")
+
 
 if __name__ == "__main__":
     asyncio.run(main())
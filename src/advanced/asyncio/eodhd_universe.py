@@ -0,0 +1,130 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "aiohttp",
+#     "pandas",
+#     "pyarrow",
+# ]
+# ///
+
+"""
+多交易所股票池抓取
+同时拉取任意多个交易所的在市与退市股票列表，合并成一张去重后的表，
+并用 Delisted 列标记退市股票；总耗时约等于最慢的单个请求
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+import pandas as pd
+
+from config import get_eodhd_api_token, print_config_info
+from eodhd_client import EODHDClient, ensure_client
+
+
+async def fetch_exchange_symbols(
+    api_token: str,
+    exchange: str = "US",
+    delisted: bool = False,
+    client: Optional[EODHDClient] = None,
+) -> List[Dict[str, Any]]:
+    """
+    异步获取单个交易所的股票列表
+
+    Args:
+        api_token: EODHD API 密钥
+        exchange: 交易所代码，例如 "US"、"LSE"
+        delisted: True 获取退市股票，False 获取在市股票
+        client: 共享的 EODHD 客户端，None 时临时创建
+
+    Returns:
+        股票代码列表
+    """
+    label = f"{exchange}{' 退市' if delisted else ''}"
+    params = {"delisted": 1} if delisted else None
+    try:
+        async with ensure_client(api_token, client) as client:
+            data = await client.get_json(f"/exchange-symbol-list/{exchange}", params)
+            print(f"成功获取到 {len(data)} 个 {label} 股票代码")
+            return data
+    except aiohttp.ClientResponseError as e:
+        print(f"获取 {label} 股票代码失败，状态码: {e.status}")
+        return []
+    except Exception as e:
+        print(f"获取 {label} 股票代码时出错: {e}")
+        return []
+
+
+async def fetch_symbol_universe(
+    api_token: str,
+    exchanges: List[str],
+    include_delisted: bool = True,
+    client: Optional[EODHDClient] = None,
+) -> pd.DataFrame:
+    """
+    并发获取多个交易所的在市/退市股票列表，合并去重
+
+    Args:
+        api_token: EODHD API 密钥
+        exchanges: 交易所代码列表
+        include_delisted: 是否同时获取退市股票
+        client: 共享的 EODHD 客户端，None 时临时创建
+
+    Returns:
+        合并后的 DataFrame，额外包含 ExchangeCode（请求的交易所代码）和 Delisted 列；
+        同一 Code+Exchange 同时出现在在市和退市列表时保留在市记录
+    """
+    jobs = [(exchange, False) for exchange in exchanges]
+    if include_delisted:
+        jobs += [(exchange, True) for exchange in exchanges]
+
+    async with ensure_client(api_token, client) as client:
+        results = await asyncio.gather(
+            *(
+                fetch_exchange_symbols(api_token, exchange, delisted, client)
+                for exchange, delisted in jobs
+            )
+        )
+
+    frames = [
+        pd.DataFrame(data).assign(ExchangeCode=exchange, Delisted=delisted)
+        for (exchange, delisted), data in zip(jobs, results)
+        if data
+    ]
+    if not frames:
+        return pd.DataFrame()
+
+    universe = pd.concat(frames, ignore_index=True)
+    before = len(universe)
+    # 在市记录排在前面，去重时优先保留
+    universe = universe.sort_values("Delisted", kind="stable").drop_duplicates(
+        ["Code", "Exchange", "ExchangeCode"], keep="first"
+    )
+    universe = universe.reset_index(drop=True)
+    print(
+        f"合并 {len(frames)} 个列表共 {before} 行，去重后 {len(universe)} 行，"
+        f"其中退市 {int(universe['Delisted'].sum())} 行"
+    )
+    return universe
+
+
+async def main():
+    """主函数"""
+    print_config_info()
+    api_token = get_eodhd_api_token()
+
+    exchanges = ["US", "LSE", "XETRA", "TO"]
+    print(f"正在并发获取 {exchanges} 的股票列表...")
+    universe = await fetch_symbol_universe(api_token, exchanges)
+    if universe.empty:
+        print("无法获取股票代码数据")
+        return
+
+    print(universe.groupby(["ExchangeCode", "Delisted"]).size())
+    universe.to_csv("global_stock_symbols.csv", index=False, encoding="utf-8")
+    print("股票数据已保存到: global_stock_symbols.csv")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
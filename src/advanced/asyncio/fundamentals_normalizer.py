@@ -0,0 +1,172 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "numpy",
+#     "pandas",
+# ]
+# ///
+
+"""
+基本面 JSON 的批量扁平化
+把 fetch_symbol_details 返回的嵌套文档批量转换为关系表：
+公司表（General）、指标表（Highlights）、估值表（Valuation）以及按报告期展开的财务报表；
+每张表一次性构建，数值转换按列向量化完成，而不是在 Python 里逐行处理
+"""
+
+import time
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+# General 中的嵌套字段，不进入公司表
+NESTED_GENERAL_FIELDS = {"AddressData", "Listings", "Officers"}
+
+FINANCIAL_STATEMENTS = ["Balance_Sheet", "Cash_Flow", "Income_Statement"]
+PERIODS = ["quarterly", "yearly"]
+
+# 财务报表中不做数值转换的列
+NON_NUMERIC_FIELDS = {"date", "filing_date", "currency_symbol"}
+
+
+@dataclass
+class NormalizedFundamentals:
+    """扁平化后的基本面表"""
+
+    companies: pd.DataFrame
+    highlights: pd.DataFrame
+    valuation: pd.DataFrame
+    financials: Dict[str, pd.DataFrame] = field(default_factory=dict)
+
+    def summary(self) -> str:
+        parts = [
+            f"companies: {len(self.companies)}",
+            f"highlights: {len(self.highlights)}",
+            f"valuation: {len(self.valuation)}",
+        ]
+        parts += [f"{name}: {len(df)}" for name, df in self.financials.items()]
+        return ", ".join(parts)
+
+
+def _coerce_numeric(df: pd.DataFrame, exclude: set = frozenset()) -> pd.DataFrame:
+    """把所有非空值都能解析为数字的文本列转换为数值列"""
+    conversions = {}
+    for col in df.columns:
+        if col in exclude:
+            continue
+        # pandas 3 中字符串列的 dtype 是 str 而不是 object，两种都要检查
+        if not (
+            pd.api.types.is_object_dtype(df[col]) or pd.api.types.is_string_dtype(df[col])
+        ):
+            continue
+        converted = pd.to_numeric(df[col], errors="coerce")
+        if converted.notna().sum() == df[col].notna().sum():
+            conversions[col] = converted
+    return df.assign(**conversions) if conversions else df
+
+
+def _section_frame(
+    documents: List[Dict[str, Any]], section: str, codes: np.ndarray
+) -> pd.DataFrame:
+    frame = pd.DataFrame.from_records([doc.get(section) or {} for doc in documents])
+    frame = _coerce_numeric(frame)
+    frame.insert(0, "Code", codes)
+    return frame
+
+
+def _statement_frame(
+    documents: List[Dict[str, Any]], statement: str, codes: np.ndarray
+) -> pd.DataFrame:
+    frames = []
+    for period in PERIODS:
+        blocks = [
+            ((doc.get("Financials") or {}).get(statement) or {}).get(period) or {}
+            for doc in documents
+        ]
+        lengths = np.fromiter(map(len, blocks), dtype=np.int64, count=len(blocks))
+        if not lengths.sum():
+            continue
+        records = list(chain.from_iterable(block.values() for block in blocks))
+        frame = pd.DataFrame.from_records(records)
+        frame.insert(0, "Code", np.repeat(codes, lengths))
+        frame.insert(1, "period", period)
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=["Code", "period", "date"])
+    df = pd.concat(frames, ignore_index=True)
+    df = _coerce_numeric(df, NON_NUMERIC_FIELDS | {"Code", "period"})
+    for col in ("date", "filing_date"):
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    return df
+
+
+def normalize_fundamentals(documents: List[Dict[str, Any]]) -> NormalizedFundamentals:
+    """
+    批量扁平化基本面文档
+
+    Args:
+        documents: fetch_symbol_details 返回的文档列表（空文档会被跳过）
+
+    Returns:
+        NormalizedFundamentals，各表以 Code 关联
+    """
+    documents = [doc for doc in documents if doc]
+    general = pd.DataFrame.from_records(
+        [doc.get("General") or {} for doc in documents]
+    )
+    general = general.drop(
+        columns=[c for c in NESTED_GENERAL_FIELDS if c in general.columns]
+    )
+    if "Code" not in general.columns:
+        general["Code"] = None
+    codes = general["Code"].to_numpy()
+
+    return NormalizedFundamentals(
+        companies=_coerce_numeric(general, {"Code", "CIK", "CUSIP", "ISIN"}),
+        highlights=_section_frame(documents, "Highlights", codes),
+        valuation=_section_frame(documents, "Valuation", codes),
+        financials={
+            statement: _statement_frame(documents, statement, codes)
+            for statement in FINANCIAL_STATEMENTS
+        },
+    )
+
+
+def _synthetic_document(i: int, quarters: int = 40) -> Dict[str, Any]:
+    dates = pd.date_range("2015-03-31", periods=quarters, freq="QE").strftime("%Y-%m-%d")
+    quarterly = {
+        d: {
+            "date": d,
+            "filing_date": d,
+            "currency_symbol": "USD",
+            "totalRevenue": str(1000.0 + i + q),
+            "netIncome": str(100.0 + q),
+            "totalAssets": None,
+        }
+        for q, d in enumerate(dates)
+    }
+    return {
+        "General": {
+            "Code": f"S{i:05d}",
+            "Name": f"Company {i}",
+            "Exchange": "NASDAQ",
+            "Sector": "Technology",
+            "Officers": {"0": {"Name": "CEO"}},
+        },
+        "Highlights": {"MarketCapitalization": 1e9 + i, "PERatio": "15.3"},
+        "Valuation": {"TrailingPE": 15.3, "ForwardPE": "14.1"},
+        "Financials": {"Income_Statement": {"quarterly": quarterly, "yearly": {}}},
+    }
+
+
+if __name__ == "__main__":
+    docs = [_synthetic_document(i) for i in range(5000)]
+    started = time.perf_counter()
+    result = normalize_fundamentals(docs)
+    elapsed = time.perf_counter() - started
+    print(result.summary())
+    print(f"扁平化 {len(docs)} 个文档耗时 {elapsed:.2f}s")
+    print(result.financials["Income_Statement"].head())
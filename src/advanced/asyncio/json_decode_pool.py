@@ -0,0 +1,179 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "orjson",
+# ]
+# ///
+
+"""
+多进程 JSON 解码
+基本面文档每个有几百 KB，在事件循环线程里 json.loads 会成为批量抓取的吞吐上限；
+这里把原始响应体交给进程池解码（安装了 orjson 时优先使用），
+子进程只把需要的字段发回来，解码随 CPU 核数扩展，事件循环继续发请求
+
+用法:
+    with JSONDecodePool(fields=FUNDAMENTAL_FIELDS) as pool:
+        details = await fetch_multiple_symbols_details(token, symbols, decoder=pool)
+"""
+
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # 没有 orjson 时退回标准库
+    orjson = None
+
+# 下游（parquet_store、fundamentals_normalizer）用到的基本面字段，以点号表示嵌套路径
+FUNDAMENTAL_FIELDS: Tuple[str, ...] = (
+    "General",
+    "Highlights",
+    "Valuation",
+    "SharesStats",
+    "Financials.Balance_Sheet",
+    "Financials.Cash_Flow",
+    "Financials.Income_Statement",
+)
+
+# 小于该大小的响应体直接在当前进程解码，进程间传输的开销比解码本身还大
+DEFAULT_INLINE_BYTES = 32 * 1024
+
+
+def loads(body: bytes) -> Any:
+    """用可用的最快解码器解析 JSON"""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def extract_fields(document: Any, fields: Optional[Iterable[str]]) -> Any:
+    """
+    从文档中取出指定字段，保持原有的嵌套结构
+
+    Args:
+        document: 解析后的 JSON
+        fields: 点号分隔的字段路径，None 时返回整个文档
+
+    Returns:
+        只包含指定字段的文档；不存在的字段被跳过
+    """
+    if fields is None or not isinstance(document, dict):
+        return document
+    result: Dict[str, Any] = {}
+    for path in fields:
+        keys = path.split(".")
+        value = document
+        for key in keys:
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            target = result
+            for key in keys[:-1]:
+                target = target.setdefault(key, {})
+            target[keys[-1]] = value
+    return result
+
+
+def decode_fields(body: bytes, fields: Optional[Tuple[str, ...]] = None) -> Any:
+    """解析响应体并只保留指定字段（在子进程中执行，必须是模块级函数）"""
+    return extract_fields(loads(body), fields)
+
+
+class JSONDecodePool:
+    """
+    解码用的进程池
+
+    同一个池可以在多次批量抓取之间复用；进程在第一次解码大响应体时才启动
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        fields: Optional[Iterable[str]] = None,
+        inline_bytes: int = DEFAULT_INLINE_BYTES,
+    ):
+        """
+        Args:
+            max_workers: 进程数，默认 CPU 核数
+            fields: 默认提取的字段路径，None 表示返回完整文档
+            inline_bytes: 小于该大小的响应体在当前进程解码
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.fields = tuple(fields) if fields is not None else None
+        self.inline_bytes = inline_bytes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.decoded = 0
+        self.offloaded = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def decode(self, body: bytes, fields: Optional[Iterable[str]] = None) -> Any:
+        """
+        解码一个响应体
+
+        Args:
+            body: 原始响应体
+            fields: 本次提取的字段路径，None 时使用池的默认字段
+
+        Returns:
+            只包含指定字段的文档
+        """
+        fields = tuple(fields) if fields is not None else self.fields
+        self.decoded += 1
+        if len(body) < self.inline_bytes:
+            return decode_fields(body, fields)
+        self.offloaded += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), decode_fields, body, fields
+        )
+
+    def summary(self) -> str:
+        decoder = "orjson" if orjson is not None else "json"
+        return (
+            f"解码 {self.decoded} 个响应（{decoder}），"
+            f"其中 {self.offloaded} 个在 {self.max_workers} 个进程中完成"
+        )
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self) -> "JSONDecodePool":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+if __name__ == "__main__":
+    from mock_eodhd_server import fundamentals_document
+
+    bodies = [
+        json.dumps(fundamentals_document(f"S{i:05d}.US", quarters=400)).encode()
+        for i in range(200)
+    ]
+    print(f"{len(bodies)} 个文档，平均 {sum(map(len, bodies)) / len(bodies) / 1024:.0f} KB")
+
+    started = time.perf_counter()
+    for body in bodies:
+        json.loads(body)
+    print(f"事件循环线程内 json.loads: {time.perf_counter() - started:.2f}s")
+
+    async def decode_all(pool: JSONDecodePool) -> None:
+        await asyncio.gather(*(pool.decode(body) for body in bodies))
+
+    with JSONDecodePool(fields=("General", "Highlights")) as pool:
+        started = time.perf_counter()
+        asyncio.run(decode_all(pool))
+        print(f"进程池只取 General/Highlights: {time.perf_counter() - started:.2f}s")
+        print(pool.summary())
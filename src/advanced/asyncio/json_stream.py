@@ -0,0 +1,207 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "aiohttp",
+#     "pandas",
+# ]
+# ///
+
+"""
+JSON 数组的增量解析
+exchange-symbol-list 的响应是一个几 MB 的 JSON 数组，这里边下载边解码，
+按固定行数分块构建 DataFrame，不必先把完整响应体和全部 dict 同时留在内存里
+"""
+
+import codecs
+import json
+from typing import Any, AsyncIterator, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+from eodhd_client import EODHDClient, ensure_client
+from metrics import Timer
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",]"
+
+
+class JsonArrayDecoder:
+    """
+    顶层 JSON 数组的增量解码器
+
+    用法:
+        decoder = JsonArrayDecoder()
+        for chunk in chunks:
+            for item in decoder.feed(chunk):
+                ...
+        decoder.close()
+    """
+
+    def __init__(self):
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._started = False
+        self._finished = False
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """
+        输入一块字节，返回这块数据中已完整解析出的数组元素
+
+        Args:
+            chunk: 响应体字节块（可以在任意位置切分，包括多字节字符中间）
+
+        Returns:
+            新解析出的元素列表
+        """
+        self._buffer = self._buffer[self._pos :] + self._text.decode(chunk)
+        self._pos = 0
+        return self._drain(final=False)
+
+    def close(self) -> List[Any]:
+        """
+        输入结束，解析剩余数据
+
+        Raises:
+            ValueError: 数据不是完整的 JSON 数组
+        """
+        self._buffer = self._buffer[self._pos :] + self._text.decode(b"", final=True)
+        self._pos = 0
+        items = self._drain(final=True)
+        if not self._finished:
+            raise ValueError("JSON 数组不完整")
+        return items
+
+    def _skip(self, chars: str) -> None:
+        while self._pos < len(self._buffer) and self._buffer[self._pos] in chars:
+            self._pos += 1
+
+    def _drain(self, final: bool) -> List[Any]:
+        items = []
+        buffer = self._buffer
+        while not self._finished:
+            self._skip(_WHITESPACE)
+            if self._pos >= len(buffer):
+                break
+            if not self._started:
+                if buffer[self._pos] != "[":
+                    raise ValueError(f"期望 JSON 数组，实际以 {buffer[self._pos]!r} 开头")
+                self._started = True
+                self._pos += 1
+                continue
+            if buffer[self._pos] == ",":
+                self._pos += 1
+                continue
+            if buffer[self._pos] == "]":
+                self._finished = True
+                self._pos += 1
+                break
+            try:
+                item, end = self._decoder.raw_decode(buffer, self._pos)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                # 元素被块边界截断，等下一块数据
+                break
+            if not final and (end >= len(buffer) or buffer[end] not in _DELIMITERS):
+                # 数字可能只读到一半（例如 "-1500." 后面还有 "0"），等后续数据确认边界
+                break
+            items.append(item)
+            self._pos = end
+        return items
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """同步版本：从字节块序列中逐个产出 JSON 数组元素"""
+    decoder = JsonArrayDecoder()
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+    yield from decoder.close()
+
+
+async def stream_symbol_frames(
+    api_token: str,
+    exchange: str = "US",
+    delisted: bool = False,
+    chunk_rows: int = 5000,
+    client: Optional[EODHDClient] = None,
+) -> AsyncIterator[pd.DataFrame]:
+    """
+    流式获取交易所股票列表，每凑满 chunk_rows 行产出一个 DataFrame
+
+    Args:
+        api_token: EODHD API 密钥
+        exchange: 交易所代码
+        delisted: True 获取退市股票
+        chunk_rows: 每个 DataFrame 的行数
+        client: 共享的 EODHD 客户端，None 时临时创建
+
+    Yields:
+        股票列表分块
+    """
+    params = {"delisted": 1} if delisted else None
+    decoder = JsonArrayDecoder()
+    rows: List[Any] = []
+    async with ensure_client(api_token, client) as client:
+        async for chunk in client.iter_chunks(
+            f"/exchange-symbol-list/{exchange}", params
+        ):
+            with Timer(
+                client.metrics, "eodhd_parse_seconds", endpoint="exchange-symbol-list"
+            ):
+                rows.extend(decoder.feed(chunk))
+            while len(rows) >= chunk_rows:
+                yield pd.DataFrame.from_records(rows[:chunk_rows])
+                del rows[:chunk_rows]
+    rows.extend(decoder.close())
+    if rows:
+        yield pd.DataFrame.from_records(rows)
+
+
+async def fetch_symbols_frame(
+    api_token: str,
+    exchange: str = "US",
+    delisted: bool = False,
+    chunk_rows: int = 5000,
+    client: Optional[EODHDClient] = None,
+) -> pd.DataFrame:
+    """
+    流式获取交易所股票列表并拼接为一个 DataFrame
+
+    Args:
+        api_token: EODHD API 密钥
+        exchange: 交易所代码
+        delisted: True 获取退市股票
+        chunk_rows: 分块行数
+        client: 共享的 EODHD 客户端，None 时临时创建
+
+    Returns:
+        股票列表 DataFrame，获取失败时为空
+    """
+    frames = []
+    try:
+        async for frame in stream_symbol_frames(
+            api_token, exchange, delisted, chunk_rows, client
+        ):
+            if not frames:
+                print(f"收到首批 {len(frame)} 行")
+            frames.append(frame)
+    except Exception as e:
+        print(f"流式获取 {exchange} 股票代码时出错: {e}")
+        return pd.DataFrame()
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+    print(f"成功获取到 {len(df)} 个股票代码")
+    return df
+
+
+if __name__ == "__main__":
+    body = json.dumps(
+        [{"Code": f"S{i}", "Name": f"名称{i}", "Price": i * 1.5} for i in range(10)],
+        ensure_ascii=False,
+    ).encode("utf-8")
+    # 按 7 字节切块，覆盖元素和多字节字符被截断的情况
+    chunks = [body[i : i + 7] for i in range(0, len(body), 7)]
+    print(list(iter_json_array(chunks)))
@@ -0,0 +1,335 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "aiohttp",
+# ]
+# ///
+
+"""
+抓取流水线的运行指标
+计数器、仪表和直方图都放在进程内的 MetricsRegistry 中，热路径上只有加法和一次二分查找；
+可以定期输出 JSON 摘要，也可以通过 HTTP 以 Prometheus 文本格式暴露
+
+指标命名:
+    eodhd_request_seconds{endpoint}        单次 HTTP 请求耗时（直方图）
+    eodhd_requests_total{endpoint,status}  请求数
+    eodhd_bytes_in_total{endpoint}         下载字节数
+    eodhd_in_flight                        在途请求数
+    eodhd_retries_total{kind}              重试次数
+    eodhd_throttled_total                  收到 429 的次数
+    eodhd_parse_seconds{endpoint}          JSON 解析耗时（直方图）
+    writer_queue_depth{path}               写入队列深度
+    writer_rows_total{path}                写入行数
+    writer_bytes_out_total{path}           写入字节数
+"""
+
+import asyncio
+import json
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 延迟直方图的默认桶上界（秒）
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{v}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+class Histogram:
+    """固定桶直方图，同时记录总和与次数"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """按桶上界估算分位数（落在最后一个桶时返回最大上界）"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.buckets[-1]
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class MetricsRegistry:
+    """
+    进程内指标注册表（线程安全，写入线程池中的写盘代码也可以直接上报）
+
+    用法:
+        metrics.inc("eodhd_requests_total", endpoint="fundamentals", status=200)
+        metrics.observe("eodhd_request_seconds", 0.12, endpoint="fundamentals")
+        print(metrics.render_prometheus())
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self.started_at = time.time()
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        """计数器加 value"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def add(self, name: str, value: float, **labels: Any) -> None:
+        """仪表加 value（可以为负），用于在途数、队列深度"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._gauges.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels: Any) -> None:
+        """仪表设为 value"""
+        key = _label_key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """向直方图记录一个观测值"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+            self.started_at = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns:
+            可直接 json.dumps 的指标快照；标签以 "k=v,k=v" 字符串表示
+        """
+
+        def label_str(key: LabelKey) -> str:
+            return ",".join(f"{k}={v}" for k, v in key)
+
+        with self._lock:
+            return {
+                "timestamp": time.time(),
+                "uptime_s": time.time() - self.started_at,
+                "counters": {
+                    name: {label_str(k): v for k, v in series.items()}
+                    for name, series in self._counters.items()
+                },
+                "gauges": {
+                    name: {label_str(k): v for k, v in series.items()}
+                    for name, series in self._gauges.items()
+                },
+                "histograms": {
+                    name: {label_str(k): h.summary() for k, h in series.items()}
+                    for name, series in self._histograms.items()
+                },
+            }
+
+    def render_prometheus(self) -> str:
+        """按 Prometheus 文本格式输出全部指标"""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+            for name, series in sorted(self._gauges.items()):
+                lines.append(f"# TYPE {name} gauge")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in series.items():
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        labels = _format_labels(key, ("le", str(bound)))
+                        lines.append(f"{name}_bucket{labels} {cumulative}")
+                    labels = _format_labels(key, ("le", "+Inf"))
+                    lines.append(f"{name}_bucket{labels} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+# 默认的全局注册表，客户端和写入器未指定时都上报到这里
+METRICS = MetricsRegistry()
+
+
+class Timer:
+    """
+    计时上下文，退出时把耗时记录到直方图
+
+    用法:
+        with Timer(metrics, "eodhd_parse_seconds", endpoint="fundamentals"):
+            data = json.loads(body)
+    """
+
+    def __init__(self, registry: MetricsRegistry, name: str, **labels: Any):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.started = 0.0
+
+    def __enter__(self) -> "Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.registry.observe(
+            self.name, time.perf_counter() - self.started, **self.labels
+        )
+
+
+def _counter_totals(snapshot: Dict[str, Any]) -> Dict[str, float]:
+    return {
+        f"{name}{{{labels}}}": value
+        for name, series in snapshot["counters"].items()
+        for labels, value in series.items()
+    }
+
+
+async def report_periodically(
+    interval: float = 30.0,
+    registry: Optional[MetricsRegistry] = None,
+    path: Optional[str] = None,
+    sink: Callable[[str], None] = print,
+) -> None:
+    """
+    每隔 interval 秒输出一次 JSON 摘要，附带各计数器在这段时间内的速率（/秒）
+    通常用 asyncio.create_task 启动，抓取结束后取消
+
+    Args:
+        interval: 输出间隔（秒）
+        registry: 指标注册表，默认 METRICS
+        path: 以 JSONL 追加写入的文件路径，None 时交给 sink
+        sink: 没有 path 时接收 JSON 文本的函数
+    """
+    registry = registry or METRICS
+    previous = _counter_totals(registry.snapshot())
+    while True:
+        await asyncio.sleep(interval)
+        snapshot = registry.snapshot()
+        totals = _counter_totals(snapshot)
+        snapshot["rates"] = {
+            key: (value - previous.get(key, 0)) / interval
+            for key, value in totals.items()
+        }
+        previous = totals
+        text = json.dumps(snapshot, ensure_ascii=False)
+        if path:
+            await asyncio.to_thread(_append_line, path, text)
+        else:
+            sink(text)
+
+
+def _append_line(path: str, text: str) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text + "\n")
+
+
+async def start_metrics_server(
+    registry: Optional[MetricsRegistry] = None,
+    host: str = "127.0.0.1",
+    port: int = 9464,
+):
+    """
+    启动指标 HTTP 服务：/metrics 为 Prometheus 文本，/metrics.json 为 JSON 快照
+
+    Args:
+        registry: 指标注册表，默认 METRICS
+        host: 监听地址
+        port: 监听端口
+
+    Returns:
+        aiohttp 的 AppRunner，结束时调用 await runner.cleanup()
+    """
+    from aiohttp import web
+
+    registry = registry or METRICS
+
+    async def prometheus(request: web.Request) -> web.Response:
+        return web.Response(
+            text=registry.render_prometheus(),
+            content_type="text/plain",
+            charset="utf-8",
+        )
+
+    async def snapshot(request: web.Request) -> web.Response:
+        return web.json_response(registry.snapshot())
+
+    app = web.Application()
+    app.router.add_get("/metrics", prometheus)
+    app.router.add_get("/metrics.json", snapshot)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    print(f"指标服务已启动: http://{host}:{port}/metrics")
+    return runner
+
+
+if __name__ == "__main__":
+    import random
+
+    demo = MetricsRegistry()
+    for _ in range(1000):
+        endpoint = random.choice(["fundamentals", "eod-bulk-last-day"])
+        demo.inc("eodhd_requests_total", endpoint=endpoint, status=200)
+        demo.observe("eodhd_request_seconds", random.expovariate(10), endpoint=endpoint)
+    demo.set("eodhd_in_flight", 3)
+    print(demo.render_prometheus())
+    print(json.dumps(demo.snapshot()["histograms"], indent=2))
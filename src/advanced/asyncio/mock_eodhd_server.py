@@ -0,0 +1,290 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "aiohttp",
+# ]
+# ///
+
+"""
+本地 EODHD 模拟服务器
+提供 exchange-symbol-list、fundamentals、eod-bulk-last-day 三个接口，
+返回确定性的合成数据，可配置延迟、5xx 错误率和 429 注入比例，
+用于在没有真实 Token、不消耗额度的情况下压测抓取代码
+
+用法:
+    uv run src/advanced/asyncio/mock_eodhd_server.py --latency-ms 50 --error-rate 0.01
+    EODHD_BASE_URL=http://127.0.0.1:8765/api EODHD_API_TOKEN=mock uv run ...
+"""
+
+import argparse
+import asyncio
+import json
+import random
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+EXCHANGES = ["NASDAQ", "NYSE", "NYSE ARCA", "OTC", "BATS"]
+TYPES = ["Common Stock", "ETF", "FUND", "Preferred Share"]
+
+
+@dataclass
+class MockConfig:
+    """模拟服务器的行为参数"""
+
+    latency_ms: float = 20.0  # 平均响应延迟
+    jitter_ms: float = 10.0  # 延迟的随机波动（均匀分布 ±jitter）
+    error_rate: float = 0.0  # 返回 500 的比例
+    throttle_rate: float = 0.0  # 返回 429 的比例
+    retry_after: int = 1  # 429 响应中的 Retry-After（秒）
+    symbols: int = 5000  # 每个交易所的股票数
+    quarters: int = 40  # 基本面文档中每张报表的季度数，决定文档大小
+    seed: int = 7
+    rate_limit: int = 1000  # X-RateLimit-Limit 响应头
+
+
+@dataclass
+class MockStats:
+    """服务端计数，压测结束后用于核对客户端统计"""
+
+    requests: int = 0
+    errors: int = 0
+    throttled: int = 0
+    bytes_out: int = 0
+    by_endpoint: Dict[str, int] = field(default_factory=dict)
+
+
+def _symbol_code(i: int) -> str:
+    return f"S{i:05d}"
+
+
+def symbol_list(
+    exchange: str, count: int, delisted: bool = False
+) -> List[Dict[str, Any]]:
+    """生成交易所股票列表"""
+    prefix = "D" if delisted else ""
+    return [
+        {
+            "Code": prefix + _symbol_code(i),
+            "Name": f"Company {i} Inc",
+            "Country": "USA",
+            "Exchange": EXCHANGES[i % len(EXCHANGES)],
+            "Currency": "USD",
+            "Type": TYPES[i % len(TYPES)],
+            "Isin": f"US{i:010d}",
+        }
+        for i in range(count)
+    ]
+
+
+def fundamentals_document(symbol: str, quarters: int) -> Dict[str, Any]:
+    """生成单个股票的基本面文档，结构与真实接口一致（只包含常用字段）"""
+    seed = sum(map(ord, symbol))
+    end = date(2025, 12, 31)
+    quarterly = {}
+    for q in range(quarters):
+        day = (end - timedelta(days=91 * q)).isoformat()
+        quarterly[day] = {
+            "date": day,
+            "filing_date": day,
+            "currency_symbol": "USD",
+            "totalRevenue": str(1000.0 + seed + q),
+            "netIncome": str(100.0 + q),
+            "totalAssets": str(5000.0 + seed),
+        }
+    code = symbol.split(".", 1)[0]
+    return {
+        "General": {
+            "Code": code,
+            "Name": f"Company {code}",
+            "Exchange": EXCHANGES[seed % len(EXCHANGES)],
+            "Sector": "Technology",
+            "ISIN": f"US{seed:010d}",
+            "Officers": {"0": {"Name": "CEO"}},
+        },
+        "Highlights": {"MarketCapitalization": 1e9 + seed, "PERatio": "15.3"},
+        "Valuation": {"TrailingPE": 15.3, "ForwardPE": "14.1"},
+        "Financials": {
+            "Income_Statement": {"quarterly": quarterly, "yearly": {}},
+        },
+    }
+
+
+def bulk_prices(exchange: str, day: str, codes: List[str]) -> List[Dict[str, Any]]:
+    """生成某日的批量日终价格"""
+    rows = []
+    for code in codes:
+        base = 10.0 + sum(map(ord, code)) % 500
+        rows.append(
+            {
+                "code": code.split(".", 1)[0],
+                "exchange_short_name": exchange,
+                "date": day,
+                "open": base,
+                "high": base * 1.02,
+                "low": base * 0.98,
+                "close": base * 1.01,
+                "adjusted_close": base * 1.01,
+                "volume": int(base * 1000),
+            }
+        )
+    return rows
+
+
+class MockEODHDServer:
+    """
+    模拟服务器
+
+    用法:
+        async with MockEODHDServer(MockConfig(latency_ms=50)) as server:
+            client = EODHDClient("mock", base_url=server.base_url)
+    """
+
+    def __init__(
+        self,
+        config: Optional[MockConfig] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        Args:
+            config: 行为参数，None 时使用默认值
+            host: 监听地址
+            port: 监听端口，0 表示随机分配
+        """
+        self.config = config = config or MockConfig()
+        self.host = host
+        self.port = port
+        self.stats = MockStats()
+        self._random = random.Random(config.seed)
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/api"
+
+    async def __aenter__(self) -> "MockEODHDServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.stop()
+
+    def create_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/api/exchange-symbol-list/{exchange}", self._symbol_list)
+        app.router.add_get("/api/fundamentals/{symbol}", self._fundamentals)
+        app.router.add_get("/api/eod-bulk-last-day/{exchange}", self._bulk)
+        return app
+
+    async def start(self) -> None:
+        self._runner = web.AppRunner(self.create_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # 端口为 0 时取实际分配的端口
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def _delay(self) -> float:
+        config = self.config
+        jitter = self._random.uniform(-config.jitter_ms, config.jitter_ms)
+        return max(config.latency_ms + jitter, 0.0) / 1000
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        stats = self.stats
+        stats.requests += 1
+        endpoint = request.path.split("/")[2] if request.path.count("/") >= 2 else ""
+        stats.by_endpoint[endpoint] = stats.by_endpoint.get(endpoint, 0) + 1
+        if not request.query.get("api_token"):
+            return web.json_response({"error": "missing api_token"}, status=401)
+
+        await asyncio.sleep(self._delay())
+        roll = self._random.random()
+        headers = {"X-RateLimit-Limit": str(self.config.rate_limit)}
+        if roll < self.config.throttle_rate:
+            stats.throttled += 1
+            headers["X-RateLimit-Remaining"] = "0"
+            headers["Retry-After"] = str(self.config.retry_after)
+            return web.json_response({"error": "throttled"}, status=429, headers=headers)
+        if roll < self.config.throttle_rate + self.config.error_rate:
+            stats.errors += 1
+            return web.json_response({"error": "internal"}, status=500)
+
+        response = await handler(request)
+        response.headers.update(headers)
+        stats.bytes_out += response.content_length or 0
+        return response
+
+    @staticmethod
+    def _json(data: Any) -> web.Response:
+        return web.Response(
+            body=json.dumps(data).encode("utf-8"), content_type="application/json"
+        )
+
+    async def _symbol_list(self, request: web.Request) -> web.Response:
+        delisted = request.query.get("delisted") == "1"
+        return self._json(
+            symbol_list(request.match_info["exchange"], self.config.symbols, delisted)
+        )
+
+    async def _fundamentals(self, request: web.Request) -> web.Response:
+        return self._json(
+            fundamentals_document(request.match_info["symbol"], self.config.quarters)
+        )
+
+    async def _bulk(self, request: web.Request) -> web.Response:
+        exchange = request.match_info["exchange"]
+        day = request.query.get("date") or date.today().isoformat()
+        symbols = request.query.get("symbols")
+        codes = (
+            symbols.split(",")
+            if symbols
+            else [_symbol_code(i) for i in range(self.config.symbols)]
+        )
+        return self._json(bulk_prices(exchange, day, codes))
+
+
+def _parse_args() -> Tuple[MockConfig, str, int]:
+    parser = argparse.ArgumentParser(description="本地 EODHD 模拟服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--symbols", type=int, default=5000)
+    args = parser.parse_args()
+    config = MockConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        symbols=args.symbols,
+    )
+    return config, args.host, args.port
+
+
+async def main() -> None:
+    config, host, port = _parse_args()
+    async with MockEODHDServer(config, host, port) as server:
+        print(f"模拟服务器已启动: {server.base_url}")
+        print(f"使用方式: EODHD_BASE_URL={server.base_url} EODHD_API_TOKEN=mock")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            print(f"共处理 {server.stats.requests} 个请求: {server.stats.by_endpoint}")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,380 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "numpy",
+# ]
+# ///
+
+"""
+内存映射的 OHLCV 时间序列存储
+每个字段一个按 日期 x 股票 排列的定长二进制文件（行主序），用 numpy.memmap 打开：
+每天的批量价格追加一行、原地写入，读取任意股票或日期区间都是零拷贝的 NumPy 视图，
+回测启动时不需要重新解析 JSON/CSV；日期、股票列表和容量记录在 meta.json 中
+
+目录结构:
+    data/ohlcv/US/
+        meta.json
+        open.f32  high.f32  low.f32  close.f32  adjusted_close.f32  volume.f64
+"""
+
+import json
+import os
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+# 字段 -> dtype；缺失值统一为 NaN，因此成交量也用浮点
+DEFAULT_FIELDS: Dict[str, str] = {
+    "open": "float32",
+    "high": "float32",
+    "low": "float32",
+    "close": "float32",
+    "adjusted_close": "float32",
+    "volume": "float64",
+}
+
+FILE_SUFFIX = {"float32": "f32", "float64": "f64"}
+
+META_FILE = "meta.json"
+
+
+def to_float(value: Any) -> float:
+    # 接口偶尔返回 null 或字符串，无法解析的值记为缺失
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class OHLCVStore:
+    """
+    只追加的 OHLCV 存储
+
+    用法:
+        store = OHLCVStore("data/ohlcv/US")
+        store.append_day("2025-01-27", rows)   # rows 为 eod-bulk-last-day 的返回
+        store.flush()
+
+        close = store.field("close")           # (日期数, 股票数) 的零拷贝视图
+        aapl = store.series("AAPL", "close", "2024-01-01", "2024-12-31")
+    """
+
+    def __init__(
+        self,
+        root: str,
+        fields: Optional[Mapping[str, str]] = None,
+        mode: str = "r+",
+        date_chunk: int = 256,
+        symbol_capacity: int = 4096,
+    ):
+        """
+        Args:
+            root: 存储目录，不存在时创建
+            fields: 字段 -> dtype，只在新建存储时生效
+            mode: "r+" 可读写，"r" 只读
+            date_chunk: 日期轴每次扩容的行数
+            symbol_capacity: 新建存储时预留的股票列数，不够时按倍数扩容
+        """
+        if mode not in ("r", "r+"):
+            raise ValueError(f"不支持的模式: {mode}")
+        self.root = root
+        self.mode = mode
+        self.date_chunk = date_chunk
+        meta = self._read_meta()
+        if meta is None and mode == "r":
+            raise FileNotFoundError(f"未找到 OHLCV 存储: {root}")
+        if meta is None:
+            os.makedirs(root, exist_ok=True)
+            meta = {
+                "fields": dict(fields or DEFAULT_FIELDS),
+                "dates": [],
+                "symbols": [],
+                "date_capacity": 0,
+                "symbol_capacity": symbol_capacity,
+            }
+        self.fields: Dict[str, str] = meta["fields"]
+        self.dates: List[str] = meta["dates"]
+        self.symbols: List[str] = meta["symbols"]
+        self._date_capacity: int = meta["date_capacity"]
+        self._symbol_capacity: int = meta["symbol_capacity"]
+        self._date_rows = {date: row for row, date in enumerate(self.dates)}
+        self._columns = {symbol: col for col, symbol in enumerate(self.symbols)}
+        self._arrays: Dict[str, np.memmap] = {}
+        self._recover_grow()
+        self._open_arrays()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, f"{name}.{FILE_SUFFIX[self.fields[name]]}")
+
+    def _recover_grow(self) -> None:
+        """
+        处理扩容中途崩溃留下的文件，使数据文件与 meta.json 记录的容量一致
+        - 股票轴：.tmp 大小与容量一致说明扩容已提交，完成替换；否则是未提交的扩容，删除
+        - 日期轴：数据文件比容量长说明追加的行尚未提交，截回已提交的长度
+        """
+        for name, dtype in self.fields.items():
+            path = self._path(name)
+            size = self._date_capacity * self._symbol_capacity * np.dtype(dtype).itemsize
+            tmp_path = path + ".tmp"
+            if os.path.exists(tmp_path):
+                if os.path.getsize(tmp_path) == size:
+                    os.replace(tmp_path, path)
+                else:
+                    os.remove(tmp_path)
+            if (
+                self.mode == "r+"
+                and os.path.exists(path)
+                and os.path.getsize(path) > size
+            ):
+                os.truncate(path, size)
+
+    def _open_arrays(self) -> None:
+        self._arrays = {}
+        if not self._date_capacity:
+            return
+        shape = (self._date_capacity, self._symbol_capacity)
+        for name, dtype in self.fields.items():
+            self._arrays[name] = np.memmap(
+                self._path(name), dtype=dtype, mode=self.mode, shape=shape
+            )
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """(日期数, 股票数)"""
+        return len(self.dates), len(self.symbols)
+
+    def column_of(self, symbol: str) -> Optional[int]:
+        """股票所在的列号"""
+        return self._columns.get(symbol)
+
+    # ---- 写入 ----
+
+    def _grow_dates(self, needed: int) -> None:
+        """
+        日期轴扩容：行主序下只需在文件末尾追加，已有数据不动
+        新容量在下次 flush 写入 meta.json 时才提交，之前崩溃则由 _recover_grow 截掉追加的行
+        """
+        if needed <= self._date_capacity:
+            return
+        new_capacity = -(-needed // self.date_chunk) * self.date_chunk
+        self._release()
+        added = (new_capacity - self._date_capacity) * self._symbol_capacity
+        for name, dtype in self.fields.items():
+            with open(self._path(name), "ab") as f:
+                # 新增的行填 NaN（未写入的股票/日期即缺失）
+                f.write(np.full(added, np.nan, dtype=dtype).tobytes())
+        self._date_capacity = new_capacity
+        self._open_arrays()
+
+    def _grow_symbols(self, needed: int) -> None:
+        """
+        股票轴扩容：需要按新列宽重写文件，按倍数扩容使这种情况很少发生
+        先写出全部新文件（.tmp），再更新 meta.json 中的容量作为提交点，最后替换原文件；
+        任何一步崩溃后，meta.json 记录的容量都与某一组完整的文件对应（见 _recover_grow）
+        """
+        if needed <= self._symbol_capacity:
+            return
+        new_capacity = self._symbol_capacity
+        while new_capacity < needed:
+            new_capacity *= 2
+        if self._date_capacity:
+            for name, dtype in self.fields.items():
+                grown = np.memmap(
+                    self._path(name) + ".tmp",
+                    dtype=dtype,
+                    mode="w+",
+                    shape=(self._date_capacity, new_capacity),
+                )
+                grown[:, : self._symbol_capacity] = self._arrays[name]
+                grown[:, self._symbol_capacity :] = np.nan
+                grown.flush()
+                del grown
+            self._release()
+            meta = self._read_meta()
+            if meta is not None:
+                # 只提交容量，日期和股票列表仍是上次 flush 的内容，尚未落盘的数据不会被当作已写入
+                meta["date_capacity"] = self._date_capacity
+                meta["symbol_capacity"] = new_capacity
+                self._write_meta(meta)
+            for name in self.fields:
+                os.replace(self._path(name) + ".tmp", self._path(name))
+        self._symbol_capacity = new_capacity
+        self._open_arrays()
+
+    def _release(self) -> None:
+        for array in self._arrays.values():
+            array.flush()
+        self._arrays = {}
+
+    def _columns_for(self, codes: Iterable[str]) -> np.ndarray:
+        columns = []
+        for code in codes:
+            col = self._columns.get(code)
+            if col is None:
+                col = self._columns[code] = len(self.symbols)
+                self.symbols.append(code)
+            columns.append(col)
+        self._grow_symbols(len(self.symbols))
+        return np.asarray(columns, dtype=np.int64)
+
+    def append_day(self, date: str, rows: List[Mapping[str, Any]]) -> int:
+        """
+        写入一天的批量价格；同一天重复写入会原地覆盖对应股票
+
+        Args:
+            date: 'YYYY-MM-DD'，不得早于已有的最后一天（除非是已有日期）
+            rows: eod-bulk-last-day 返回的记录，需要包含 code 和各字段
+
+        Returns:
+            写入的股票数
+
+        Raises:
+            ValueError: 只读模式，或日期早于最后一天且不存在（存储只追加）
+        """
+        if self.mode == "r":
+            raise ValueError("只读模式下不能写入")
+        row = self._date_rows.get(date)
+        if row is None:
+            if self.dates and date < self.dates[-1]:
+                raise ValueError(
+                    f"{date} 早于已有的最后一天 {self.dates[-1]}，存储只支持追加"
+                )
+            row = len(self.dates)
+            self._grow_dates(row + 1)
+            # 容量内的空行可能残留上次未 flush 就崩溃时写入的数据
+            for array in self._arrays.values():
+                array[row] = np.nan
+            self.dates.append(date)
+            self._date_rows[date] = row
+        rows = [r for r in rows if r.get("code")]
+        if not rows:
+            return 0
+        columns = self._columns_for(str(r["code"]) for r in rows)
+        for name, dtype in self.fields.items():
+            values = np.fromiter(
+                (to_float(r.get(name)) for r in rows), dtype=dtype, count=len(rows)
+            )
+            self._arrays[name][row, columns] = values
+        return len(rows)
+
+    def flush(self) -> None:
+        """先落盘数据文件，再原子替换 meta.json，中途崩溃时元数据仍指向完整的数据"""
+        if self.mode == "r":
+            return
+        for array in self._arrays.values():
+            array.flush()
+        self._write_meta(
+            {
+                "fields": self.fields,
+                "dates": self.dates,
+                "symbols": self.symbols,
+                "date_capacity": self._date_capacity,
+                "symbol_capacity": self._symbol_capacity,
+            }
+        )
+
+    def _read_meta(self) -> Optional[Dict[str, Any]]:
+        """已落盘的 meta.json，从未 flush 过时为 None"""
+        meta_path = os.path.join(self.root, META_FILE)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_meta(self, meta: Dict[str, Any]) -> None:
+        """原子替换 meta.json"""
+        meta_path = os.path.join(self.root, META_FILE)
+        tmp_path = meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def close(self) -> None:
+        self.flush()
+        self._arrays = {}
+
+    def __enter__(self) -> "OHLCVStore":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    # ---- 读取（全部为零拷贝视图）----
+
+    def date_range(
+        self, start: Optional[str] = None, end: Optional[str] = None
+    ) -> slice:
+        """日期区间（包含两端）对应的行切片"""
+        lo = bisect_left(self.dates, start) if start else 0
+        hi = bisect_right(self.dates, end) if end else len(self.dates)
+        return slice(lo, hi)
+
+    def field(
+        self, name: str, start: Optional[str] = None, end: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        某个字段在日期区间内的全市场矩阵
+
+        Returns:
+            (日期数, 股票数) 的 memmap 视图，列顺序与 self.symbols 一致
+        """
+        if name not in self._arrays:
+            return np.empty((0, len(self.symbols)), dtype=self.fields[name])
+        return self._arrays[name][self.date_range(start, end), : len(self.symbols)]
+
+    def series(
+        self,
+        symbol: str,
+        name: str = "close",
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> np.ndarray:
+        """
+        单只股票某个字段的时间序列（跨行的步长视图，不复制数据）
+
+        Raises:
+            KeyError: 股票不在存储中
+        """
+        col = self._columns[symbol]
+        return self.field(name, start, end)[:, col]
+
+    def dates_between(
+        self, start: Optional[str] = None, end: Optional[str] = None
+    ) -> List[str]:
+        """日期区间（包含两端）内的交易日"""
+        return self.dates[self.date_range(start, end)]
+
+
+if __name__ == "__main__":
+    import random
+    import shutil
+    import tempfile
+    import time
+
+    root = os.path.join(tempfile.gettempdir(), "ohlcv_store_demo")
+    shutil.rmtree(root, ignore_errors=True)
+    codes = [f"S{i:05d}" for i in range(5000)]
+
+    started = time.perf_counter()
+    with OHLCVStore(root) as store:
+        for day in range(250):
+            date = f"2024-{1 + day // 28:02d}-{1 + day % 28:02d}"
+            rows = [
+                {"code": code, "close": 10 + random.random(), "volume": 1000}
+                for code in random.sample(codes, 4500)
+            ]
+            store.append_day(date, rows)
+    print(f"写入 250 天 x 5000 只股票耗时 {time.perf_counter() - started:.2f}s")
+
+    started = time.perf_counter()
+    reader = OHLCVStore(root, mode="r")
+    close = reader.field("close")
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"打开存储耗时 {elapsed:.1f}ms，矩阵形状 {close.shape}")
+    print(reader.series("S00042", "close", "2024-03-01", "2024-03-10"))
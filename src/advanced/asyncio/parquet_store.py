@@ -0,0 +1,225 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "pandas",
+#     "pyarrow",
+# ]
+# ///
+
+"""
+Parquet 列式存储
+把股票列表、基本面和批量日终价格写成按 交易所/日期 分区的 Parquet 数据集，
+读取时支持列裁剪和谓词下推，只解压、只扫描需要的列和分区
+"""
+
+import json
+import uuid
+from datetime import date as date_cls
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# 谓词格式与 pyarrow 一致，例如 [("Exchange", "=", "NASDAQ"), ("date", ">=", "2025-01-01")]
+Filters = Sequence[Tuple[str, str, Any]]
+
+# 基本面中抽取成独立列的字段，其余内容保存在 raw 列中
+FUNDAMENTALS_GENERAL_FIELDS = [
+    "Code",
+    "Name",
+    "Exchange",
+    "Type",
+    "CurrencyCode",
+    "CountryISO",
+    "ISIN",
+    "Sector",
+    "Industry",
+]
+FUNDAMENTALS_HIGHLIGHT_FIELDS = [
+    "MarketCapitalization",
+    "EBITDA",
+    "PERatio",
+    "EarningsShare",
+    "DividendYield",
+    "ProfitMargin",
+    "RevenueTTM",
+]
+
+
+def _write(
+    df: pd.DataFrame,
+    root: str,
+    partition_cols: List[str],
+    compression: str,
+    append: bool = False,
+) -> None:
+    """
+    写入分区数据集
+
+    Args:
+        append: True 时在分区中追加新文件（每次调用的文件名唯一），用于同一分区分批写入；
+            False 时先删除本次写入涉及的分区，用于整体快照
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if append:
+        options = {
+            "existing_data_behavior": "overwrite_or_ignore",
+            "basename_template": f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        }
+    else:
+        # 重跑同一天只覆盖对应分区，其他分区保持不变
+        options = {"existing_data_behavior": "delete_matching"}
+    pq.write_to_dataset(
+        table,
+        root,
+        partition_cols=partition_cols,
+        compression=compression,
+        **options,
+    )
+
+
+def write_symbols(
+    df: pd.DataFrame,
+    root: str = "data/symbols",
+    snapshot_date: Optional[str] = None,
+    compression: str = "zstd",
+) -> None:
+    """
+    写入股票列表，按 snapshot_date/Exchange 分区
+
+    Args:
+        df: fetch_us_symbols 结果构造的 DataFrame
+        root: 数据集根目录
+        snapshot_date: 快照日期，默认今天
+        compression: Parquet 压缩算法
+    """
+    snapshot_date = snapshot_date or date_cls.today().isoformat()
+    # assign 返回新对象，不修改调用方的数据；apply_schema 压缩后 Exchange 是 category，
+    # 直接 fillna 一个不在类别中的值会抛 TypeError，分区列统一转换为字符串
+    output_df = df.assign(
+        snapshot_date=snapshot_date,
+        Exchange=df["Exchange"].astype("string").fillna("UNKNOWN"),
+    )
+    _write(output_df, root, ["snapshot_date", "Exchange"], compression)
+    print(f"股票列表已写入: {root} (snapshot_date={snapshot_date}, {len(df)} 行)")
+
+
+def fundamentals_to_frame(
+    details: List[Dict[str, Any]], fetched_date: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    把基本面 JSON 列表转换为宽表：常用字段独立成列，完整文档保存在 raw 列
+
+    Args:
+        details: fetch_symbol_details 返回的文档列表
+        fetched_date: 抓取日期，默认今天
+
+    Returns:
+        基本面 DataFrame
+    """
+    fetched_date = fetched_date or date_cls.today().isoformat()
+    general = pd.DataFrame.from_records(
+        [d.get("General") or {} for d in details],
+        columns=FUNDAMENTALS_GENERAL_FIELDS,
+    ).astype("string")
+    highlights = pd.DataFrame.from_records(
+        [d.get("Highlights") or {} for d in details],
+        columns=FUNDAMENTALS_HIGHLIGHT_FIELDS,
+    ).apply(pd.to_numeric, errors="coerce")
+    df = pd.concat([general, highlights], axis=1)
+    df["Exchange"] = df["Exchange"].fillna("UNKNOWN")
+    df["fetched_date"] = fetched_date
+    df["raw"] = [json.dumps(d, ensure_ascii=False) for d in details]
+    return df
+
+
+def write_fundamentals(
+    details: List[Dict[str, Any]],
+    root: str = "data/fundamentals",
+    fetched_date: Optional[str] = None,
+    compression: str = "zstd",
+) -> None:
+    """
+    写入基本面数据，按 fetched_date/Exchange 分区
+    每次调用追加到分区中，流式抓取可以分批写入同一天的数据
+
+    Args:
+        details: fetch_symbol_details 返回的文档列表
+        root: 数据集根目录
+        fetched_date: 抓取日期，默认今天
+        compression: Parquet 压缩算法
+    """
+    if not details:
+        return
+    df = fundamentals_to_frame(details, fetched_date)
+    _write(df, root, ["fetched_date", "Exchange"], compression, append=True)
+    print(f"基本面数据已写入: {root} ({len(df)} 行)")
+
+
+def write_bulk_prices(
+    rows: List[Dict[str, Any]],
+    exchange: str,
+    root: str = "data/bulk_eod",
+    compression: str = "zstd",
+) -> None:
+    """
+    写入批量日终价格，按 exchange/date 分区
+    每次调用追加到分区中，同一天按批次请求的价格可以分多次写入
+
+    Args:
+        rows: get_bulk_eod_prices 返回的价格数据
+        exchange: 交易所代码
+        root: 数据集根目录
+        compression: Parquet 压缩算法
+    """
+    if not rows:
+        return
+    df = pd.DataFrame.from_records(rows)
+    df["exchange"] = exchange
+    _write(df, root, ["exchange", "date"], compression, append=True)
+    print(f"日终价格已写入: {root} (exchange={exchange}, {len(df)} 行)")
+
+
+def read_dataset(
+    root: str,
+    columns: Optional[List[str]] = None,
+    filters: Optional[Filters] = None,
+) -> pd.DataFrame:
+    """
+    读取 Parquet 数据集，只加载需要的列，并把过滤条件下推到分区和行组
+
+    Args:
+        root: 数据集根目录
+        columns: 需要的列，None 表示全部
+        filters: 过滤条件，例如 [("Exchange", "=", "NASDAQ")]
+
+    Returns:
+        DataFrame
+    """
+    table = pq.read_table(
+        root,
+        columns=columns,
+        filters=list(filters) if filters else None,
+        partitioning="hive",
+    )
+    return table.to_pandas()
+
+
+if __name__ == "__main__":
+    demo = pd.DataFrame(
+        {
+            "Code": ["AAPL", "MSFT", "IBM"],
+            "Name": ["Apple Inc", "Microsoft Corporation", "IBM"],
+            "Exchange": ["NASDAQ", "NASDAQ", "NYSE"],
+            "Type": ["Common Stock"] * 3,
+        }
+    )
+    write_symbols(demo, "/tmp/parquet_store_demo/symbols", snapshot_date="2025-01-27")
+    print(
+        read_dataset(
+            "/tmp/parquet_store_demo/symbols",
+            columns=["Code", "Name"],
+            filters=[("Exchange", "=", "NASDAQ")],
+        )
+    )
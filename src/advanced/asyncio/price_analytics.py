@@ -0,0 +1,309 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "numpy",
+# ]
+# ///
+
+"""
+全市场价格矩阵的向量化指标
+所有函数的输入都是 日期 x 股票 的二维数组（OHLCVStore.field 或 PriceMatrices），
+按列一次算完整个市场：收益率、跳空、滚动窗口（基于累计和）、成交量 z-score、
+由 adjusted_close/close 推导的拆股/分红调整因子以及截面排名；缺失值一律为 NaN
+
+用法:
+    prices = PriceMatrices.from_store(OHLCVStore("data/ohlcv/US", mode="r"), "2024-01-01")
+    metrics = compute_universe_metrics(prices, window=20)
+    metrics["return_rank"][-1]      # 最后一天全市场收益率的百分位排名
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+
+from ohlcv_store import to_float
+
+if TYPE_CHECKING:
+    from ohlcv_store import OHLCVStore
+
+PRICE_FIELDS = ("open", "high", "low", "close", "adjusted_close", "volume")
+
+
+@dataclass
+class PriceMatrices:
+    """对齐后的全市场价格矩阵，每个字段形状都是 (日期数, 股票数)"""
+
+    dates: np.ndarray
+    symbols: List[str]
+    fields: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.fields[name]
+
+    @property
+    def shape(self) -> tuple:
+        return len(self.dates), len(self.symbols)
+
+    @classmethod
+    def from_rows(
+        cls, rows: Iterable[Mapping[str, Any]], fields: Iterable[str] = PRICE_FIELDS
+    ) -> "PriceMatrices":
+        """
+        把 eod-bulk-last-day 的记录（可以跨多天）转换为矩阵
+
+        Args:
+            rows: 含 date、code 和价格字段的记录
+            fields: 需要的字段
+
+        Returns:
+            按日期、代码排序的 PriceMatrices
+        """
+        rows = [r for r in rows if r.get("code") and r.get("date")]
+        dates, date_idx = np.unique([r["date"] for r in rows], return_inverse=True)
+        codes, code_idx = np.unique([r["code"] for r in rows], return_inverse=True)
+        matrices = {}
+        for name in fields:
+            values = np.fromiter(
+                (to_float(r.get(name)) for r in rows), dtype=np.float64, count=len(rows)
+            )
+            matrix = np.full((len(dates), len(codes)), np.nan)
+            matrix[date_idx, code_idx] = values
+            matrices[name] = matrix
+        return cls(dates, codes.tolist(), matrices)
+
+    @classmethod
+    def from_store(
+        cls,
+        store: "OHLCVStore",
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        fields: Optional[Iterable[str]] = None,
+    ) -> "PriceMatrices":
+        """从 OHLCVStore 读取日期区间内的矩阵（转换为 float64 计算）"""
+        names = list(fields or store.fields)
+        return cls(
+            np.asarray(store.dates_between(start, end)),
+            list(store.symbols),
+            {
+                name: np.asarray(store.field(name, start, end), dtype=np.float64)
+                for name in names
+            },
+        )
+
+
+def _shift(x: np.ndarray, periods: int = 1) -> np.ndarray:
+    """沿日期轴下移 periods 行，前 periods 行补 NaN"""
+    out = np.full_like(x, np.nan, dtype=np.float64)
+    if periods < len(x):
+        out[periods:] = x[:-periods] if periods else x
+    return out
+
+
+def forward_fill(x: np.ndarray) -> np.ndarray:
+    """沿日期轴用最近一个非缺失值填充 NaN（开头的缺失保持 NaN）"""
+    rows = np.where(np.isnan(x), 0, np.arange(len(x))[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return np.take_along_axis(x, rows, axis=0)
+
+
+def simple_returns(close: np.ndarray, periods: int = 1) -> np.ndarray:
+    """periods 日简单收益率，前 periods 行为 NaN"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return close / _shift(close, periods) - 1.0
+
+
+def log_returns(close: np.ndarray, periods: int = 1) -> np.ndarray:
+    """periods 日对数收益率"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.log(close / _shift(close, periods))
+
+
+def gaps(open_: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """跳空幅度：今日开盘相对昨日收盘"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return open_ / _shift(close) - 1.0
+
+
+def _window_sums(x: np.ndarray, window: int):
+    """返回窗口内非缺失值的 (和, 平方和, 个数)，用累计和相减得到，整体 O(日期数 x 股票数)"""
+    valid = ~np.isnan(x)
+    filled = np.where(valid, x, 0.0)
+    zeros = np.zeros((1,) + x.shape[1:])
+    # 第 t 行的窗口为 [max(t - window + 1, 0), t]
+    starts = np.maximum(np.arange(1, len(x) + 1) - window, 0)
+
+    def windowed(values: np.ndarray) -> np.ndarray:
+        csum = np.concatenate([zeros, np.cumsum(values, axis=0)])
+        return csum[1:] - csum[starts]
+
+    return windowed(filled), windowed(filled * filled), windowed(valid.astype(np.float64))
+
+
+def rolling_mean(x: np.ndarray, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+    """
+    滚动均值（窗口包含当天）
+
+    Args:
+        x: (日期数, 股票数) 数组
+        window: 窗口长度
+        min_periods: 窗口内至少需要的非缺失值个数，默认等于 window
+
+    Returns:
+        与 x 同形状的数组，不足 min_periods 的位置为 NaN
+    """
+    sums, _, counts = _window_sums(x, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = sums / counts
+    mean[~(counts >= (min_periods or window))] = np.nan
+    return mean
+
+
+def rolling_std(
+    x: np.ndarray, window: int, min_periods: Optional[int] = None, ddof: int = 1
+) -> np.ndarray:
+    """
+    滚动标准差（窗口包含当天），由窗口和与平方和计算
+    价格量级较大时先转换为收益率或去均值再计算，可减少相减带来的精度损失
+    """
+    sums, squares, counts = _window_sums(x, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var = (squares - sums * sums / counts) / (counts - ddof)
+    var = np.maximum(var, 0.0)
+    var[~(counts >= max(min_periods or window, ddof + 1))] = np.nan
+    return np.sqrt(var)
+
+
+def volume_zscore(volume: np.ndarray, window: int = 20) -> np.ndarray:
+    """成交量相对此前 window 天（不含当天）均值的 z-score"""
+    previous = _shift(volume)
+    mean = rolling_mean(previous, window)
+    std = rolling_std(previous, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (volume - mean) / std
+
+
+def adjustment_factors(close: np.ndarray, adjusted_close: np.ndarray) -> np.ndarray:
+    """
+    累计调整因子 adjusted_close / close，乘到原始 OHLC 上即得到复权价格
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return adjusted_close / close
+
+
+def corporate_actions(factors: np.ndarray, tolerance: float = 1e-4) -> np.ndarray:
+    """
+    由相邻两天调整因子的变化识别拆股/分红
+
+    Returns:
+        当日调整比例 factors[t-1] / factors[t]；没有公司行为的位置为 NaN
+        （拆股 2:1 约为 2，分红约为 1 + 股息率）
+    """
+    # 与上一个有效因子比较，停牌或缺失数据的日子不会吞掉公司行为
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = _shift(forward_fill(factors)) / factors
+    ratio[~(np.abs(ratio - 1.0) > tolerance)] = np.nan
+    return ratio
+
+
+def adjust_prices(prices: np.ndarray, factors: np.ndarray) -> np.ndarray:
+    """用调整因子复权 open/high/low/close；缺失因子的位置保持原价"""
+    return prices * np.where(np.isnan(factors), 1.0, factors)
+
+
+def cross_sectional_rank(x: np.ndarray, pct: bool = True) -> np.ndarray:
+    """
+    每个日期在全市场截面上的排名（升序，缺失值不参与排名）
+    相同数值按出现顺序给出不同名次
+
+    Args:
+        x: (日期数, 股票数) 数组
+        pct: True 返回 (0, 1] 的百分位，False 返回从 1 开始的名次
+
+    Returns:
+        与 x 同形状的数组，缺失值位置为 NaN
+    """
+    valid = ~np.isnan(x)
+    # argsort 会把 NaN 排在最后，两次 argsort 得到每个元素的名次
+    order = np.argsort(x, axis=1, kind="stable")
+    ranks = np.empty_like(order)
+    rows = np.arange(x.shape[0])[:, None]
+    ranks[rows, order] = np.arange(x.shape[1])
+    ranks = ranks.astype(np.float64) + 1.0
+    if pct:
+        counts = valid.sum(axis=1, keepdims=True)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ranks /= counts
+    ranks[~valid] = np.nan
+    return ranks
+
+
+def cross_sectional_zscore(x: np.ndarray) -> np.ndarray:
+    """每个日期在全市场截面上的 z-score"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.nanmean(x, axis=1, keepdims=True)
+        std = np.nanstd(x, axis=1, keepdims=True)
+        return (x - mean) / std
+
+
+def compute_universe_metrics(
+    prices: PriceMatrices, window: int = 20
+) -> Dict[str, np.ndarray]:
+    """
+    一次计算常用的全市场指标
+
+    Args:
+        prices: 至少包含 close，可选 open、adjusted_close、volume
+        window: 滚动窗口长度
+
+    Returns:
+        指标名 -> (日期数, 股票数) 数组
+    """
+    close = prices["close"]
+    metrics: Dict[str, np.ndarray] = {}
+    if "adjusted_close" in prices.fields:
+        adjusted = prices["adjusted_close"]
+        factors = adjustment_factors(close, adjusted)
+        metrics["adjustment_factor"] = factors
+        metrics["corporate_action"] = corporate_actions(factors)
+    else:
+        adjusted = close
+    returns = simple_returns(adjusted)
+    metrics["return_1d"] = returns
+    metrics["return_rank"] = cross_sectional_rank(returns)
+    metrics[f"volatility_{window}d"] = rolling_std(returns, window)
+    metrics[f"momentum_{window}d"] = simple_returns(adjusted, window)
+    if "open" in prices.fields:
+        metrics["gap"] = gaps(prices["open"], close)
+    if "volume" in prices.fields:
+        metrics["volume_zscore"] = volume_zscore(prices["volume"], window)
+    return metrics
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(7)
+    days, symbols = 252, 5000
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, (days, symbols)), axis=0))
+    close[rng.random((days, symbols)) < 0.01] = np.nan
+    adjusted = close.copy()
+    # 模拟第 100 天 2:1 拆股：拆股前的复权价格减半
+    adjusted[:100, :10] *= 0.5
+    prices = PriceMatrices(
+        dates=np.arange(days),
+        symbols=[f"S{i:05d}" for i in range(symbols)],
+        fields={
+            "open": close * (1 + rng.normal(0, 0.005, (days, symbols))),
+            "close": close,
+            "adjusted_close": adjusted,
+            "volume": rng.lognormal(10, 1, (days, symbols)),
+        },
+    )
+
+    started = time.perf_counter()
+    result = compute_universe_metrics(prices)
+    elapsed = time.perf_counter() - started
+    print(f"{days} 天 x {symbols} 只股票，计算 {len(result)} 个指标耗时 {elapsed:.3f}s")
+    actions = np.argwhere(~np.isnan(result["corporate_action"]))
+    print(f"识别出 {len(actions)} 次公司行为（模拟了 10 次拆股）: {actions[:3].tolist()} ...")
+    print(f"最后一天收益率排名前 5: {np.argsort(-result['return_rank'][-1])[:5]}")
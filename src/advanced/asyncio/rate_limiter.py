@@ -0,0 +1,225 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = []
+# ///
+
+"""
+EODHD 配额感知的自适应限流器
+令牌桶按 API credit 计费（fundamentals 一次消耗 10 个 credit），
+同时约束每分钟额度与每日额度，并根据 429 响应和限流响应头动态调整速率
+"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Mapping, Optional
+
+from config import Settings, get_settings
+
+# 各接口单次调用消耗的 API credit
+ENDPOINT_COSTS: Dict[str, int] = {
+    "fundamentals": 10,
+    "eod-bulk-last-day": 100,
+    "exchange-symbol-list": 1,
+}
+
+
+class DailyQuotaExceededError(RuntimeError):
+    """当日 API 额度已用完"""
+
+
+def api_call_cost(endpoint: str, params: Optional[Mapping[str, Any]] = None) -> int:
+    """
+    计算一次请求消耗的 API credit
+
+    Args:
+        endpoint: 接口路径，例如 "/fundamentals/AAPL.US"
+        params: 查询参数
+
+    Returns:
+        消耗的 credit 数
+    """
+    name = endpoint.strip("/").split("/", 1)[0]
+    if name == "eod-bulk-last-day" and params and params.get("symbols"):
+        # 指定 symbols 时按股票数量计费
+        return max(1, len(str(params["symbols"]).split(",")))
+    return ENDPOINT_COSTS.get(name, 1)
+
+
+class QuotaRateLimiter:
+    """
+    自适应令牌桶限流器
+
+    - 速率上限来自每分钟额度，收到 429 时速率减半（乘性减），
+      之后每次成功请求缓慢恢复（加性增）
+    - 响应头 X-RateLimit-Remaining 会把本地令牌数同步到服务端剩余额度
+    - 每日额度用完时抛出 DailyQuotaExceededError，而不是静默丢弃请求
+    """
+
+    def __init__(
+        self,
+        per_minute: int = 1000,
+        daily: int = 100000,
+        burst_seconds: float = 6.0,
+        min_rate_fraction: float = 0.05,
+        recovery_fraction: float = 0.02,
+    ):
+        """
+        Args:
+            per_minute: 每分钟 credit 额度
+            daily: 每日 credit 额度
+            burst_seconds: 令牌桶容量，相当于多少秒的额度
+            min_rate_fraction: 降速后的最低速率（相对上限的比例）
+            recovery_fraction: 每次成功后恢复的速率（相对上限的比例）
+        """
+        self.max_rate = per_minute / 60.0
+        self.rate = self.max_rate
+        self.daily = daily
+        self.burst_seconds = burst_seconds
+        self.min_rate_fraction = min_rate_fraction
+        self.recovery_fraction = recovery_fraction
+
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+        self._day = self._today()
+        self.daily_used = 0
+        self.throttled = 0
+
+    @classmethod
+    def from_config(cls, settings: Optional[Settings] = None) -> "QuotaRateLimiter":
+        """使用配置中的额度创建限流器，settings 为 None 时使用 get_settings()"""
+        settings = settings or get_settings()
+        return cls(
+            per_minute=settings.rate_limit_per_minute,
+            daily=settings.daily_call_limit,
+        )
+
+    @property
+    def capacity(self) -> float:
+        return max(self.max_rate * self.burst_seconds, 1.0)
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def _check_daily(self, cost: int) -> None:
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self.daily_used = 0
+        if self.daily_used + cost > self.daily:
+            raise DailyQuotaExceededError(
+                f"当日额度不足: 已用 {self.daily_used}/{self.daily}，本次需要 {cost}"
+            )
+
+    async def acquire(self, cost: int = 1, charge_daily: bool = True) -> None:
+        """
+        等待直到有足够令牌发起一次请求
+
+        每日额度在拿到令牌之后才扣除，等待期间被取消的请求不占用当日额度
+
+        Args:
+            cost: 本次请求消耗的 credit
+            charge_daily: 是否计入当日额度；同一请求收到 429 后重新排队时传 False，避免重复计费
+
+        Raises:
+            DailyQuotaExceededError: 当日额度已用完
+        """
+        if charge_daily:
+            # 额度已不足时直接失败，不必排队
+            self._check_daily(cost)
+        tokens = min(cost, self.capacity)
+        # 持锁等待，保证调用方按先来后到的顺序获得令牌
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= tokens:
+                    break
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+            if charge_daily:
+                # 排队期间其他请求可能已用完额度，此时不扣令牌
+                self._check_daily(cost)
+                self.daily_used += cost
+            self._tokens -= tokens
+
+    def on_response(self, status: int, headers: Mapping[str, str]) -> None:
+        """
+        根据响应状态码和限流响应头调整速率
+
+        Args:
+            status: HTTP 状态码
+            headers: 响应头
+        """
+        limit = _header_int(headers, "X-RateLimit-Limit")
+        if limit:
+            self.max_rate = limit / 60.0
+            self.rate = min(self.rate, self.max_rate)
+
+        remaining = _header_int(headers, "X-RateLimit-Remaining")
+        if remaining is not None:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, float(remaining))
+
+        if status == 429:
+            self.on_throttled(_header_int(headers, "Retry-After"))
+        elif status < 400:
+            self.rate = min(
+                self.max_rate, self.rate + self.max_rate * self.recovery_fraction
+            )
+
+    def on_throttled(self, retry_after: Optional[int] = None) -> None:
+        """
+        收到 429 后乘性降速，并在 Retry-After 期间暂停发放令牌
+
+        Args:
+            retry_after: 服务端建议的等待秒数
+        """
+        self.throttled += 1
+        self.rate = max(self.max_rate * self.min_rate_fraction, self.rate / 2)
+        self._tokens = 0.0
+        pause = retry_after if retry_after is not None else self.burst_seconds
+        self._paused_until = max(self._paused_until, time.monotonic() + min(pause, 60.0))
+
+    def summary(self) -> str:
+        return (
+            f"当前速率: {self.rate * 60:.0f}/{self.max_rate * 60:.0f} credit/分钟, "
+            f"当日已用: {self.daily_used}/{self.daily}, "
+            f"429 次数: {self.throttled}"
+        )
+
+
+def _header_int(headers: Mapping[str, str], name: str) -> Optional[int]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return int(float(value))
+    except ValueError:
+        return None
+
+
+async def main() -> None:
+    """演示：每分钟 600 credit 时，10 次 fundamentals 请求的节奏"""
+    limiter = QuotaRateLimiter(per_minute=600, burst_seconds=1.0)
+    started = time.monotonic()
+    for i in range(10):
+        await limiter.acquire(api_call_cost("/fundamentals/AAPL.US"))
+        print(f"第 {i + 1} 次请求放行，耗时 {time.monotonic() - started:.2f}s")
+    print(limiter.summary())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
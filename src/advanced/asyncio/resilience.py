@@ -0,0 +1,277 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "aiohttp",
+# ]
+# ///
+
+"""
+EODHD 调用的容错策略
+错误分类 -> 指数退避 + 抖动重试 -> 持续失败时熔断，另可选对冲请求降低长尾延迟；
+异步（aiohttp）和同步（requests）调用共用同一套策略
+"""
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import aiohttp
+
+try:
+    import requests
+except ImportError:  # 只使用异步客户端时可以不安装 requests
+    requests = None
+
+T = TypeVar("T")
+
+# 错误类别
+RETRYABLE = "retryable"  # 超时、连接错误、5xx：可以重试，并计入熔断
+THROTTLED = "throttled"  # 429：可以重试，但不计入熔断
+FATAL = "fatal"  # 其余 4xx、解析错误等：重试也不会成功
+
+RETRYABLE_STATUS = {408, 500, 502, 503, 504}
+
+# 只有连接和超时类错误值得重试；FileNotFoundError、PermissionError 等其他 OSError 属于 FATAL
+RETRYABLE_ERRORS: tuple = (
+    ConnectionError,
+    TimeoutError,  # 包含 asyncio.TimeoutError
+    aiohttp.ClientConnectionError,
+    aiohttp.ClientPayloadError,
+)
+if requests is not None:
+    # requests 的连接错误和超时继承自 OSError，而不是内置的 ConnectionError/TimeoutError
+    RETRYABLE_ERRORS += (
+        requests.ConnectionError,
+        requests.Timeout,
+        requests.exceptions.ChunkedEncodingError,
+    )
+
+
+class CircuitOpenError(RuntimeError):
+    """熔断器处于打开状态，请求被直接拒绝"""
+
+
+def _status_of(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status", None)
+    if status is None:
+        # requests.HTTPError 把状态码放在 response 上
+        response = getattr(exc, "response", None)
+        status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def classify_error(exc: BaseException) -> str:
+    """
+    判断异常属于哪一类
+
+    Args:
+        exc: 请求抛出的异常
+
+    Returns:
+        RETRYABLE、THROTTLED 或 FATAL
+    """
+    status = _status_of(exc)
+    if status is not None:
+        if status == 429:
+            return THROTTLED
+        if status in RETRYABLE_STATUS or status >= 500:
+            return RETRYABLE
+        return FATAL
+    if isinstance(exc, RETRYABLE_ERRORS):
+        return RETRYABLE
+    return FATAL
+
+
+@dataclass
+class RetryPolicy:
+    """指数退避重试策略（full jitter）"""
+
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+
+    def delay(self, attempt: int) -> float:
+        """第 attempt 次（从 1 开始）失败后的等待时间"""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """
+    连续失败计数熔断器
+
+    - closed: 正常放行，连续 failure_threshold 次可重试错误后打开
+    - open: 直接拒绝，reset_timeout 秒后进入 half-open
+    - half-open: 只放行一个探测请求，成功则关闭，失败则重新打开
+    """
+
+    def __init__(self, failure_threshold: int = 20, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._probe_in_flight = False
+
+    def before_call(self) -> None:
+        """
+        请求前检查
+
+        Raises:
+            CircuitOpenError: 熔断器打开或半开状态下已有探测请求
+        """
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejected += 1
+                raise CircuitOpenError("EODHD 熔断中，暂停发送请求")
+            self.state = "half-open"
+        if self.state == "half-open":
+            if self._probe_in_flight:
+                self.rejected += 1
+                raise CircuitOpenError("EODHD 熔断探测中，暂停发送请求")
+            self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self, kind: str) -> None:
+        self._probe_in_flight = False
+        if kind != RETRYABLE:
+            # 429 和 4xx 说明服务端是正常的，不计入熔断
+            if self.state == "half-open":
+                self.state = "closed"
+            return
+        self.consecutive_failures += 1
+        if (
+            self.state == "half-open"
+            or self.consecutive_failures >= self.failure_threshold
+        ):
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """请求没有结果就结束（如被取消）时释放半开探测名额，不改变状态"""
+        self._probe_in_flight = False
+
+
+async def _hedged(
+    func: Callable[[], Awaitable[T]], hedge_delay: Optional[float]
+) -> T:
+    """hedge_delay 秒内没有返回时再发一个相同请求，取先成功的结果"""
+    if hedge_delay is None:
+        return await func()
+    first = asyncio.ensure_future(func())
+    done, _ = await asyncio.wait({first}, timeout=hedge_delay)
+    if done:
+        return first.result()
+    second = asyncio.ensure_future(func())
+    pending = {first, second}
+    error: Optional[BaseException] = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def call_with_resilience(
+    func: Callable[[], Awaitable[T]],
+    policy: Optional[RetryPolicy] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    hedge_delay: Optional[float] = None,
+    on_retry: Optional[Callable[[int, BaseException], None]] = None,
+) -> T:
+    """
+    按策略执行异步调用
+
+    Args:
+        func: 无参异步函数，每次重试都会重新调用
+        policy: 重试策略，None 表示不重试
+        breaker: 熔断器，None 表示不熔断
+        hedge_delay: 对冲请求的触发延迟（秒），None 表示不对冲；对冲会多消耗 API 额度
+        on_retry: 每次重试前的回调，参数为 (已尝试次数, 异常)
+
+    Returns:
+        func 的返回值
+
+    Raises:
+        CircuitOpenError: 熔断器打开
+        最后一次失败的异常
+    """
+    policy = policy or RetryPolicy(max_attempts=1)
+    for attempt in range(1, policy.max_attempts + 1):
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            result = await _hedged(func, hedge_delay)
+        except Exception as exc:
+            kind = classify_error(exc)
+            if breaker is not None:
+                breaker.record_failure(kind)
+            if kind == FATAL or attempt >= policy.max_attempts:
+                raise
+            if on_retry is not None:
+                on_retry(attempt, exc)
+            await asyncio.sleep(policy.delay(attempt))
+            continue
+        except BaseException:
+            # 取消、KeyboardInterrupt 等不是请求的结果，只释放探测名额后继续抛出
+            if breaker is not None:
+                breaker.release()
+            raise
+        if breaker is not None:
+            breaker.record_success()
+        return result
+    raise AssertionError("unreachable")
+
+
+def call_with_resilience_sync(
+    func: Callable[[], T],
+    policy: Optional[RetryPolicy] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    on_retry: Optional[Callable[[int, BaseException], None]] = None,
+) -> T:
+    """call_with_resilience 的同步版本（不支持对冲），用于 requests 调用"""
+    policy = policy or RetryPolicy(max_attempts=1)
+    for attempt in range(1, policy.max_attempts + 1):
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            result = func()
+        except Exception as exc:
+            kind = classify_error(exc)
+            if breaker is not None:
+                breaker.record_failure(kind)
+            if kind == FATAL or attempt >= policy.max_attempts:
+                raise
+            if on_retry is not None:
+                on_retry(attempt, exc)
+            time.sleep(policy.delay(attempt))
+            continue
+        except BaseException:
+            # 取消、KeyboardInterrupt 等不是请求的结果，只释放探测名额后继续抛出
+            if breaker is not None:
+                breaker.release()
+            raise
+        if breaker is not None:
+            breaker.record_success()
+        return result
+    raise AssertionError("unreachable")
+
+
+def print_retry(attempt: int, exc: BaseException) -> None:
+    """默认的重试日志"""
+    print(f"第 {attempt} 次请求失败（{classify_error(exc)}）: {exc!r}，稍后重试")
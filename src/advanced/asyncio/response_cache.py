@@ -0,0 +1,330 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = []
+# ///
+
+"""
+EODHD 接口的持久化响应缓存
+以 接口 + 规范化参数（去掉 api_token）为键，把响应体 zlib 压缩后存入 SQLite，
+支持按接口设置 TTL、基于 ETag/Last-Modified 的条件请求，以及按总大小的 LRU 淘汰；
+异步代码使用 *_async 方法，SQLite 读写和压缩在线程池中执行，不阻塞事件循环
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional
+
+if TYPE_CHECKING:
+    from config import Settings
+
+# 各接口缓存有效期（秒）
+DEFAULT_TTLS: Dict[str, int] = {
+    "exchange-symbol-list": 24 * 3600,
+    "fundamentals": 7 * 24 * 3600,
+    "eod-bulk-last-day": 12 * 3600,
+}
+
+# 不参与缓存键的参数
+IGNORED_PARAMS = {"api_token"}
+
+
+@dataclass
+class CacheEntry:
+    """一条缓存记录"""
+
+    key: str
+    body: bytes
+    expires_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """过期记录重新验证时携带的条件请求头"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def endpoint_name(endpoint: str) -> str:
+    """提取接口名，例如 /fundamentals/AAPL.US -> fundamentals"""
+    return endpoint.strip("/").split("/", 1)[0]
+
+
+def make_cache_key(endpoint: str, params: Optional[Mapping[str, Any]] = None) -> str:
+    """
+    生成缓存键：接口路径 + 排序后的参数，api_token 不参与
+
+    Args:
+        endpoint: 接口路径
+        params: 查询参数
+
+    Returns:
+        sha256 十六进制摘要
+    """
+    normalized = {
+        str(k): str(v)
+        for k, v in (params or {}).items()
+        if k not in IGNORED_PARAMS and v is not None
+    }
+    normalized.setdefault("fmt", "json")
+    raw = json.dumps([endpoint.rstrip("/"), sorted(normalized.items())])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    基于 SQLite 的压缩响应缓存
+
+    用法:
+        cache = ResponseCache(".eodhd_cache/responses.sqlite")
+        entry = cache.lookup("/fundamentals/AAPL.US", params)
+        if entry is None or not entry.fresh:
+            ...  # 发请求后 cache.store(...)
+
+        # 事件循环中
+        entry = await cache.lookup_async("/fundamentals/AAPL.US", params)
+
+    所有方法都可以在多个线程中调用，SQLite 连接由锁保护
+    """
+
+    def __init__(
+        self,
+        path: str = ".eodhd_cache/responses.sqlite",
+        max_bytes: int = 512 * 1024 * 1024,
+        ttls: Optional[Mapping[str, int]] = None,
+        compress_level: int = 6,
+    ):
+        """
+        Args:
+            path: SQLite 文件路径
+            max_bytes: 压缩后总大小上限，超出时淘汰最久未访问的记录
+            ttls: 按接口名覆盖默认 TTL（秒）
+            compress_level: zlib 压缩级别
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.compress_level = compress_level
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evicted = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                etag TEXT,
+                last_modified TEXT
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_last_access "
+            "ON responses(last_access)"
+        )
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+
+    @classmethod
+    def from_config(
+        cls, settings: Optional["Settings"] = None
+    ) -> Optional["ResponseCache"]:
+        """
+        按配置创建缓存，EODHD_CACHE_PATH 为空时返回 None（禁用缓存）
+
+        Args:
+            settings: 配置，None 时使用 get_settings()
+        """
+        from config import get_settings
+
+        settings = settings or get_settings()
+        if not settings.cache_path:
+            return None
+        return cls(settings.cache_path, max_bytes=settings.cache_max_mb * 1024 * 1024)
+
+    def ttl_for(self, endpoint: str) -> int:
+        return self.ttls.get(endpoint_name(endpoint), 3600)
+
+    def lookup(
+        self, endpoint: str, params: Optional[Mapping[str, Any]] = None
+    ) -> Optional[CacheEntry]:
+        """
+        查找缓存记录（可能已过期，调用方通过 entry.fresh 判断）
+
+        Args:
+            endpoint: 接口路径
+            params: 查询参数
+
+        Returns:
+            缓存记录，不存在时返回 None
+        """
+        key = make_cache_key(endpoint, params)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, expires_at, etag, last_modified FROM responses "
+                "WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            self._conn.commit()
+            body, expires_at, etag, last_modified = row
+            if time.time() < expires_at:
+                self.hits += 1
+            else:
+                self.misses += 1
+        # 解压在锁外进行，不阻塞其他线程访问缓存
+        return CacheEntry(key, zlib.decompress(body), expires_at, etag, last_modified)
+
+    def store(
+        self,
+        endpoint: str,
+        params: Optional[Mapping[str, Any]],
+        body: bytes,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        """
+        写入一条响应，并在超出大小上限时做 LRU 淘汰
+
+        Args:
+            endpoint: 接口路径
+            params: 查询参数
+            body: 原始响应体
+            headers: 响应头，用于保存 ETag/Last-Modified
+        """
+        headers = headers or {}
+        key = make_cache_key(endpoint, params)
+        compressed = zlib.compress(body, self.compress_level)
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, endpoint, body, size, expires_at, last_access, etag, last_modified) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    endpoint_name(endpoint),
+                    compressed,
+                    len(compressed),
+                    now + self.ttl_for(endpoint),
+                    now,
+                    headers.get("ETag"),
+                    headers.get("Last-Modified"),
+                ),
+            )
+            self._total_bytes += len(compressed) - (old[0] if old else 0)
+            self._evict()
+            self._conn.commit()
+
+    def refresh(self, entry: CacheEntry, endpoint: str) -> None:
+        """条件请求返回 304 时延长记录有效期"""
+        entry.expires_at = time.time() + self.ttl_for(endpoint)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET expires_at = ?, last_access = ? WHERE key = ?",
+                (entry.expires_at, time.time(), entry.key),
+            )
+            self._conn.commit()
+            self.revalidated += 1
+
+    async def lookup_async(
+        self, endpoint: str, params: Optional[Mapping[str, Any]] = None
+    ) -> Optional[CacheEntry]:
+        """lookup 的异步版本，查询和解压在线程池中执行"""
+        return await asyncio.to_thread(self.lookup, endpoint, params)
+
+    async def store_async(
+        self,
+        endpoint: str,
+        params: Optional[Mapping[str, Any]],
+        body: bytes,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        """store 的异步版本，压缩和写入在线程池中执行"""
+        await asyncio.to_thread(self.store, endpoint, params, body, headers)
+
+    async def refresh_async(self, entry: CacheEntry, endpoint: str) -> None:
+        """refresh 的异步版本"""
+        await asyncio.to_thread(self.refresh, entry, endpoint)
+
+    def _evict(self) -> None:
+        # 淘汰到上限的 90%，避免每次写入都触发淘汰
+        target = int(self.max_bytes * 0.9)
+        if self._total_bytes <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access"
+        )
+        victims = []
+        for key, size in rows:
+            if self._total_bytes <= target:
+                break
+            victims.append((key,))
+            self._total_bytes -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.evicted += len(victims)
+
+    def clear(self) -> None:
+        """清空全部缓存"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def summary(self) -> str:
+        return (
+            f"缓存命中: {self.hits}, 未命中: {self.misses}, "
+            f"重新验证: {self.revalidated}, 淘汰: {self.evicted}, "
+            f"占用: {self._total_bytes / 1024 / 1024:.2f} MB"
+        )
+
+
+if __name__ == "__main__":
+    cache = ResponseCache("/tmp/eodhd_cache_demo.sqlite")
+    params = {"api_token": "secret", "fmt": "json"}
+    cache.store("/fundamentals/AAPL.US", params, b'{"General": {"Code": "AAPL"}}')
+    # 不同 token 命中同一条记录
+    entry = cache.lookup("/fundamentals/AAPL.US", {"api_token": "other"})
+    print(entry.body if entry else None, entry.fresh if entry else None)
+    print(cache.summary())
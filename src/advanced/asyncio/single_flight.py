@@ -0,0 +1,128 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = []
+# ///
+
+"""
+并发相同请求的合并（single-flight）
+同一个键同时只会有一个请求在途，其余调用方等待并共享它的结果或异常；
+请求结束后键即被移除，之后的调用会重新发起请求（是否命中缓存由下层决定）
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    asyncio 版本
+
+    用法:
+        flight = SingleFlight()
+        body = await flight.do(key, lambda: fetch(key))
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.shared = 0
+
+    @property
+    def in_flight(self) -> int:
+        """当前在途的键数量"""
+        return len(self._calls)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        执行 func，若相同 key 已有请求在途则直接等待它
+
+        Args:
+            key: 请求键，相同的键视为相同的请求
+            func: 无参异步函数，只有第一个调用方的 func 会被执行
+
+        Returns:
+            func 的返回值（所有等待方拿到同一个对象）
+        """
+        self.calls += 1
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.shared += 1
+        # 某个调用方被取消时不影响其他等待方
+        return await asyncio.shield(task)
+
+    def summary(self) -> str:
+        return f"合并请求: {self.shared}/{self.calls}"
+
+
+class SyncSingleFlight(Generic[T]):
+    """线程版本，用于 requests 等同步调用"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, func: Callable[[], T]) -> T:
+        """
+        执行 func，若相同 key 已有请求在途则阻塞等待它
+
+        Args:
+            key: 请求键
+            func: 无参函数，在第一个调用方的线程中执行
+
+        Returns:
+            func 的返回值
+        """
+        with self._lock:
+            self.calls += 1
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+            else:
+                self.shared += 1
+        if not leader:
+            return future.result()
+        try:
+            result = func()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def summary(self) -> str:
+        return f"合并请求: {self.shared}/{self.calls}"
+
+
+async def main() -> None:
+    """演示：10 个并发调用方请求同一个键，只执行一次"""
+    flight: SingleFlight[str] = SingleFlight()
+    executed = 0
+
+    async def fetch() -> str:
+        nonlocal executed
+        executed += 1
+        await asyncio.sleep(0.1)
+        return "AAPL.US"
+
+    results = await asyncio.gather(*(flight.do("AAPL.US", fetch) for _ in range(10)))
+    print(f"实际执行 {executed} 次，得到 {len(results)} 个结果，{flight.summary()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,193 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "aiohttp",
+#     "pandas",
+#     "pyarrow",
+# ]
+# ///
+
+"""
+股票池增量对比
+每次运行把股票列表保存为快照，并以 Code+Exchange 为键建立行哈希索引，
+找出相对上一个快照新增、移除和字段变化的股票，基本面只需重新抓取这些股票
+"""
+
+import asyncio
+import os
+from dataclasses import dataclass
+from datetime import date as date_cls
+from typing import List, Optional
+
+import pandas as pd
+
+from parquet_store import read_dataset, write_symbols
+
+KEY_COLUMNS = ["Code", "Exchange"]
+
+
+@dataclass
+class SymbolDiff:
+    """两个快照之间的差异"""
+
+    added: pd.DataFrame
+    removed: pd.DataFrame
+    changed: pd.DataFrame
+
+    def symbols_to_refetch(self) -> List[str]:
+        """需要重新抓取基本面的股票代码（新增 + 变化）"""
+        codes = pd.concat([self.added["Code"], self.changed["Code"]])
+        return codes.drop_duplicates().tolist()
+
+    def summary(self) -> str:
+        return (
+            f"新增: {len(self.added)}, 移除: {len(self.removed)}, "
+            f"变化: {len(self.changed)}"
+        )
+
+
+def _keyed(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    去重并以 (Code, Exchange) 为索引
+    键列统一成字符串，缺失的交易所按 Parquet 快照的写法记为 UNKNOWN
+    """
+    keys = {
+        "Code": df["Code"].astype("string").fillna(""),
+        "Exchange": df["Exchange"].astype("string").fillna("UNKNOWN"),
+    }
+    return (
+        df.assign(**keys)
+        .drop_duplicates(KEY_COLUMNS, keep="last")
+        .set_index(KEY_COLUMNS)
+    )
+
+
+def build_hash_index(df: pd.DataFrame) -> pd.Series:
+    """
+    以 Code+Exchange 为索引、整行内容哈希为值的索引
+
+    Args:
+        df: 股票列表 DataFrame
+
+    Returns:
+        索引为 (Code, Exchange) 的 uint64 哈希序列
+    """
+    keyed = _keyed(df)
+    value_columns = sorted(keyed.columns)
+    hashes = pd.util.hash_pandas_object(
+        keyed[value_columns].astype("string").fillna(""), index=False
+    )
+    hashes.index = keyed.index
+    return hashes
+
+
+def diff_symbols(previous: pd.DataFrame, current: pd.DataFrame) -> SymbolDiff:
+    """
+    比较两个股票列表快照
+
+    Args:
+        previous: 上一次的股票列表
+        current: 本次的股票列表
+
+    Returns:
+        新增、移除、变化的股票（变化的股票取本次的数据）
+    """
+    common_columns = [c for c in current.columns if c in previous.columns]
+    old_index = build_hash_index(previous[common_columns])
+    new_index = build_hash_index(current[common_columns])
+
+    added_keys = new_index.index.difference(old_index.index)
+    removed_keys = old_index.index.difference(new_index.index)
+    common_keys = new_index.index.intersection(old_index.index)
+    changed_mask = new_index.loc[common_keys].values != old_index.loc[common_keys].values
+    changed_keys = common_keys[changed_mask]
+
+    current_keyed = _keyed(current)
+    previous_keyed = _keyed(previous)
+    return SymbolDiff(
+        added=current_keyed.loc[added_keys].reset_index(),
+        removed=previous_keyed.loc[removed_keys].reset_index(),
+        changed=current_keyed.loc[changed_keys].reset_index(),
+    )
+
+
+class SnapshotStore:
+    """基于 Parquet 数据集（按 snapshot_date 分区）的股票列表快照存储"""
+
+    def __init__(self, root: str = "data/symbols"):
+        self.root = root
+
+    def snapshot_dates(self) -> List[str]:
+        """已保存的快照日期，升序"""
+        if not os.path.isdir(self.root):
+            return []
+        prefix = "snapshot_date="
+        return sorted(
+            name[len(prefix) :]
+            for name in os.listdir(self.root)
+            if name.startswith(prefix)
+        )
+
+    def latest(self, before: Optional[str] = None) -> Optional[str]:
+        """最近的快照日期，before 不为空时只看早于该日期的快照"""
+        dates = [d for d in self.snapshot_dates() if before is None or d < before]
+        return dates[-1] if dates else None
+
+    def load(self, snapshot_date: str) -> pd.DataFrame:
+        df = read_dataset(self.root, filters=[("snapshot_date", "=", snapshot_date)])
+        return df.drop(columns=["snapshot_date"])
+
+    def save(self, df: pd.DataFrame, snapshot_date: Optional[str] = None) -> str:
+        snapshot_date = snapshot_date or date_cls.today().isoformat()
+        write_symbols(df, self.root, snapshot_date=snapshot_date)
+        return snapshot_date
+
+
+async def refresh_changed_fundamentals(
+    api_token: str, store: SnapshotStore, output_prefix: str = "us_stock_details"
+) -> Optional[SymbolDiff]:
+    """
+    拉取最新股票列表，与上一个快照对比，只为新增和变化的股票重新抓取基本面
+
+    Args:
+        api_token: EODHD API 密钥
+        store: 快照存储
+        output_prefix: 基本面输出文件前缀，每天写入 {prefix}.{日期}.jsonl
+
+    Returns:
+        本次的差异，获取股票列表失败时返回 None
+    """
+    from crawl_checkpoint import crawl_symbols_details
+    from eodhd_symbol import fetch_us_symbols
+
+    symbols_data = await fetch_us_symbols(api_token)
+    if not symbols_data:
+        print("无法获取股票代码数据")
+        return None
+    current = pd.DataFrame(symbols_data)
+
+    today = date_cls.today().isoformat()
+    previous_date = store.latest(before=today)
+    store.save(current, today)
+    if previous_date is None:
+        print("没有历史快照，需要全量抓取")
+        refetch = current["Code"].dropna().tolist()
+        diff = SymbolDiff(current, current.iloc[0:0], current.iloc[0:0])
+    else:
+        diff = diff_symbols(store.load(previous_date), current)
+        refetch = diff.symbols_to_refetch()
+        print(f"与 {previous_date} 快照相比 -> {diff.summary()}")
+
+    await crawl_symbols_details(
+        api_token,
+        refetch,
+        checkpoint_path=f"{output_prefix}.{today}.checkpoint.jsonl",
+        output_path=f"{output_prefix}.{today}.jsonl",
+    )
+    return diff
+
+
+if __name__ == "__main__":
+    from config import get_eodhd_api_token
+
+    asyncio.run(refresh_changed_fundamentals(get_eodhd_api_token(), SnapshotStore()))
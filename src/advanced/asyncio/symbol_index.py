@@ -0,0 +1,322 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = []
+# ///
+
+"""
+股票列表的内存索引
+按列保存股票列表，另建 代码/交易所 和 ISIN 的哈希索引以及代码、名称的有序数组；
+精确查找是一次字典访问，前缀搜索是一次二分查找加顺序扫描，
+不需要在每个请求里持有或扫描 DataFrame；索引可以用 pickle 保存，5 万行加载只需几十毫秒
+"""
+
+import gc
+import pickle
+import time
+from collections import Counter
+from array import array
+from bisect import bisect_left
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# 索引保存的列，与 exchange-symbol-list 返回的字段一致
+COLUMNS = ("Code", "Name", "Exchange", "Isin", "Type", "Country", "Currency")
+
+FORMAT_VERSION = 1
+
+
+class SymbolRecord(NamedTuple):
+    """索引中的一只股票"""
+
+    Code: str
+    Name: str
+    Exchange: str
+    Isin: str
+    Type: str
+    Country: str
+    Currency: str
+    ExchangeCode: str = ""
+
+
+def _text(value: Any) -> str:
+    # DataFrame 中的缺失值可能是 None、NaN 或 pd.NA
+    return value if isinstance(value, str) else ""
+
+
+class SymbolIndex:
+    """
+    股票列表索引
+
+    用法:
+        index = SymbolIndex.from_frame(df, exchange_code="US")
+        index.get("AAPL", "NASDAQ")
+        index.get("AAPL.US")
+        index.by_isin("US0378331005")
+        index.search("APP")
+        index.save("us_symbols.index.pkl")
+        index = SymbolIndex.load("us_symbols.index.pkl")
+    """
+
+    def __init__(self, columns: Mapping[str, List[str]], exchange_code: str = ""):
+        """
+        Args:
+            columns: 列名 -> 等长的字符串列表，至少包含 COLUMNS，可选 ExchangeCode
+            exchange_code: 股票列表所属的 EODHD 交易所代码（如 "US"），
+                exchange-symbol-list 的记录不带 ExchangeCode，用它填充空值，
+                "AAPL.US" 这样的代码才能按后缀匹配
+        """
+        self._columns = {
+            name: list(columns.get(name) or [""] * len(columns["Code"]))
+            for name in COLUMNS + ("ExchangeCode",)
+        }
+        if exchange_code:
+            self._columns["ExchangeCode"] = [
+                value or exchange_code for value in self._columns["ExchangeCode"]
+            ]
+        self._build()
+
+    def _build(
+        self, code_order: Optional[array] = None, name_order: Optional[array] = None
+    ) -> None:
+        """
+        重建哈希索引；传入已保存的排序结果时跳过排序
+        全部用 map/zip/dict 在 C 层构造，并在构造期间暂停 GC，避免逐行的 Python 循环
+        """
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            columns = self._columns
+            rows = range(len(columns["Code"]))
+            codes = list(map(str.upper, columns["Code"]))
+            names = list(map(str.casefold, columns["Name"]))
+
+            # 倒序构造字典，重复键保留第一次出现的行
+            self._by_code = dict(zip(reversed(codes), reversed(rows)))
+            isins = list(map(str.upper, columns["Isin"]))
+            self._by_isin = dict(zip(reversed(isins), reversed(rows)))
+            self._by_isin.pop("", None)
+
+            if code_order is None:
+                code_order = array("i", sorted(rows, key=codes.__getitem__))
+            if name_order is None:
+                name_order = array("i", sorted(rows, key=names.__getitem__))
+            self._code_order = code_order
+            self._code_keys = list(map(codes.__getitem__, code_order))
+            self._name_order = name_order
+            self._name_keys = list(map(names.__getitem__, name_order))
+            self._record_columns = [columns[name] for name in SymbolRecord._fields]
+
+            # 同一代码在多个交易所上市的情况很少，单独记录它们的全部行
+            self._duplicates: Dict[str, List[int]] = {}
+            if len(self._by_code) != len(codes):
+                for code, count in Counter(codes).items():
+                    if count > 1:
+                        self._duplicates[code] = self._rows_of(code)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def _rows_of(self, code: str) -> List[int]:
+        keys = self._code_keys
+        position = bisect_left(keys, code)
+        rows = []
+        while position < len(keys) and keys[position] == code:
+            rows.append(self._code_order[position])
+            position += 1
+        return rows
+
+    @classmethod
+    def from_records(
+        cls, records: Iterable[Mapping[str, Any]], exchange_code: str = ""
+    ) -> "SymbolIndex":
+        """用 exchange-symbol-list 返回的记录构建索引"""
+        records = list(records)
+        names = COLUMNS + ("ExchangeCode",)
+        return cls(
+            {name: [_text(r.get(name)) for r in records] for name in names},
+            exchange_code,
+        )
+
+    @classmethod
+    def from_frame(cls, df: "pd.DataFrame", exchange_code: str = "") -> "SymbolIndex":
+        """用股票列表 DataFrame 构建索引（不存在的列留空）"""
+        return cls(
+            {
+                name: [_text(v) for v in df[name].tolist()]
+                for name in COLUMNS + ("ExchangeCode",)
+                if name in df.columns
+            },
+            exchange_code,
+        )
+
+    def __len__(self) -> int:
+        return len(self._columns["Code"])
+
+    def __contains__(self, code: str) -> bool:
+        return self.get(code) is not None
+
+    def record(self, row: int) -> SymbolRecord:
+        """按行号取出记录"""
+        return SymbolRecord._make([column[row] for column in self._record_columns])
+
+    def get(self, code: str, exchange: Optional[str] = None) -> Optional[SymbolRecord]:
+        """
+        按代码精确查找
+
+        Args:
+            code: 股票代码，也可以是 "AAPL.US" 形式
+            exchange: 交易所（Exchange 或 ExchangeCode），None 时取第一个同名代码
+
+        Returns:
+            找到的记录，找不到时为 None
+        """
+        code = code.upper()
+        if exchange is None and "." in code and code not in self._by_code:
+            code, exchange = code.rsplit(".", 1)
+        row = self._by_code.get(code)
+        if row is None:
+            return None
+        if exchange is None:
+            return self.record(row)
+        exchange = exchange.upper()
+        columns = self._columns
+        for row in self._duplicates.get(code, (row,)):
+            if exchange in (
+                columns["Exchange"][row].upper(),
+                columns["ExchangeCode"][row].upper(),
+            ):
+                return self.record(row)
+        return None
+
+    def get_all(self, code: str) -> List[SymbolRecord]:
+        """同一代码在不同交易所的全部记录"""
+        code = code.upper()
+        row = self._by_code.get(code)
+        if row is None:
+            return []
+        return [self.record(r) for r in self._duplicates.get(code, (row,))]
+
+    def by_isin(self, isin: str) -> Optional[SymbolRecord]:
+        """按 ISIN 精确查找"""
+        row = self._by_isin.get(isin.upper())
+        return None if row is None else self.record(row)
+
+    @staticmethod
+    def _prefix_rows(
+        keys: List[str], order: array, prefix: str, limit: int
+    ) -> List[int]:
+        rows = []
+        position = bisect_left(keys, prefix)
+        while position < len(keys) and len(rows) < limit:
+            if not keys[position].startswith(prefix):
+                break
+            rows.append(order[position])
+            position += 1
+        return rows
+
+    def search_codes(self, prefix: str, limit: int = 20) -> List[SymbolRecord]:
+        """代码前缀搜索（不区分大小写，按代码排序）"""
+        rows = self._prefix_rows(self._code_keys, self._code_order, prefix.upper(), limit)
+        return [self.record(row) for row in rows]
+
+    def search_names(self, prefix: str, limit: int = 20) -> List[SymbolRecord]:
+        """名称前缀搜索（不区分大小写，按名称排序）"""
+        rows = self._prefix_rows(
+            self._name_keys, self._name_order, prefix.casefold(), limit
+        )
+        return [self.record(row) for row in rows]
+
+    def search(self, prefix: str, limit: int = 20) -> List[SymbolRecord]:
+        """先按代码、再按名称做前缀搜索，结果去重"""
+        rows = self._prefix_rows(self._code_keys, self._code_order, prefix.upper(), limit)
+        if len(rows) < limit:
+            seen = set(rows)
+            for row in self._prefix_rows(
+                self._name_keys, self._name_order, prefix.casefold(), limit
+            ):
+                if row not in seen and len(rows) < limit:
+                    rows.append(row)
+        return [self.record(row) for row in rows]
+
+    def save(self, path: str) -> None:
+        """
+        保存索引；只保存列数据和排序结果，哈希索引在加载时重建
+
+        Args:
+            path: 输出文件路径
+        """
+        state = {
+            "version": FORMAT_VERSION,
+            "columns": self._columns,
+            "code_order": self._code_order,
+            "name_order": self._name_order,
+        }
+        with open(path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str) -> "SymbolIndex":
+        """
+        加载 save() 保存的索引
+
+        Raises:
+            ValueError: 文件格式版本不匹配
+        """
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if state.get("version") != FORMAT_VERSION:
+            raise ValueError(f"不支持的索引格式版本: {state.get('version')}")
+        index = cls.__new__(cls)
+        index._columns = state["columns"]
+        index._build(state["code_order"], state["name_order"])
+        return index
+
+
+if __name__ == "__main__":
+    import os
+    import random
+    import tempfile
+
+    exchanges = ["NASDAQ", "NYSE", "NYSE ARCA", "OTC", "BATS"]
+    records = [
+        {
+            "Code": f"S{i:05d}",
+            "Name": f"Company {random.randint(0, 99999)} Inc",
+            "Country": "USA",
+            "Exchange": random.choice(exchanges),
+            "Currency": "USD",
+            "Type": "Common Stock",
+            "Isin": f"US{i:010d}",
+        }
+        for i in range(50000)
+    ]
+
+    started = time.perf_counter()
+    index = SymbolIndex.from_records(records, exchange_code="US")
+    print(f"构建 {len(index)} 条索引耗时 {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    path = os.path.join(tempfile.gettempdir(), "symbol_index_demo.pkl")
+    index.save(path)
+    started = time.perf_counter()
+    loaded = SymbolIndex.load(path)
+    print(f"加载索引耗时 {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    started = time.perf_counter()
+    for i in range(10000):
+        loaded.get(f"S{i:05d}")
+    elapsed = time.perf_counter() - started
+    print(f"10000 次代码查找耗时 {elapsed * 1000:.1f}ms")
+    print(loaded.get("S00042.US"), loaded.by_isin("US0000000042"))
+    print([r.Code for r in loaded.search("S0001", limit=5)])
+    print([r.Name for r in loaded.search_names("company 12", limit=5)])
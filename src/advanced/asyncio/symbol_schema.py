@@ -0,0 +1,179 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "pandas",
+#     "pyarrow",
+# ]
+# ///
+
+"""
+股票列表与价格数据的紧凑 dtype 定义
+Exchange/Type/Country/Currency 等低基数列用 category，代码和名称用 pyarrow 字符串，
+价格列降为 float32、成交量降为最小整数类型；
+在构造 DataFrame 和读取 CSV/Parquet 时统一应用
+"""
+
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+STRING = "string[pyarrow]"
+
+# exchange-symbol-list 返回的列
+SYMBOL_SCHEMA: Dict[str, Any] = {
+    "Code": STRING,
+    "Name": STRING,
+    "Isin": STRING,
+    "Country": "category",
+    "Exchange": "category",
+    "Currency": "category",
+    "Type": "category",
+    "ExchangeCode": "category",
+    "Delisted": "boolean",
+}
+
+# eod-bulk-last-day 返回的列
+PRICE_SCHEMA: Dict[str, Any] = {
+    "code": STRING,
+    "exchange_short_name": "category",
+    "exchange": "category",
+    "date": "datetime64[ns]",
+    "open": "float32",
+    "high": "float32",
+    "low": "float32",
+    "close": "float32",
+    "adjusted_close": "float32",
+    "prev_close": "float32",
+    "change": "float32",
+    "change_p": "float32",
+    "ema_50d": "float32",
+    "ema_200d": "float32",
+    "hi_250d": "float32",
+    "lo_250d": "float32",
+    "volume": "integer",
+    "avgvol_14d": "float32",
+    "avgvol_50d": "float32",
+    "avgvol_200d": "float32",
+}
+
+
+def apply_schema(df: pd.DataFrame, schema: Dict[str, Any]) -> pd.DataFrame:
+    """
+    按 schema 转换已有的列，schema 中没有的列保持不变
+
+    Args:
+        df: 原始 DataFrame
+        schema: 列名 -> dtype
+
+    Returns:
+        转换后的 DataFrame（新对象）
+    """
+    conversions = {}
+    for col, dtype in schema.items():
+        if col not in df.columns:
+            continue
+        if dtype == "datetime64[ns]":
+            conversions[col] = pd.to_datetime(df[col], errors="coerce")
+        elif dtype == "float32":
+            conversions[col] = pd.to_numeric(df[col], errors="coerce").astype(dtype)
+        elif dtype == "integer":
+            numeric = pd.to_numeric(df[col], errors="coerce")
+            # 有缺失值时只能用可空整数，否则降到能容纳数值的最小整数类型
+            conversions[col] = (
+                numeric.astype("Int64")
+                if numeric.isna().any()
+                else pd.to_numeric(numeric, downcast="integer")
+            )
+        else:
+            conversions[col] = df[col].astype(dtype)
+    return df.assign(**conversions)
+
+
+def symbols_frame(records: List[Dict[str, Any]]) -> pd.DataFrame:
+    """用股票列表记录构造紧凑的 DataFrame"""
+    return apply_schema(pd.DataFrame.from_records(records), SYMBOL_SCHEMA)
+
+
+def prices_frame(records: List[Dict[str, Any]]) -> pd.DataFrame:
+    """用批量日终价格记录构造紧凑的 DataFrame"""
+    return apply_schema(pd.DataFrame.from_records(records), PRICE_SCHEMA)
+
+
+def read_symbols_csv(path: str, **kwargs) -> pd.DataFrame:
+    """
+    读取股票列表 CSV，解析时直接使用紧凑 dtype
+
+    Args:
+        path: CSV 文件路径
+        **kwargs: 透传给 pd.read_csv
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    dtype = {
+        col: dt
+        for col, dt in SYMBOL_SCHEMA.items()
+        if col in header and dt != "boolean"
+    }
+    df = pd.read_csv(path, dtype=dtype, **kwargs)
+    return apply_schema(df, SYMBOL_SCHEMA)
+
+
+def read_symbols_parquet(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """读取股票列表 Parquet 数据集并应用紧凑 dtype"""
+    return apply_schema(pd.read_parquet(path, columns=columns), SYMBOL_SCHEMA)
+
+
+def memory_report(
+    before: pd.DataFrame, after: pd.DataFrame, label: str = "DataFrame"
+) -> pd.DataFrame:
+    """
+    打印并返回转换前后每列的内存占用
+
+    Args:
+        before: 转换前
+        after: 转换后
+        label: 报告标题
+
+    Returns:
+        每列的内存对比表（单位 KB）
+    """
+    report = pd.DataFrame(
+        {
+            "before_dtype": before.dtypes.astype(str),
+            "after_dtype": after.dtypes.reindex(before.columns).astype(str),
+            "before_kb": before.memory_usage(deep=True, index=False) / 1024,
+            "after_kb": after.memory_usage(deep=True, index=False).reindex(
+                before.columns
+            )
+            / 1024,
+        }
+    )
+    total_before = report["before_kb"].sum()
+    total_after = report["after_kb"].sum()
+    print(f"\n=== {label} 内存占用 ===")
+    print(report.round(1).to_string())
+    print(
+        f"合计: {total_before:,.1f} KB -> {total_after:,.1f} KB "
+        f"(缩小 {total_before / max(total_after, 1e-9):.1f} 倍)"
+    )
+    return report
+
+
+if __name__ == "__main__":
+    import random
+
+    exchanges = ["NASDAQ", "NYSE", "NYSE ARCA", "OTC", "BATS"]
+    types = ["Common Stock", "ETF", "FUND", "Preferred Share"]
+    records = [
+        {
+            "Code": f"S{i:05d}",
+            "Name": f"Company {i} Inc",
+            "Country": "USA",
+            "Exchange": random.choice(exchanges),
+            "Currency": "USD",
+            "Type": random.choice(types),
+            "Isin": f"US{i:010d}",
+        }
+        for i in range(50000)
+    ]
+    raw = pd.DataFrame(records)
+    memory_report(raw, symbols_frame(records), "股票列表")
@@ -0,0 +1,39 @@
+"""
+async_writer 的测试：未调用 start() 时写入不会卡在已满的队列上
+
+用法:
+    uv run --with pytest --with pandas --with pyarrow pytest src/advanced/asyncio/test_async_writer.py
+"""
+
+import asyncio
+
+import pandas as pd
+import pytest
+
+from async_writer import AsyncFrameWriter
+
+
+def test_write_without_start(tmp_path):
+    path = str(tmp_path / "prices.csv")
+
+    async def main():
+        writer = AsyncFrameWriter(path, max_pending=2)
+        for i in range(10):
+            rows = [{"code": f"S{i}-{j}", "close": j * 1.5} for j in range(10)]
+            await asyncio.wait_for(writer.write(rows), timeout=5)
+        await writer.close()
+        return writer
+
+    writer = asyncio.run(main())
+    assert writer.chunks_written == 10
+    assert len(pd.read_csv(path)) == 100
+
+
+def test_write_after_close(tmp_path):
+    async def main():
+        async with AsyncFrameWriter(str(tmp_path / "prices.jsonl"), fmt="jsonl") as writer:
+            await writer.write([{"code": "A", "close": 1.0}])
+        with pytest.raises(RuntimeError):
+            await writer.write([{"code": "B", "close": 2.0}])
+
+    asyncio.run(main())
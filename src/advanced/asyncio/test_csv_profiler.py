@@ -0,0 +1,102 @@
+"""
+csv_profiler 的测试：分块统计与整体读入的结果一致，类型推断与 pandas 一致
+
+用法:
+    uv run --with pytest --with pandas --with numpy pytest src/advanced/asyncio/test_csv_profiler.py
+"""
+
+import pandas as pd
+import pytest
+
+from csv_profiler import CSVProfile, profile_csv
+
+COLUMNS = {
+    "Code": ["A", "B", "C", "B", "A", "D", "C", "E", "A", None, "F", "G"],
+    "Name": ["x", "", "y", " ", "x", "z", None, "w", "x", "v", "u", "t"],
+    "Flag": ["True", "False", "True", "True", "False", "True"] * 2,
+    "Active": ["true", None, "FALSE", "True", "false", "true"] * 2,
+    "Volume": ["1", "2", "3", "4", None, "6", "7", "8", "9", "10", "11", "12"],
+    "Price": ["1.5", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11", "-2"],
+}
+
+
+def summarize(profile: CSVProfile) -> dict:
+    """去掉块数、样本等与分块方式有关的字段后的报告内容"""
+    return {
+        "rows": profile.rows,
+        "duplicate_rows": profile.duplicate_rows,
+        "columns": {
+            name: {
+                "nulls": col.nulls,
+                "empty": col.empty_strings,
+                "blank": col.blank_strings,
+                "dtype": col.dtype,
+                "unique": col.unique_count,
+                "lengths": dict(col.lengths),
+                "shortest": col.shortest,
+                "longest": col.longest,
+                "pattern_matches": col.pattern_matches,
+                "values": dict(col.values or {}),
+                "duplicate_examples": col.duplicate_examples,
+            }
+            for name, col in profile.columns.items()
+        },
+    }
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "symbols.csv"
+    pd.DataFrame(COLUMNS).to_csv(path, index=False)
+    # 整行重复
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("A,x,True,true,1,1.5\nA,x,True,true,1,1.5\n")
+    return str(path)
+
+
+@pytest.mark.parametrize("chunksize", [1, 2, 3, 5])
+def test_chunked_matches_unchunked(csv_path, chunksize):
+    whole = summarize(profile_csv(csv_path, chunksize=None))
+    chunked = summarize(profile_csv(csv_path, chunksize=chunksize))
+    assert chunked == whole
+
+
+def test_dtypes_match_pandas(csv_path):
+    profile = profile_csv(csv_path, chunksize=4)
+    expected = pd.read_csv(csv_path).dtypes
+    assert profile.columns["Flag"].dtype == "bool"
+    assert profile.columns["Active"].dtype == "object"
+    for name in ("Flag", "Volume", "Price"):
+        assert profile.columns[name].dtype == str(expected[name])
+
+
+def test_duplicates(csv_path):
+    profile = profile_csv(csv_path, chunksize=2)
+    assert profile.duplicate_rows == pd.read_csv(csv_path).duplicated().sum() == 2
+    # 按第一次重复出现的行排序：B（第 4 行）、A（第 5 行）、C（第 7 行）
+    assert profile.columns["Code"].duplicate_examples == ["B", "A", "C"]
+
+
+def test_merge_matches_single_pass(csv_path):
+    df = pd.read_csv(csv_path, dtype=str)
+    first, second = CSVProfile(path=csv_path), CSVProfile(path=csv_path)
+    first.update(df.iloc[:7])
+    second.update(df.iloc[7:])
+    first.merge(second)
+    whole = profile_csv(csv_path, chunksize=None)
+    assert first.rows == whole.rows
+    assert first.duplicate_rows == whole.duplicate_rows
+    for name, col in whole.columns.items():
+        merged = first.columns[name]
+        assert merged.unique_count == col.unique_count
+        assert merged.dtype == col.dtype
+        assert merged.values == col.values
+
+
+def test_bool_columns_have_no_value_distribution(csv_path, capsys):
+    from csv_profiler import print_profile_report
+
+    print_profile_report(profile_csv(csv_path), format_checks=False)
+    report = capsys.readouterr().out
+    assert "Flag: bool" in report
+    assert "'True'" not in report and "'true'" not in report
@@ -22,11 +22,10 @@ def test_default_config():
         if key in os.environ:
             del os.environ[key]
 
-    # 重新导入配置以获取最新值
-    from importlib import reload
+    # 环境变量变化后重新解析配置
     import config
 
-    reload(config)
+    config.reload_settings()
 
     config.print_config_info()
 
@@ -41,11 +40,10 @@ def test_custom_config():
     os.environ["MAX_CONCURRENT_REQUESTS"] = "10"
     os.environ["TIMEOUT_SECONDS"] = "60"
 
-    # 重新导入配置
-    from importlib import reload
+    # 环境变量变化后重新解析配置
     import config
 
-    reload(config)
+    config.reload_settings()
 
     config.print_config_info()
 
@@ -54,6 +52,7 @@ def test_custom_config():
     print(f"API Token: {config.get_eodhd_api_token()}")
     print(f"最大并发数: {config.get_max_concurrent_requests()}")
     print(f"超时时间: {config.get_timeout_seconds()}秒")
+    print(f"fundamentals 超时: {config.get_settings().timeout_for('fundamentals')}")
 
 
 def test_partial_config():
@@ -66,11 +65,10 @@ def test_partial_config():
     if "EODHD_API_TOKEN" in os.environ:
         del os.environ["EODHD_API_TOKEN"]  # 移除 API token，使用默认值
 
-    # 重新导入配置
-    from importlib import reload
+    # 环境变量变化后重新解析配置
     import config
 
-    reload(config)
+    config.reload_settings()
 
     config.print_config_info()
 
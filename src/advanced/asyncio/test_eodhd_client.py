@@ -0,0 +1,75 @@
+"""
+EODHDClient.iter_chunks 的断点续传测试：用本地 aiohttp 服务模拟第一次响应中途断开
+
+用法:
+    uv run --with pytest --with aiohttp pytest src/advanced/asyncio/test_eodhd_client.py
+"""
+
+import asyncio
+import json
+
+import pytest
+from aiohttp import web
+
+from eodhd_client import EODHDClient, StreamChangedError
+from resilience import RetryPolicy
+
+ENDPOINT = "/exchange-symbol-list/US"
+BODY = json.dumps([{"Code": f"S{i}", "Name": "x" * 50} for i in range(3000)]).encode()
+
+
+async def read_with_dropped_connection(headers: dict, chunks: list) -> int:
+    """第一次响应只发出一部分就断开连接，读到的块追加到 chunks，返回请求次数"""
+    calls = []
+
+    async def handler(request):
+        calls.append(1)
+        response = web.StreamResponse(headers=headers)
+        await response.prepare(request)
+        if len(calls) == 1:
+            await response.write(BODY[:70000])
+            await asyncio.sleep(0.05)
+            request.transport.close()
+            return response
+        await response.write(BODY)
+        return response
+
+    app = web.Application()
+    app.router.add_get(f"/api{ENDPOINT}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    try:
+        async with EODHDClient(
+            "test",
+            base_url=f"http://127.0.0.1:{port}/api",
+            retry_policy=RetryPolicy(max_attempts=3, base_delay=0.01),
+        ) as client:
+            async for chunk in client.iter_chunks(ENDPOINT, chunk_size=16384):
+                chunks.append(chunk)
+    finally:
+        await runner.cleanup()
+    return len(calls)
+
+
+def test_resumes_when_version_matches():
+    chunks = []
+    calls = asyncio.run(
+        read_with_dropped_connection(
+            {"Content-Length": str(len(BODY)), "ETag": '"v1"'}, chunks
+        )
+    )
+    assert b"".join(chunks) == BODY
+    assert calls == 2
+
+
+def test_no_validator_is_not_resumed():
+    # 分块传输且没有 ETag/Last-Modified：无法确认重新请求得到的是同一份内容
+    chunks = []
+    with pytest.raises(StreamChangedError):
+        asyncio.run(
+            read_with_dropped_connection({"Content-Type": "application/json"}, chunks)
+        )
+    assert 0 < len(b"".join(chunks)) < len(BODY)
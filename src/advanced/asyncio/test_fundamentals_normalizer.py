@@ -0,0 +1,39 @@
+"""
+fundamentals_normalizer 的测试：EODHD 以字符串返回的数值字段被转换为数值列
+
+用法:
+    uv run --with pytest --with pandas --with numpy pytest src/advanced/asyncio/test_fundamentals_normalizer.py
+"""
+
+import pandas as pd
+
+from fundamentals_normalizer import _synthetic_document, normalize_fundamentals
+
+
+def normalized():
+    return normalize_fundamentals([_synthetic_document(i, quarters=4) for i in range(3)])
+
+
+def test_financials_are_numeric():
+    income = normalized().financials["Income_Statement"]
+    for col in ("totalRevenue", "netIncome"):
+        assert pd.api.types.is_numeric_dtype(income[col]), col
+    assert income["totalRevenue"].iloc[0] == 1000.0
+    # 不做数值转换的列保持原样
+    assert not pd.api.types.is_numeric_dtype(income["currency_symbol"])
+    assert pd.api.types.is_datetime64_any_dtype(income["date"])
+
+
+def test_highlights_and_valuation_are_numeric():
+    result = normalized()
+    for col in ("MarketCapitalization", "PERatio"):
+        assert pd.api.types.is_numeric_dtype(result.highlights[col]), col
+    assert result.highlights["PERatio"].iloc[0] == 15.3
+    for col in ("TrailingPE", "ForwardPE"):
+        assert pd.api.types.is_numeric_dtype(result.valuation[col]), col
+
+
+def test_text_columns_stay_text():
+    companies = normalized().companies
+    for col in ("Code", "Name", "Exchange"):
+        assert not pd.api.types.is_numeric_dtype(companies[col]), col
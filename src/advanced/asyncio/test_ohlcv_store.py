@@ -0,0 +1,65 @@
+"""
+ohlcv_store 的崩溃恢复测试：扩容后未 flush 就退出，重新打开时数据文件与 meta.json 一致
+
+用法:
+    uv run --with pytest --with numpy pytest src/advanced/asyncio/test_ohlcv_store.py
+"""
+
+import os
+
+import numpy as np
+
+from ohlcv_store import OHLCVStore
+
+
+def rows(*codes, close=10.0):
+    return [{"code": code, "close": close, "volume": 100} for code in codes]
+
+
+def crash(store: OHLCVStore) -> None:
+    """模拟进程崩溃：数据已写入文件，但没有 flush meta.json"""
+    for array in store._arrays.values():
+        array.flush()
+    store._arrays = {}
+
+
+def test_uncommitted_date_growth_is_truncated(tmp_path):
+    root = str(tmp_path / "ohlcv")
+    store = OHLCVStore(root, date_chunk=2, symbol_capacity=4)
+    store.append_day("2025-01-02", rows("A", "B"))
+    store.flush()
+    committed = os.path.getsize(store._path("close"))
+
+    # 第 3 天触发日期轴扩容，追加的行还没有提交就崩溃
+    store.append_day("2025-01-03", rows("A", "B"))
+    store.append_day("2025-01-06", rows("A", "B", close=99.0))
+    assert os.path.getsize(store._path("close")) > committed
+    crash(store)
+
+    store = OHLCVStore(root, date_chunk=2, symbol_capacity=4)
+    assert store.dates == ["2025-01-02"]
+    assert os.path.getsize(store._path("close")) == committed
+    for name, dtype in store.fields.items():
+        size = store._date_capacity * store._symbol_capacity * np.dtype(dtype).itemsize
+        assert os.path.getsize(store._path(name)) == size
+
+    store.append_day("2025-01-03", rows("A"))
+    store.append_day("2025-01-06", rows("A"))
+    store.flush()
+    # 崩溃前写入 B 的数据不能出现在重新写入的日期上
+    np.testing.assert_array_equal(store.series("A", "close"), [10.0, 10.0, 10.0])
+    assert np.isnan(store.series("B", "close")[1:]).all()
+
+
+def test_uncommitted_rows_within_capacity_are_cleared(tmp_path):
+    root = str(tmp_path / "ohlcv")
+    store = OHLCVStore(root, date_chunk=4, symbol_capacity=4)
+    store.append_day("2025-01-02", rows("A", "B"))
+    store.flush()
+    store.append_day("2025-01-03", rows("A", "B", close=99.0))
+    crash(store)
+
+    store = OHLCVStore(root, date_chunk=4, symbol_capacity=4)
+    store.append_day("2025-01-03", rows("A"))
+    assert store.series("A", "close")[1] == 10.0
+    assert np.isnan(store.series("B", "close")[1])
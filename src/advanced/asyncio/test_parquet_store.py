@@ -0,0 +1,40 @@
+"""
+parquet_store 的测试：分批写入同一分区不会互相覆盖，股票列表快照整体替换
+
+用法:
+    uv run --with pytest --with pandas --with pyarrow pytest src/advanced/asyncio/test_parquet_store.py
+"""
+
+import pandas as pd
+
+from parquet_store import read_dataset, write_bulk_prices, write_fundamentals, write_symbols
+
+
+def price(code: str, close: float) -> dict:
+    return {"code": code, "date": "2025-01-27", "close": close}
+
+
+def test_bulk_prices_batches_append(tmp_path):
+    root = str(tmp_path / "bulk_eod")
+    write_bulk_prices([price("AAPL", 1.0), price("MSFT", 2.0)], "US", root)
+    write_bulk_prices([price("IBM", 3.0)], "US", root)
+    df = read_dataset(root, filters=[("date", "=", "2025-01-27")])
+    assert sorted(df["code"]) == ["AAPL", "IBM", "MSFT"]
+
+
+def test_fundamentals_batches_append(tmp_path):
+    root = str(tmp_path / "fundamentals")
+    for code in ("AAPL", "MSFT"):
+        details = [{"General": {"Code": code, "Exchange": "NASDAQ"}}]
+        write_fundamentals(details, root, fetched_date="2025-01-27")
+    df = read_dataset(root, columns=["Code"])
+    assert sorted(df["Code"]) == ["AAPL", "MSFT"]
+
+
+def test_symbols_snapshot_replaces_partition(tmp_path):
+    root = str(tmp_path / "symbols")
+    first = pd.DataFrame({"Code": ["AAPL", "MSFT"], "Exchange": ["NASDAQ"] * 2})
+    second = pd.DataFrame({"Code": ["AAPL"], "Exchange": ["NASDAQ"]})
+    write_symbols(first, root, snapshot_date="2025-01-27")
+    write_symbols(second, root, snapshot_date="2025-01-27")
+    assert read_dataset(root)["Code"].tolist() == ["AAPL"]
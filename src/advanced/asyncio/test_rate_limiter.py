@@ -0,0 +1,73 @@
+"""
+rate_limiter 的每日额度计费测试：排队中被取消、429 后重新排队都不应多扣额度
+
+用法:
+    uv run --with pytest --with aiohttp pytest src/advanced/asyncio/test_rate_limiter.py
+"""
+
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from eodhd_client import EODHDClient
+from rate_limiter import DailyQuotaExceededError, QuotaRateLimiter
+
+
+def test_cancelled_waiter_keeps_daily_quota():
+    limiter = QuotaRateLimiter(per_minute=60, daily=100, burst_seconds=1.0)
+
+    async def main():
+        await limiter.acquire(1)
+        # 令牌已用完，下一个请求要等约 1 秒
+        task = asyncio.ensure_future(limiter.acquire(1))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert limiter.daily_used == 1
+
+
+def test_daily_quota_exceeded():
+    limiter = QuotaRateLimiter(per_minute=6000, daily=15)
+    asyncio.run(limiter.acquire(10))
+    with pytest.raises(DailyQuotaExceededError):
+        asyncio.run(limiter.acquire(10))
+    assert limiter.daily_used == 10
+
+
+def test_throttled_retry_is_charged_once():
+    calls = []
+
+    async def handler(request):
+        calls.append(1)
+        if len(calls) == 1:
+            return web.json_response({}, status=429, headers={"Retry-After": "0"})
+        return web.json_response({"General": {"Code": "AAPL"}})
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/api/fundamentals/{symbol}", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        limiter = QuotaRateLimiter(per_minute=60000, daily=1000)
+        try:
+            async with EODHDClient(
+                "test", base_url=f"http://127.0.0.1:{port}/api", rate_limiter=limiter
+            ) as client:
+                data = await client.get_json("/fundamentals/AAPL.US")
+        finally:
+            await runner.cleanup()
+        return data, limiter
+
+    data, limiter = asyncio.run(main())
+    assert data["General"]["Code"] == "AAPL"
+    assert len(calls) == 2
+    assert limiter.throttled == 1
+    # fundamentals 一次 10 个 credit，重新排队不再计费
+    assert limiter.daily_used == 10
@@ -0,0 +1,179 @@
+"""
+resilience 的错误分类与熔断器状态机测试
+
+用法:
+    uv run --with pytest --with aiohttp pytest src/advanced/asyncio/test_resilience.py
+"""
+
+import asyncio
+
+import pytest
+
+from resilience import (
+    FATAL,
+    RETRYABLE,
+    THROTTLED,
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    call_with_resilience,
+    call_with_resilience_sync,
+    classify_error,
+)
+
+
+class HTTPStatusError(Exception):
+    def __init__(self, status: int):
+        super().__init__(status)
+        self.status = status
+
+
+def open_breaker(threshold: int = 2, reset_timeout: float = 60.0) -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=threshold, reset_timeout=reset_timeout)
+    for _ in range(threshold):
+        breaker.before_call()
+        breaker.record_failure(RETRYABLE)
+    return breaker
+
+
+def half_open_breaker() -> CircuitBreaker:
+    breaker = open_breaker(reset_timeout=0.0)
+    breaker.before_call()
+    assert breaker.state == "half-open"
+    return breaker
+
+
+def test_classify_error():
+    assert classify_error(HTTPStatusError(429)) == THROTTLED
+    assert classify_error(HTTPStatusError(503)) == RETRYABLE
+    assert classify_error(HTTPStatusError(404)) == FATAL
+    assert classify_error(ConnectionResetError()) == RETRYABLE
+    assert classify_error(asyncio.TimeoutError()) == RETRYABLE
+    assert classify_error(FileNotFoundError("cache.sqlite")) == FATAL
+    assert classify_error(PermissionError()) == FATAL
+    assert classify_error(ValueError("bad json")) == FATAL
+
+
+def test_classify_requests_errors():
+    requests = pytest.importorskip("requests")
+    assert classify_error(requests.ConnectionError()) == RETRYABLE
+    assert classify_error(requests.Timeout()) == RETRYABLE
+    assert classify_error(requests.exceptions.InvalidURL()) == FATAL
+
+
+def test_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60.0)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure(RETRYABLE)
+    assert breaker.state == "closed"
+    breaker.before_call()
+    breaker.record_failure(RETRYABLE)
+    assert breaker.state == "open"
+
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure(RETRYABLE)
+    breaker.record_success()
+    breaker.record_failure(RETRYABLE)
+    assert breaker.state == "closed"
+
+
+def test_throttled_and_fatal_do_not_open():
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_failure(THROTTLED)
+    breaker.record_failure(FATAL)
+    assert breaker.state == "closed"
+    assert breaker.consecutive_failures == 0
+
+
+def test_open_rejects_until_timeout():
+    breaker = open_breaker()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.rejected == 1
+    assert breaker.state == "open"
+
+
+def test_half_open_allows_single_probe():
+    breaker = half_open_breaker()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_probe_success_closes():
+    breaker = half_open_breaker()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_probe_failure_reopens():
+    breaker = half_open_breaker()
+    breaker.record_failure(RETRYABLE)
+    assert breaker.state == "open"
+
+
+def test_probe_throttled_closes():
+    breaker = half_open_breaker()
+    breaker.record_failure(THROTTLED)
+    assert breaker.state == "closed"
+
+
+def test_cancelled_probe_releases_slot():
+    breaker = open_breaker(reset_timeout=0.0)
+
+    async def hang():
+        await asyncio.sleep(60)
+
+    async def main():
+        task = asyncio.ensure_future(call_with_resilience(hang, breaker=breaker))
+        await asyncio.sleep(0)
+        assert breaker.state == "half-open"
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert breaker.state == "half-open"
+    # 下一个请求可以继续探测，而不是被永久拒绝
+    breaker.before_call()
+
+
+def test_interrupted_sync_probe_releases_slot():
+    breaker = open_breaker(reset_timeout=0.0)
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        call_with_resilience_sync(interrupted, breaker=breaker)
+    breaker.before_call()
+
+
+def test_retries_retryable_then_succeeds():
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionResetError()
+        return "ok"
+
+    policy = RetryPolicy(max_attempts=3, base_delay=0.0)
+    assert asyncio.run(call_with_resilience(flaky, policy=policy)) == "ok"
+    assert len(calls) == 3
+
+
+def test_fatal_is_not_retried():
+    calls = []
+
+    def missing():
+        calls.append(1)
+        raise FileNotFoundError("cache.sqlite")
+
+    policy = RetryPolicy(max_attempts=3, base_delay=0.0)
+    with pytest.raises(FileNotFoundError):
+        call_with_resilience_sync(missing, policy=policy)
+    assert len(calls) == 1